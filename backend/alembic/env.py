@@ -21,9 +21,10 @@ from app.core.database import Base
 
 # 导入所有模型，确保它们被注册到 Base.metadata
 from app.models import (
-    MetaFileBatch,
+    MetaFileBatch, MetaDataVersion,
     DimStore, DimEmployee, DimRoom, DimProduct, DimPaymentMethod,
-    FactBooking, FactRoom, FactSales
+    FactBooking, FactRoom, FactSales, FactMemberChange, FactPaymentLine,
+    AggBookingDaily, AggRoomDaily, AggRoomHourly, AggSalesDaily, AggMemberChangeDaily,
 )
 
 # Alembic Config 对象
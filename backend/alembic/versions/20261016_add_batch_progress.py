@@ -0,0 +1,27 @@
+"""add job_id to meta_file_batch
+
+Revision ID: 20261016_batch_progress
+Revises: 20251224_add_receivable_amount
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_batch_progress'
+down_revision = '20251224_add_receivable_amount'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 异步导入任务ID：任务状态过期后按批次查询结果
+    op.add_column('meta_file_batch', sa.Column('job_id', sa.String(length=36), nullable=True, comment='异步导入任务ID'))
+    op.create_index('idx_job_id', 'meta_file_batch', ['job_id'])
+
+
+def downgrade():
+    op.drop_index('idx_job_id', table_name='meta_file_batch')
+    op.drop_column('meta_file_batch', 'job_id')
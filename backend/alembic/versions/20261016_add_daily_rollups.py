@@ -0,0 +1,152 @@
+"""add agg_*_daily rollup tables
+
+Revision ID: 20261016_daily_rollups
+Revises: 20261016_batch_progress
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_daily_rollups'
+down_revision = '20261016_batch_progress'
+branch_labels = None
+depends_on = None
+
+
+BOOKING_AMOUNT_COLUMNS = [
+    ('sales_amount', '销售金额'),
+    ('receivable_amount', '应收金额'),
+    ('actual_amount', '实收金额'),
+    ('base_performance', '基本业绩'),
+    ('gift_amount', '赠送金额'),
+    ('discount_amount', '折扣金额'),
+    ('credit_amount', '挂账金额'),
+    ('free_amount', '免单金额'),
+    ('round_off_amount', '抹零金额'),
+    ('service_fee', '服务费'),
+    ('adjustment_amount', '调整金额'),
+    ('pay_wechat', '微信支付'),
+    ('pay_alipay', '支付宝'),
+    ('pay_cash', '现金'),
+    ('pay_pos', 'POS/银行卡'),
+    ('pay_member', '会员支付'),
+    ('pay_douyin', '抖音'),
+    ('pay_meituan', '美团/团购'),
+    ('pay_scan', '扫码支付'),
+    ('pay_deposit', '定金消费'),
+]
+
+ROOM_AMOUNT_COLUMNS = [
+    ('receivable_amount', '应收金额'),
+    ('bill_total', '账单合计'),
+    ('actual_amount', '实收金额'),
+    ('min_consumption', '低消费'),
+    ('min_consumption_diff', '低消差额'),
+    ('gift_amount', '赠送金额'),
+    ('free_amount', '免单金额'),
+    ('credit_amount', '挂账金额'),
+    ('room_discount', '房费折扣'),
+    ('beverage_discount', '酒水折扣'),
+]
+
+MEMBER_CHANGE_AMOUNT_COLUMNS = [
+    ('recharge_real_income', '充值实收'),
+    ('room_amount_principal', '房费变动金额_本金'),
+    ('drink_amount_principal', '酒水变动金额_本金'),
+    ('room_amount_gift', '房费变动金额_赠送'),
+    ('drink_amount_gift', '酒水变动金额_赠送'),
+]
+
+
+def _key_columns():
+    return [
+        sa.Column('store_id', sa.Integer(), nullable=False, comment='关联门店'),
+        sa.Column('biz_date', sa.Date(), nullable=False, comment='营业日期'),
+    ]
+
+
+def _money(name, comment, precision=16):
+    return sa.Column(name, sa.DECIMAL(precision=precision, scale=2), nullable=True, server_default='0', comment=comment)
+
+
+def _updated_at():
+    return sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.text('CURRENT_TIMESTAMP'), comment='刷新时间')
+
+
+def upgrade():
+    # 按 门店 × 营业日期 预聚合的日汇总表，供按日期/门店维度的统计查询使用
+    op.create_table(
+        'agg_booking_daily',
+        *_key_columns(),
+        sa.Column('row_count', sa.BigInteger(), nullable=False, server_default='0', comment='明细行数'),
+        sa.Column('booking_qty', sa.BigInteger(), nullable=True, server_default='0', comment='订台数'),
+        *[_money(name, comment) for name, comment in BOOKING_AMOUNT_COLUMNS],
+        _updated_at(),
+        sa.PrimaryKeyConstraint('store_id', 'biz_date'),
+        comment='预订汇总日汇总表',
+    )
+    op.create_index('idx_agg_booking_date', 'agg_booking_daily', ['biz_date'])
+
+    op.create_table(
+        'agg_room_daily',
+        *_key_columns(),
+        sa.Column('order_count', sa.BigInteger(), nullable=False, server_default='0', comment='开台单数'),
+        *[_money(name, comment) for name, comment in ROOM_AMOUNT_COLUMNS],
+        sa.Column('duration_min', sa.BigInteger(), nullable=True, server_default='0', comment='时长合计(分钟)'),
+        sa.Column('low_consume_rate_sum', sa.DECIMAL(precision=20, scale=6), nullable=True, server_default='0', comment='单次低消达成率之和'),
+        sa.Column('low_consume_rate_count', sa.BigInteger(), nullable=True, server_default='0', comment='有低消的开台单数'),
+        _updated_at(),
+        sa.PrimaryKeyConstraint('store_id', 'biz_date'),
+        comment='包厢开台日汇总表',
+    )
+    op.create_index('idx_agg_room_date', 'agg_room_daily', ['biz_date'])
+
+    op.create_table(
+        'agg_sales_daily',
+        *_key_columns(),
+        sa.Column('row_count', sa.BigInteger(), nullable=False, server_default='0', comment='明细行数'),
+        sa.Column('sales_qty', sa.BigInteger(), nullable=True, comment='销售数量'),
+        sa.Column('sales_amount', sa.DECIMAL(precision=16, scale=2), nullable=True, comment='销售金额'),
+        sa.Column('gift_qty', sa.BigInteger(), nullable=True, comment='赠送数量'),
+        sa.Column('gift_amount', sa.DECIMAL(precision=16, scale=2), nullable=True, comment='赠送金额'),
+        sa.Column('cost_total', sa.DECIMAL(precision=16, scale=2), nullable=True, comment='成本小计'),
+        sa.Column('profit', sa.DECIMAL(precision=16, scale=2), nullable=True, comment='毛利'),
+        sa.Column('profit_rate_sum', sa.DECIMAL(precision=20, scale=4), nullable=True, comment='毛利率之和'),
+        sa.Column('profit_rate_count', sa.BigInteger(), nullable=True, server_default='0', comment='有毛利率的明细行数'),
+        _updated_at(),
+        sa.PrimaryKeyConstraint('store_id', 'biz_date'),
+        comment='酒水销售日汇总表',
+    )
+    op.create_index('idx_agg_sales_date', 'agg_sales_daily', ['biz_date'])
+
+    op.create_table(
+        'agg_member_change_daily',
+        *_key_columns(),
+        sa.Column('row_count', sa.BigInteger(), nullable=False, server_default='0', comment='明细行数'),
+        *[_money(name, comment) for name, comment in MEMBER_CHANGE_AMOUNT_COLUMNS],
+        _money('balance_total', '余额_合计', precision=18),
+        sa.Column('points_delta', sa.BigInteger(), nullable=True, server_default='0', comment='变动积分'),
+        sa.Column('growth_delta', sa.BigInteger(), nullable=True, server_default='0', comment='成长值_变动'),
+        sa.Column('recharge_count', sa.BigInteger(), nullable=True, server_default='0', comment='充值笔数'),
+        _updated_at(),
+        sa.PrimaryKeyConstraint('store_id', 'biz_date'),
+        comment='会员变动日汇总表',
+    )
+    op.create_index('idx_agg_member_change_date', 'agg_member_change_daily', ['biz_date'])
+
+    # 已有明细的回填不在迁移中执行（汇总口径在应用代码里），升级后运行:
+    #   python rebuild_derived_tables.py --only daily_rollups
+
+
+def downgrade():
+    op.drop_index('idx_agg_member_change_date', table_name='agg_member_change_daily')
+    op.drop_table('agg_member_change_daily')
+    op.drop_index('idx_agg_sales_date', table_name='agg_sales_daily')
+    op.drop_table('agg_sales_daily')
+    op.drop_index('idx_agg_room_date', table_name='agg_room_daily')
+    op.drop_table('agg_room_daily')
+    op.drop_index('idx_agg_booking_date', table_name='agg_booking_daily')
+    op.drop_table('agg_booking_daily')
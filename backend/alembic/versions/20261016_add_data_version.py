@@ -0,0 +1,33 @@
+"""add meta_data_version for stats cache invalidation
+
+Revision ID: 20261016_data_version
+Revises: 20261016_daily_rollups
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_data_version'
+down_revision = '20261016_daily_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 统计结果缓存的失效水位：每个 (表类型, 门店) 一行，入库/删除批次时递增
+    op.create_table(
+        'meta_data_version',
+        sa.Column('table_type', sa.String(length=50), nullable=False, comment='表类型: booking/room/sales/member_change'),
+        sa.Column('store_id', sa.Integer(), nullable=False, comment='关联门店ID'),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='0', comment='数据版本号'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.text('CURRENT_TIMESTAMP'), comment='更新时间'),
+        sa.PrimaryKeyConstraint('table_type', 'store_id'),
+        comment='事实数据版本表(统计缓存失效)',
+    )
+
+
+def downgrade():
+    op.drop_table('meta_data_version')
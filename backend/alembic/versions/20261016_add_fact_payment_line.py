@@ -0,0 +1,46 @@
+"""add fact_payment_line for dynamic payment aggregation
+
+Revision ID: 20261016_payment_line
+Revises: 20261016_data_version
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_payment_line'
+down_revision = '20261016_data_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # extra_payments / extra_info 中的动态支付方式拆成明细行，统计时直接 GROUP BY
+    op.create_table(
+        'fact_payment_line',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False, comment='自增主键'),
+        sa.Column('fact_table', sa.String(length=20), nullable=False, comment='来源表类型: booking/room'),
+        sa.Column('fact_id', sa.BigInteger(), nullable=False, comment='来源明细ID'),
+        sa.Column('batch_id', sa.BigInteger(), nullable=False, comment='关联批次'),
+        sa.Column('store_id', sa.Integer(), nullable=False, comment='关联门店'),
+        sa.Column('biz_date', sa.Date(), nullable=False, comment='营业日期'),
+        sa.Column('pay_code', sa.String(length=100), nullable=False, comment='支付方式键(pay_ 前缀)'),
+        sa.Column('amount', sa.DECIMAL(precision=14, scale=2), nullable=False, server_default='0', comment='金额'),
+        sa.PrimaryKeyConstraint('id'),
+        comment='动态支付方式明细表',
+    )
+    op.create_index('idx_pay_line_table_date_store', 'fact_payment_line', ['fact_table', 'biz_date', 'store_id', 'pay_code'])
+    op.create_index('idx_pay_line_fact', 'fact_payment_line', ['fact_table', 'fact_id'])
+    op.create_index('idx_pay_line_batch', 'fact_payment_line', ['batch_id'])
+
+    # 已有明细的回填不在迁移中执行（拆分规则在应用代码里），升级后运行:
+    #   python rebuild_derived_tables.py --only payment_lines
+
+
+def downgrade():
+    op.drop_index('idx_pay_line_batch', table_name='fact_payment_line')
+    op.drop_index('idx_pay_line_fact', table_name='fact_payment_line')
+    op.drop_index('idx_pay_line_table_date_store', table_name='fact_payment_line')
+    op.drop_table('fact_payment_line')
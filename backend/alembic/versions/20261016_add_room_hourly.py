@@ -0,0 +1,45 @@
+"""add agg_room_hourly occupancy table
+
+Revision ID: 20261016_room_hourly
+Revises: 20261016_payment_line
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_room_hourly'
+down_revision = '20261016_payment_line'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 门店 × 包厢 × 营业日期 × 钟点 的占用汇总，入库时摊分，供 24 小时利用率查询直接读取
+    op.create_table(
+        'agg_room_hourly',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False, comment='自增主键'),
+        sa.Column('store_id', sa.Integer(), nullable=False, comment='关联门店'),
+        sa.Column('room_id', sa.Integer(), nullable=True, comment='关联包厢'),
+        sa.Column('biz_date', sa.Date(), nullable=False, comment='营业日期'),
+        sa.Column('hour', sa.SmallInteger(), nullable=False, comment='钟点(0-23)'),
+        sa.Column('orders', sa.BigInteger(), nullable=False, server_default='0', comment='开台单数'),
+        sa.Column('gmv', sa.DECIMAL(precision=16, scale=2), nullable=True, server_default='0', comment='应收金额'),
+        sa.Column('occupied_minutes', sa.DECIMAL(precision=14, scale=4), nullable=True, server_default='0', comment='占用分钟'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.text('CURRENT_TIMESTAMP'), comment='刷新时间'),
+        sa.PrimaryKeyConstraint('id'),
+        comment='包厢小时占用汇总表',
+    )
+    op.create_index('idx_agg_room_hourly_store_date', 'agg_room_hourly', ['store_id', 'biz_date', 'hour'])
+    op.create_index('idx_agg_room_hourly_date', 'agg_room_hourly', ['biz_date', 'hour'])
+
+    # 已有明细的回填不在迁移中执行（摊分规则在应用代码里），升级后运行:
+    #   python rebuild_derived_tables.py --only room_hourly
+
+
+def downgrade():
+    op.drop_index('idx_agg_room_hourly_date', table_name='agg_room_hourly')
+    op.drop_index('idx_agg_room_hourly_store_date', table_name='agg_room_hourly')
+    op.drop_table('agg_room_hourly')
@@ -0,0 +1,39 @@
+"""add store-first composite and covering indexes for stats queries
+
+Revision ID: 20261016_store_first_idx
+Revises: 20261016_room_hourly
+Create Date: 2026-10-16 20:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_store_first_idx'
+down_revision = '20261016_room_hourly'
+branch_labels = None
+depends_on = None
+
+
+# (表名, 索引名, 列)
+INDEXES = [
+    # 单门店查询 store_id = ? AND biz_date BETWEEN ? AND ?：门店在前可直接定位区间，
+    # 原 (biz_date, store_id) 索引需扫描区间内所有门店的记录再过滤
+    ('fact_booking', 'idx_store_date', ['store_id', 'biz_date']),
+    ('fact_member_change', 'idx_store_date', ['store_id', 'biz_date']),
+    ('fact_sales', 'idx_store_date_product', ['store_id', 'biz_date', 'product_id']),
+    # 覆盖小时利用率实时计算（未启用汇总表时）所需的列，免回表
+    ('fact_room', 'idx_store_date_times', ['store_id', 'biz_date', 'open_time', 'close_time', 'duration_min']),
+    # 动态支付方式单门店汇总：覆盖 pay_code / amount
+    ('fact_payment_line', 'idx_pay_line_table_store_date', ['fact_table', 'store_id', 'biz_date', 'pay_code', 'amount']),
+]
+
+
+def upgrade():
+    for table_name, index_name, columns in INDEXES:
+        op.create_index(index_name, table_name, columns)
+
+
+def downgrade():
+    for table_name, index_name, _ in reversed(INDEXES):
+        op.drop_index(index_name, table_name=table_name)
@@ -112,6 +112,11 @@ def _safe_float(value, default: float = 0.0) -> float:
         return default
 
 
+def _sum_window(rows: List[dict], window: str, field: str) -> float:
+    """累加 aggregate_dashboard_windows 结果中某个窗口的字段（门店已在 SQL 中过滤）"""
+    return sum(_safe_float(row[window][field]) for row in rows)
+
+
 # ============================================================
 # API 接口
 # ============================================================
@@ -173,7 +178,19 @@ async def get_dashboard_summary(
             # 如果上个月没有这一天（例如3月31日 -> 2月没有31日），取上个月最后一天
             last_month_end = last_month_start.replace(day=days_in_last_month)
 
-    
+    # 近12个月趋势窗口
+    trend_window_start = add_months(yesterday.replace(day=1), -(TREND_MONTH_WINDOW - 1))
+    month_keys = build_month_keys(trend_window_start, TREND_MONTH_WINDOW)
+
+    # 所有时间窗口在每张表上一次条件聚合完成（按 月份 × 门店 分组，门店在 SQL 中过滤）
+    windows = {
+        "day": (yesterday, yesterday),
+        "prev_day": (day_before_yesterday, day_before_yesterday),
+        "month": (month_start, yesterday),
+        "prev_month": (last_month_start, last_month_end),
+        "trend": (trend_window_start, yesterday),
+    }
+
     # 初始化数据
     yesterday_actual = 0.0
     day_before_actual = 0.0
@@ -187,135 +204,54 @@ async def get_dashboard_summary(
         "avg_duration": 0.0,
         "turnover_rate": 0.0,
     }
-    
-    # 查询数据
+    room_rows: List[dict] = []
+    member_rows: List[dict] = []
+
     # 每日实收 = 包厢开台实收 + 会员充值实收
     try:
-        # 基准日数据 - 包厢开台实收
-        yesterday_room_result = stats_service.query_stats(
-            table="room",
-            start_date=yesterday,
-            end_date=yesterday,
-            store_id=store_id,
-            dimension="date",
-            granularity="day",
-        )
-        for row in yesterday_room_result.get("series_rows", []):
-            yesterday_actual += _safe_float(row.get("actual"))
-        
-        # 基准日数据 - 会员充值实收
-        yesterday_member_result = stats_service.query_stats(
-            table="member_change",
-            start_date=yesterday,
-            end_date=yesterday,
-            store_id=store_id,
-            dimension="date",
-            granularity="day",
-        )
-        for row in yesterday_member_result.get("series_rows", []):
-            yesterday_actual += _safe_float(row.get("recharge_real_income"))
-        
-        # 前天数据 - 包厢开台实收
-        day_before_room_result = stats_service.query_stats(
-            table="room",
-            start_date=day_before_yesterday,
-            end_date=day_before_yesterday,
-            store_id=store_id,
-            dimension="date",
-            granularity="day",
+        room_rows = stats_service.aggregate_dashboard_windows("room", windows, store_id)
+        member_rows = stats_service.aggregate_dashboard_windows(
+            "member_change", windows, store_id
         )
-        for row in day_before_room_result.get("series_rows", []):
-            day_before_actual += _safe_float(row.get("actual"))
-        
-        # 前天数据 - 会员充值实收
-        day_before_member_result = stats_service.query_stats(
-            table="member_change",
-            start_date=day_before_yesterday,
-            end_date=day_before_yesterday,
-            store_id=store_id,
-            dimension="date",
-            granularity="day",
+
+        yesterday_actual = _sum_window(room_rows, "day", "actual") + _sum_window(
+            member_rows, "day", "recharge_real_income"
         )
-        for row in day_before_member_result.get("series_rows", []):
-            day_before_actual += _safe_float(row.get("recharge_real_income"))
-        
-        # 本月累计 - 包厢开台实收
-        month_room_result = stats_service.query_stats(
-            table="room",
-            start_date=month_start,
-            end_date=yesterday,
-            store_id=store_id,
-            dimension="date",
-            granularity="day",
+        day_before_actual = _sum_window(room_rows, "prev_day", "actual") + _sum_window(
+            member_rows, "prev_day", "recharge_real_income"
         )
-        for row in month_room_result.get("series_rows", []):
-            month_actual += _safe_float(row.get("actual"))
-        
-        # 本月累计 - 会员充值实收
-        month_member_result = stats_service.query_stats(
-            table="member_change",
-            start_date=month_start,
-            end_date=yesterday,
-            store_id=store_id,
-            dimension="date",
-            granularity="day",
+        month_actual = _sum_window(room_rows, "month", "actual") + _sum_window(
+            member_rows, "month", "recharge_real_income"
         )
-        for row in month_member_result.get("series_rows", []):
-            month_actual += _safe_float(row.get("recharge_real_income"))
-        
-        # 上月同期 - 包厢开台实收
-        last_month_room_result = stats_service.query_stats(
-            table="room",
-            start_date=last_month_start,
-            end_date=last_month_end,
-            store_id=store_id,
-            dimension="date",
-            granularity="day",
+        last_month_actual = _sum_window(room_rows, "prev_month", "actual") + _sum_window(
+            member_rows, "prev_month", "recharge_real_income"
         )
-        for row in last_month_room_result.get("series_rows", []):
-            last_month_actual += _safe_float(row.get("actual"))
-        
-        # 上月同期 - 会员充值实收
-        last_month_member_result = stats_service.query_stats(
-            table="member_change",
-            start_date=last_month_start,
-            end_date=last_month_end,
-            store_id=store_id,
-            dimension="date",
-            granularity="day",
-        )
-        for row in last_month_member_result.get("series_rows", []):
-            last_month_actual += _safe_float(row.get("recharge_real_income"))
     except Exception:
         pass
 
-    # 包厢效率指标
+    # 包厢效率指标（本月开台数/时长取自同一次聚合）
     try:
-        efficiency_result = stats_service.get_room_efficiency_stats(
-            store_id=store_id,
-            start_date=month_start,
-            end_date=yesterday,
-        ) or {}
-        room_efficiency["total_orders"] = int(_safe_float(efficiency_result.get("total_orders")))
-        room_efficiency["avg_duration"] = _safe_float(efficiency_result.get("avg_duration"))
-        room_efficiency["turnover_rate"] = _safe_float(efficiency_result.get("turnover_rate"))
+        total_orders = int(_sum_window(room_rows, "month", "orders"))
+        total_duration = _sum_window(room_rows, "month", "duration")
+        room_count = stats_service.get_active_room_count(store_id)
+        room_efficiency["total_orders"] = total_orders
+        room_efficiency["avg_duration"] = (
+            round(total_duration / total_orders, 2) if total_orders > 0 else 0.0
+        )
+        room_efficiency["turnover_rate"] = (
+            round(total_orders / room_count, 4) if room_count > 0 else 0.0
+        )
     except Exception:
         pass
 
     # 本月销售/成本聚合（sales 表）
     try:
-        sales_month_result = stats_service.query_stats(
-            table="sales",
-            start_date=month_start,
-            end_date=yesterday,
-            store_id=store_id,
-            dimension="date",
-            granularity="day",
+        sales_rows = stats_service.aggregate_dashboard_windows(
+            "sales", {"month": windows["month"]}, store_id
         )
-        for row in sales_month_result.get("series_rows", []):
-            month_cost += _safe_float(row.get("cost_total"))
-            sales_qty_total += int(_safe_float(row.get("sales_qty")))
-            gift_qty_total += int(_safe_float(row.get("gift_qty")))
+        month_cost = _sum_window(sales_rows, "month", "cost_total")
+        sales_qty_total = int(_sum_window(sales_rows, "month", "sales_qty"))
+        gift_qty_total = int(_sum_window(sales_rows, "month", "gift_qty"))
     except Exception:
         pass
     
@@ -330,65 +266,28 @@ async def get_dashboard_summary(
     # 生成趋势数据 (近12个月)
     # 趋势数据 = 包厢开台实收 + 会员充值实收
     revenue_trend: List[TrendItem] = []
-    trend_window_start = add_months(yesterday.replace(day=1), -(TREND_MONTH_WINDOW - 1))
-    month_keys = build_month_keys(trend_window_start, TREND_MONTH_WINDOW)
-    month_key_set = set(month_keys)
-
-    try:
-        # 包厢开台实收趋势
-        trend_room_result = stats_service.query_stats(
-            table="room",
-            start_date=trend_window_start,
-            end_date=yesterday,
-            store_id=store_id,
-            dimension="date",
-            granularity="month",
-        )
-        # 会员充值实收趋势
-        trend_member_result = stats_service.query_stats(
-            table="member_change",
-            start_date=trend_window_start,
-            end_date=yesterday,
-            store_id=store_id,
-            dimension="date",
-            granularity="month",
-        )
-        
-        # 合并包厢实收和会员充值实收
-        room_data = {}
-        for row in trend_room_result.get("series_rows", []):
-            dimension_key = str(row.get("dimension_key") or "")
-            if dimension_key and dimension_key in month_key_set:
-                room_data[dimension_key] = {
-                    "actual": _safe_float(row.get("actual")),
-                    "orders": int(_safe_float(row.get("orders"))),
-                }
-        
-        member_data = {}
-        for row in trend_member_result.get("series_rows", []):
-            dimension_key = str(row.get("dimension_key") or "")
-            if dimension_key and dimension_key in month_key_set:
-                member_data[dimension_key] = _safe_float(row.get("recharge_real_income"))
-        
-        # 合并数据
-        for dimension_key in month_key_set:
-            room_actual = room_data.get(dimension_key, {}).get("actual", 0.0)
-            member_actual = member_data.get(dimension_key, 0.0)
-            total_actual = round(room_actual + member_actual, 2)
-            orders_value = room_data.get(dimension_key, {}).get("orders", 0)
-            
+    trend_totals = {key: {"actual": 0.0, "orders": 0.0} for key in month_keys}
+    for row in room_rows:
+        bucket = trend_totals.get(str(row["month_key"] or ""))
+        if bucket is not None:
+            bucket["actual"] += _safe_float(row["trend"]["actual"])
+            bucket["orders"] += _safe_float(row["trend"]["orders"])
+    for row in member_rows:
+        bucket = trend_totals.get(str(row["month_key"] or ""))
+        if bucket is not None:
+            bucket["actual"] += _safe_float(row["trend"]["recharge_real_income"])
+
+    if room_rows or member_rows:
+        for dimension_key in month_keys:
+            total_actual = round(trend_totals[dimension_key]["actual"], 2)
             revenue_trend.append(
                 TrendItem(
                     date=dimension_key,
                     value=total_actual,
                     revenue=total_actual,
-                    orders=orders_value,
+                    orders=int(trend_totals[dimension_key]["orders"]),
                 )
             )
-        
-        revenue_trend.sort(key=lambda item: item.date)
-    except Exception:
-        revenue_trend = []
 
     if not revenue_trend:
         revenue_trend = [
@@ -401,51 +300,39 @@ async def get_dashboard_summary(
     top_employees = []
     top_products = []
 
-    try:
-        # 门店排行：汇总包厢实收 + 会员充值实收
-        room_stores_result = stats_service.query_stats(
-            table="room",
-            start_date=month_start,
-            end_date=yesterday,
-            dimension="store",
-            top_n=100
-        )
-        member_stores_result = stats_service.query_stats(
-            table="member_change",
-            start_date=month_start,
-            end_date=yesterday,
-            dimension="store",
-            top_n=100
-        )
-
-        store_totals = {}
-        for row in room_stores_result.get("series_rows", []):
-            sid = row["dimension_key"]
-            store_totals[sid] = {
-                "name": row.get("dimension_label") or f"门店{sid}",
-                "value": _safe_float(row.get("actual"))
-            }
-        
-        for row in member_stores_result.get("series_rows", []):
-            sid = row["dimension_key"]
-            val = _safe_float(row.get("recharge_real_income"))
-            if sid in store_totals:
-                store_totals[sid]["value"] += val
-            else:
-                store_totals[sid] = {
-                    "name": row.get("dimension_label") or f"门店{sid}",
-                    "value": val
-                }
-        
-        # 排序并取 Top 5
-        sorted_stores = sorted(store_totals.values(), key=lambda x: x["value"], reverse=True)[:5]
-        top_stores = [
-            TopItem(rank=i + 1, name=s["name"], value=round(s["value"], 2))
-            for i, s in enumerate(sorted_stores)
-        ]
-    except Exception as e:
-        import logging
-        logging.warning(f"Failed to get combined top stores: {e}")
+    # 门店排行：汇总包厢实收 + 会员充值实收（全部门店本月数据）
+    # 未指定门店时直接复用上面的聚合结果；指定门店时另查全部门店的本月窗口（只扫描一个月）
+    current_month_key = month_start.strftime("%Y-%m")
+    ranking_sources = [(room_rows, "actual"), (member_rows, "recharge_real_income")]
+    if store_id is not None:
+        month_window = {"month": windows["month"]}
+        try:
+            ranking_sources = [
+                (stats_service.aggregate_dashboard_windows("room", month_window), "actual"),
+                (
+                    stats_service.aggregate_dashboard_windows("member_change", month_window),
+                    "recharge_real_income",
+                ),
+            ]
+        except Exception:
+            ranking_sources = []
+    store_totals = {}
+    for rows, field in ranking_sources:
+        for row in rows:
+            if row["month_key"] != current_month_key:
+                continue
+            sid = row["store_id"]
+            entry = store_totals.setdefault(
+                sid, {"name": row.get("store_name") or f"门店{sid}", "value": 0.0}
+            )
+            entry["value"] += _safe_float(row["month"][field])
+
+    # 排序并取 Top 5
+    sorted_stores = sorted(store_totals.values(), key=lambda x: x["value"], reverse=True)[:5]
+    top_stores = [
+        TopItem(rank=i + 1, name=s["name"], value=round(s["value"], 2))
+        for i, s in enumerate(sorted_stores)
+    ]
 
     try:
         # 员工排行
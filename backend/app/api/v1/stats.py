@@ -24,8 +24,9 @@ from sqlalchemy.orm import Session
 
 from app.schemas import TableType, Dimension, TimeGranularity
 from app.core.database import get_db
-from app.core.security import get_current_manager
+from app.core.security import get_current_manager, get_current_admin
 from app.services.stats import StatsService
+from app.services.stats_cache import get_stats_cache
 
 router = APIRouter()
 
@@ -98,6 +99,8 @@ async def query_stats(
     top_n: int = Query(50, ge=1, le=200, description="非时间维度 Top-N（series_rows 用）"),
     sort_by: Optional[str] = Query(None, description="排序字段"),
     sort_order: Optional[str] = Query(None, description="排序方向: asc 或 desc"),
+    cursor: Optional[str] = Query(None, description="游标分页：上一页 meta.next_cursor，传入时忽略 page"),
+    count_mode: str = Query("exact", description="总数计算方式: exact 精确计数 / none 不单独计数"),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_manager),
 ):
@@ -129,6 +132,8 @@ async def query_stats(
             top_n=top_n,
             sort_by=sort_by,
             sort_order=sort_order,
+            cursor=cursor,
+            count_mode=count_mode,
         )
     except ValueError as e:
         return {"success": False, "message": str(e), "data": None}
@@ -198,4 +203,11 @@ async def get_date_range(
         }
 
 
-
+@router.get("/cache", summary="统计结果缓存命中情况", response_model=None)
+async def get_stats_cache_info(
+    current_user: dict = Depends(get_current_admin),
+):
+    """
+    返回当前进程的统计结果缓存状态（条目数、命中/未命中、淘汰次数）
+    """
+    return {"success": True, "data": get_stats_cache().stats()}
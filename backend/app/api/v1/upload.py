@@ -29,6 +29,7 @@ from fastapi import (
     Query,
 )
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
@@ -41,24 +42,33 @@ from app.schemas import (
     ValidationResult,
     ImportResult,
     ImportSummary,
+    ImportJobInfo,
     RowError,
 )
-from app.core.database import get_db
-from app.core.security import get_current_manager
+from app.core.database import SessionLocal, get_db
+from app.core.security import get_current_manager, get_current_user
 from app.models.meta import MetaFileBatch
-from app.services.cleaner import CleanerService
-from app.services.parser import (
-    read_excel_file,
-    detect_report_type,
-    ParserError,
-)
+from app.services.parser import ParserError
 from app.services.importer import ImporterService, DuplicateFileError, describe_duplicate_batch
+from app.services.pipeline import (
+    PipelineBusyError,
+    PipelineTaskError,
+    parse_and_clean_chunks,
+    parse_and_clean_file,
+    run_parse_task,
+    run_parse_task_sync,
+    run_import_task,
+    run_import_task_sync,
+)
+from app.services.jobs import ImportJob, submit_job, get_job
+from app.services.parse_cache import get_parse_cache
+from app.services.session_store import get_parse_session_store, iter_record_spool
 
 router = APIRouter()
 settings = get_settings()
 
-# 临时存储解析结果 (生产环境应使用 Redis 或数据库)
-_parse_cache: dict = {}
+# 解析会话存储：落盘到 UPLOAD_DIR/sessions，带 TTL 和内存预算，多 worker 共享
+_parse_sessions = get_parse_session_store()
 
 
 try:  # numpy/pandas 标量在 FastAPI/Pydantic 序列化时经常导致 500
@@ -106,9 +116,61 @@ def _to_builtin(obj: Any) -> Any:
     return obj
 
 
-def _calculate_file_hash(contents: bytes) -> str:
-    """计算文件内容的 SHA256 哈希"""
-    return hashlib.sha256(contents).hexdigest()
+def _calculate_file_hash(file_path: str) -> str:
+    """分块计算文件的 SHA256 哈希"""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(settings.UPLOAD_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _remove_file_quietly(file_path: str) -> None:
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+
+async def _save_upload_file(file: UploadFile, file_path: str) -> str:
+    """
+    分块把上传文件写入磁盘，同时增量计算 SHA256
+
+    内存中只保留一个分块，不再整文件 read() 后再复制给哈希/写盘/解析。
+    先写入 .part 临时文件，完整写入后再改名，失败时不会留下半截文件。
+
+    Returns:
+        str: 文件内容的 SHA256 哈希
+
+    Raises:
+        HTTPException: 文件为空 (400) 或超过 MAX_FILE_SIZE (413)
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    part_path = f"{file_path}.part"
+    try:
+        with open(part_path, "wb") as f:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > settings.MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"文件超过大小限制 {settings.MAX_FILE_SIZE // (1024 * 1024)}MB",
+                    )
+                hasher.update(chunk)
+                f.write(chunk)
+
+        if size == 0:
+            raise HTTPException(status_code=400, detail="文件内容为空")
+
+        os.replace(part_path, file_path)
+    except BaseException:
+        _remove_file_quietly(part_path)
+        raise
+    return hasher.hexdigest()
 
 
 def _find_success_batch_by_hash(db: Session, file_hash: Optional[str]) -> Optional[MetaFileBatch]:
@@ -222,86 +284,54 @@ def _convert_validation_result(
     return api_validation, store_name, meta
 
 
-def _determine_table_type(filename: str, df) -> Tuple[TableType, str]:
-    """
-    结合文件内容和文件名，确定表类型。
+def _parse_task(
+    file_path: str,
+    filename: str,
+    fallback_type: str,
+    session_id: str,
+    file_hash: Optional[str],
+) -> Tuple[Any, tuple]:
     """
-    detected = detect_report_type(df, filename)
-    if detected in TableType._value2member_map_:
-        table_type = TableType(detected)
-        return table_type, TABLE_TYPE_NAMES[table_type]
-    return detect_table_type(filename)
+    选择解析任务及其参数
 
-
-# ============================================================
-# API 接口
-# ============================================================
+    不小于 UPLOAD_STREAM_THRESHOLD 的 CSV、不小于 UPLOAD_XLSX_STREAM_THRESHOLD 的 xlsx
+    按块流式解析，清洗结果写入会话记录文件；其余文件整文件解析（按 file_hash 使用解析缓存）。
+    """
+    filename_lower = filename.lower()
+    if filename_lower.endswith(".csv"):
+        threshold = settings.UPLOAD_STREAM_THRESHOLD
+    elif filename_lower.endswith(".xlsx"):
+        threshold = settings.UPLOAD_XLSX_STREAM_THRESHOLD
+    else:
+        threshold = None
+    if threshold is not None and os.path.getsize(file_path) >= threshold:
+        return parse_and_clean_chunks, (
+            file_path,
+            filename,
+            fallback_type,
+            _parse_sessions.spool_path(session_id),
+            settings.UPLOAD_STREAM_CHUNK_ROWS,
+        )
+    return parse_and_clean_file, (file_path, filename, fallback_type, file_hash)
 
 
-@router.post("/parse", response_model=UploadResponse, summary="解析上传文件")
-async def parse_file(
-    file: UploadFile = File(..., description="Excel/CSV 文件"),
-    store_id: Optional[int] = Form(None, description="门店ID (可选)"),
-    db: Session = Depends(get_db),
-):
+def _cache_parse_result(
+    session_id: str,
+    file_path: str,
+    file_hash: Optional[str],
+    store_id: Optional[int],
+    report_type: str,
+    cleaned_data: List[Dict[str, Any]],
+    cleaner_validation,
+    stream_info: Optional[Dict[str, Any]] = None,
+) -> ParseResult:
     """
-    步骤1: 解析上传的文件，返回预览数据供用户确认
+    根据清洗结果构建 ParseResult，并写入解析会话缓存
 
-    处理流程:
-    1. 保存文件到临时目录
-    2. 调用 ParserService 解析文件 (Dev B)
-    3. 调用 CleanerService 清洗数据 (Dev B)
-    4. 返回解析结果供前端预览
+    流式解析时 cleaned_data 只有预览行，完整数据在 stream_info["record_spool"]。
     """
-    # 验证文件类型
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="文件名不能为空")
-
-    ext = file.filename.split(".")[-1].lower()
-    if ext not in ["csv", "xls", "xlsx"]:
-        raise HTTPException(status_code=400, detail="仅支持 .csv, .xls, .xlsx 格式")
-
-    # 生成会话ID
-    session_id = str(uuid.uuid4())
-
-    # 保存文件
-    upload_dir = settings.UPLOAD_DIR
-    os.makedirs(upload_dir, exist_ok=True)
-
-    file_path = os.path.join(upload_dir, f"{session_id}_{file.filename}")
-
-    file_hash: Optional[str] = None
-    try:
-        contents = await file.read()
-
-        if not contents:
-            raise HTTPException(status_code=400, detail="文件内容为空")
-
-        file_hash = _calculate_file_hash(contents)
-        duplicate_batch = _find_success_batch_by_hash(db, file_hash)
-        if duplicate_batch:
-            message = describe_duplicate_batch(duplicate_batch)
-            return _conflict_response(message)
-
-        with open(file_path, "wb") as f:
-            f.write(contents)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"文件保存失败: {str(e)}")
-
-    try:
-        df, detected_date = read_excel_file(contents, file.filename)
-    except ParserError as exc:
-        raise HTTPException(status_code=400, detail=f"文件解析失败: {exc}")
-
-    table_type, table_type_name = _determine_table_type(file.filename, df)
-
-    cleaner = CleanerService()
-    try:
-        cleaned_data, cleaner_validation = cleaner.clean_data(
-            df, table_type.value, filename=file.filename, detected_date=detected_date
-        )
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"数据清洗失败: {exc}")
+    table_type = TableType(report_type)
+    table_type_name = TABLE_TYPE_NAMES[table_type]
 
     validation, detected_store_name, meta = _convert_validation_result(
         cleaner_validation
@@ -328,44 +358,70 @@ async def parse_file(
     )
 
     # 缓存解析结果
-    _parse_cache[session_id] = {
+    session = {
         "file_path": file_path,
         "parse_result": parse_result,
-        "cleaned_data": cleaned_data,
         "table_type": table_type.value,
         "store_name": resolved_store_name,
         "meta": meta,
         "created_at": datetime.now(),
         "file_hash": file_hash,
     }
+    if stream_info:
+        session.update(stream_info)
+    else:
+        session["cleaned_data"] = cleaned_data
+    _parse_sessions.set(session_id, session)
+
+    return parse_result
+
+
+def _run_parse_job(
+    job: ImportJob,
+    filename: str,
+    store_id: Optional[int],
+    session_id: str,
+    file_path: str,
+    file_hash: Optional[str],
+) -> Dict[str, Any]:
+    """后台任务：解析 + 清洗，完成后写入解析会话缓存"""
+    fallback_type, _ = detect_table_type(filename)
+    job.update("parse", 10, "正在解析文件")
+    task, args = _parse_task(
+        file_path, filename, fallback_type.value, session_id, file_hash
+    )
+    try:
+        parsed = run_parse_task_sync(task, *args)
+    except PipelineBusyError as exc:
+        raise PipelineTaskError(str(exc), status_code=503)
+    except ParserError as exc:
+        raise PipelineTaskError(f"文件解析失败: {exc}", status_code=400)
+    except Exception as exc:
+        raise PipelineTaskError(f"数据清洗失败: {exc}")
 
-    return UploadResponse(
-        success=True,
-        message="文件解析成功，请确认后入库",
-        data=parse_result,
+    job.update("preview", 90, "正在生成预览")
+    parse_result = _cache_parse_result(
+        session_id, file_path, file_hash, store_id, *parsed
     )
+    return {
+        "message": "文件解析成功，请确认后入库",
+        "session_id": session_id,
+        "parse_result": jsonable_encoder(parse_result),
+    }
 
 
-@router.post("/confirm", response_model=UploadResponse, summary="确认入库")
-async def confirm_import(
-    session_id: str = Form(..., description="解析会话ID"),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_manager),  # 管理员和店长都可以入库
-):
+def _import_cached_session(
+    db: Session,
+    cache: Dict[str, Any],
+    job_id: Optional[str] = None,
+    progress_callback=None,
+) -> Dict[str, Any]:
     """
-    步骤2: 确认入库
+    将解析会话中的数据入库（阻塞调用，在线程池中执行）
 
-    处理流程:
-    1. 从缓存获取解析结果
-    2. 调用 ImporterService 入库 (Dev A)
-    3. 返回入库结果
+    Raises:
+        PipelineTaskError: 表类型无法识别 (400) 或文件重复 (409)
     """
-    # 获取缓存的解析结果
-    cache = _parse_cache.get(session_id)
-    if not cache:
-        raise HTTPException(status_code=404, detail="会话已过期，请重新上传文件")
-
     parse_result: ParseResult = cache["parse_result"]
     file_path = cache["file_path"]
     cleaned_data = cache.get("cleaned_data", [])
@@ -377,25 +433,43 @@ async def confirm_import(
     file_hash = cache.get("file_hash")
     if not file_hash and os.path.exists(file_path):
         try:
-            with open(file_path, "rb") as f:
-                file_hash = _calculate_file_hash(f.read())
-                cache["file_hash"] = file_hash
+            file_hash = _calculate_file_hash(file_path)
+            cache["file_hash"] = file_hash
         except Exception:
             file_hash = None
 
     if not table_type_value:
-        raise HTTPException(status_code=400, detail="无法识别表类型，请重新上传文件")
+        raise PipelineTaskError("无法识别表类型，请重新上传文件", status_code=400)
 
     duplicate_batch = _find_success_batch_by_hash(db, file_hash)
     if duplicate_batch:
-        message = describe_duplicate_batch(duplicate_batch)
-        return _conflict_response(message)
+        raise PipelineTaskError(
+            describe_duplicate_batch(duplicate_batch), status_code=409
+        )
 
-    importer = ImporterService(db)
+    importer = ImporterService(
+        db, progress_callback=progress_callback, job_id=job_id
+    )
     meta = cache.get("meta") or {}
 
     try:
-        service_result = importer.process_upload(
+        record_spool = cache.get("record_spool")
+        if record_spool:
+            if not os.path.exists(record_spool):
+                raise PipelineTaskError("解析结果已失效，请重新上传文件", status_code=400)
+            return importer.process_upload_stream(
+                file_name=os.path.basename(file_path),
+                store_id=parse_result.store_id,
+                table_type=table_type_value,
+                chunks=iter_record_spool(record_spool),
+                total_rows=parse_result.row_count,
+                biz_date=meta.get("biz_date"),
+                store_name=store_name,
+                store_names=cache.get("store_names"),
+                payment_methods=meta.get("payment_methods"),
+                file_hash=file_hash,
+            )
+        return importer.process_upload(
             file_name=os.path.basename(file_path),
             store_id=parse_result.store_id,
             table_type=table_type_value,
@@ -406,8 +480,16 @@ async def confirm_import(
             file_hash=file_hash,
         )
     except DuplicateFileError as duplicate_error:
-        return _conflict_response(str(duplicate_error))
+        raise PipelineTaskError(str(duplicate_error), status_code=409)
+
 
+def _build_import_result(service_result: Dict[str, Any]) -> ImportResult:
+    """
+    将 ImporterService 返回值转换为 ImportResult
+
+    Raises:
+        PipelineTaskError: 入库失败 (500)
+    """
     status_value = service_result.get("status", BatchStatus.FAILED.value)
     try:
         status_enum = BatchStatus(status_value)
@@ -423,7 +505,7 @@ async def confirm_import(
         
         if status_enum != BatchStatus.SUCCESS:
             error_message = service_result.get("error") or f"部分门店入库失败 ({success_count}/{total_stores} 成功)"
-            raise HTTPException(status_code=500, detail=error_message)
+            raise PipelineTaskError(error_message)
         
         # 构建汇总消息
         store_names = [r.get("store_name", "未知门店") for r in batch_results if r.get("status") == "success"]
@@ -436,40 +518,276 @@ async def confirm_import(
             balance_diff_count=0,
         )
 
-        import_result = ImportResult(
+        # 注意：这里我们返回第一个批次作为主结果，前端可以通过批次列表API查看所有批次
+        return ImportResult(
             batch_id=service_result.get("batch_id"),
             batch_no=service_result.get("batch_no") or "",
             status=status_enum,
             summary=summary,
             message=message,
         )
-        
-        # 在多门店情况下，将批次结果保存到 extra_info 中（如果需要）
-        # 注意：这里我们返回第一个批次作为主结果，前端可以通过批次列表API查看所有批次
-        
-    else:
-        # 单门店情况（原有逻辑）
-        if status_enum != BatchStatus.SUCCESS:
-            error_message = service_result.get("error") or "入库失败，请稍后重试"
-            raise HTTPException(status_code=500, detail=error_message)
 
-        summary = ImportSummary(
-            row_count=service_result.get("row_count", 0),
-            sales_total=service_result.get("sales_total"),
-            actual_total=service_result.get("actual_total"),
-            balance_diff_count=0,
+    # 单门店情况（原有逻辑）
+    if status_enum != BatchStatus.SUCCESS:
+        error_message = service_result.get("error") or "入库失败，请稍后重试"
+        raise PipelineTaskError(error_message)
+
+    summary = ImportSummary(
+        row_count=service_result.get("row_count", 0),
+        sales_total=service_result.get("sales_total"),
+        actual_total=service_result.get("actual_total"),
+        balance_diff_count=0,
+    )
+
+    return ImportResult(
+        batch_id=service_result.get("batch_id"),
+        batch_no=service_result.get("batch_no") or "",
+        status=status_enum,
+        summary=summary,
+        message=f"成功导入 {summary.row_count} 条数据",
+    )
+
+
+def _run_import_job(job: ImportJob, session_id: str) -> Dict[str, Any]:
+    """后台任务：使用独立数据库会话入库，进度写入任务状态和批次表"""
+    cache = _parse_sessions.get(session_id)
+    if not cache:
+        raise PipelineTaskError("会话已过期，请重新上传文件", status_code=404)
+
+    job.update("import", 5, "正在入库")
+    db = SessionLocal()
+    try:
+        # 与同步入库共用入库阶段的并发上限
+        service_result = run_import_task_sync(
+            _import_cached_session,
+            db,
+            cache,
+            job_id=job.job_id,
+            progress_callback=lambda stage, percent: job.update(stage, percent),
         )
+        import_result = _build_import_result(service_result)
+    except PipelineBusyError as exc:
+        raise PipelineTaskError(str(exc), status_code=503)
+    finally:
+        db.close()
 
-        import_result = ImportResult(
-            batch_id=service_result.get("batch_id"),
-            batch_no=service_result.get("batch_no") or "",
-            status=status_enum,
-            summary=summary,
-            message=f"成功导入 {summary.row_count} 条数据",
+    # 清理缓存
+    _parse_sessions.delete(session_id)
+
+    return {
+        "message": import_result.message,
+        "import_result": jsonable_encoder(import_result),
+    }
+
+
+def _job_response(job: ImportJob, message: str) -> UploadResponse:
+    return UploadResponse(
+        success=True,
+        message=message,
+        data=ImportJobInfo(**{**job.to_dict(), "result": _to_builtin(job.result)}),
+    )
+
+
+def _job_info_from_batches(db: Session, job_id: str) -> Optional[ImportJobInfo]:
+    """
+    任务文件已过期或丢失时，根据批次表（job_id）汇总入库任务的结果
+    """
+    batches = (
+        db.query(MetaFileBatch)
+        .filter(MetaFileBatch.job_id == job_id)
+        .order_by(MetaFileBatch.id)
+        .all()
+    )
+    if not batches:
+        return None
+
+    statuses = {batch.status for batch in batches}
+    if BatchStatus.FAILED.value in statuses:
+        status = BatchStatus.FAILED.value
+    elif statuses == {BatchStatus.SUCCESS.value}:
+        status = BatchStatus.SUCCESS.value
+    else:
+        status = BatchStatus.PROCESSING.value
+
+    row_count = sum(batch.row_count or 0 for batch in batches)
+    first = batches[0]
+    result: Dict[str, Any] = {
+        "batch_ids": [batch.id for batch in batches],
+        "row_count": row_count,
+    }
+    message = ""
+    if status == BatchStatus.SUCCESS.value:
+        message = f"成功导入 {row_count} 条数据"
+        result["import_result"] = jsonable_encoder(
+            ImportResult(
+                batch_id=first.id,
+                batch_no=first.batch_no or "",
+                status=BatchStatus.SUCCESS,
+                summary=ImportSummary(row_count=row_count),
+                message=message,
+            )
         )
+    return ImportJobInfo(
+        job_id=job_id,
+        kind="import",
+        status=status,
+        stage="done" if status == BatchStatus.SUCCESS.value else None,
+        progress=100 if status == BatchStatus.SUCCESS.value else 0,
+        message=message,
+        result=result,
+        error=first.error_log if status == BatchStatus.FAILED.value else None,
+        created_at=first.created_at,
+        updated_at=max(
+            (batch.updated_at for batch in batches if batch.updated_at), default=None
+        ),
+    )
+
+
+# ============================================================
+# API 接口
+# ============================================================
+
+
+@router.post("/parse", response_model=UploadResponse, summary="解析上传文件")
+async def parse_file(
+    file: UploadFile = File(..., description="Excel/CSV 文件"),
+    store_id: Optional[int] = Form(None, description="门店ID (可选)"),
+    async_mode: bool = Form(False, description="异步模式：立即返回任务ID，通过 /upload/jobs/{job_id} 轮询结果"),
+    db: Session = Depends(get_db),
+):
+    """
+    步骤1: 解析上传的文件，返回预览数据供用户确认
+
+    处理流程:
+    1. 分块保存文件到上传目录（同时计算哈希，重复文件直接返回 409）
+    2. 调用 ParserService 解析文件 (Dev B)
+    3. 调用 CleanerService 清洗数据 (Dev B)
+       (2、3 在解析进程池中执行，池满时返回 503)
+    4. 返回解析结果供前端预览
+
+    async_mode=true 时第 2、3 步转入后台任务，接口立即返回任务信息。
+    """
+    # 验证文件类型
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="文件名不能为空")
+
+    ext = file.filename.split(".")[-1].lower()
+    if ext not in ["csv", "xls", "xlsx"]:
+        raise HTTPException(status_code=400, detail="仅支持 .csv, .xls, .xlsx 格式")
+
+    # 生成会话ID
+    session_id = str(uuid.uuid4())
+
+    # 保存文件
+    upload_dir = settings.UPLOAD_DIR
+    os.makedirs(upload_dir, exist_ok=True)
+
+    file_path = os.path.join(upload_dir, f"{session_id}_{file.filename}")
+
+    try:
+        file_hash = await _save_upload_file(file, file_path)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"文件保存失败: {str(e)}")
+
+    duplicate_batch = _find_success_batch_by_hash(db, file_hash)
+    if duplicate_batch:
+        _remove_file_quietly(file_path)
+        return _conflict_response(describe_duplicate_batch(duplicate_batch))
+
+    if async_mode:
+        try:
+            job = submit_job(
+                "parse",
+                lambda job: _run_parse_job(
+                    job,
+                    file.filename,
+                    store_id,
+                    session_id,
+                    file_path,
+                    file_hash,
+                ),
+            )
+        except PipelineBusyError as exc:
+            raise HTTPException(status_code=503, detail=str(exc))
+        return _job_response(job, "文件已上传，正在后台解析")
+
+    # 解析 + 清洗在进程池中执行，避免阻塞事件循环
+    fallback_type, _ = detect_table_type(file.filename)
+    task, args = _parse_task(
+        file_path, file.filename, fallback_type.value, session_id, file_hash
+    )
+    try:
+        parsed = await run_parse_task(task, *args)
+    except PipelineBusyError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except ParserError as exc:
+        raise HTTPException(status_code=400, detail=f"文件解析失败: {exc}")
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"数据清洗失败: {exc}")
+
+    # 会话序列化落盘耗时与数据量成正比，放到线程池执行
+    parse_result = await run_in_threadpool(
+        _cache_parse_result, session_id, file_path, file_hash, store_id, *parsed
+    )
+
+    return UploadResponse(
+        success=True,
+        message="文件解析成功，请确认后入库",
+        data=parse_result,
+    )
+
+
+@router.post("/confirm", response_model=UploadResponse, summary="确认入库")
+async def confirm_import(
+    session_id: str = Form(..., description="解析会话ID"),
+    async_mode: bool = Form(False, description="异步模式：立即返回任务ID，通过 /upload/jobs/{job_id} 轮询进度"),
+    background_tasks: BackgroundTasks = BackgroundTasks(),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_manager),  # 管理员和店长都可以入库
+):
+    """
+    步骤2: 确认入库
+
+    处理流程:
+    1. 从缓存获取解析结果
+    2. 调用 ImporterService 入库 (Dev A，在入库线程池中执行)
+    3. 返回入库结果
+
+    async_mode=true 时第 2 步转入后台任务，接口立即返回任务信息；
+    同一会话重复确认时返回已有的未完成任务。
+    """
+    # 获取缓存的解析结果（会话读写涉及 pickle 与磁盘 IO，均在线程池中执行）
+    cache = await run_in_threadpool(_parse_sessions.get, session_id)
+    if not cache:
+        raise HTTPException(status_code=404, detail="会话已过期，请重新上传文件")
+
+    if async_mode:
+        existing_job = await run_in_threadpool(get_job, cache.get("job_id") or "")
+        if existing_job and existing_job.status in ("pending", "processing"):
+            return _job_response(existing_job, "入库任务已在处理中")
+        try:
+            job = submit_job("import", lambda job: _run_import_job(job, session_id))
+        except PipelineBusyError as exc:
+            raise HTTPException(status_code=503, detail=str(exc))
+        cache["job_id"] = job.job_id
+        await run_in_threadpool(_parse_sessions.set, session_id, cache)
+        return _job_response(job, "已提交入库任务，正在后台处理")
+
+    try:
+        # 入库在线程池中执行，避免阻塞事件循环
+        service_result = await run_import_task(_import_cached_session, db, cache)
+        import_result = _build_import_result(service_result)
+    except PipelineBusyError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except PipelineTaskError as exc:
+        if exc.status_code == 409:
+            return _conflict_response(str(exc))
+        raise HTTPException(status_code=exc.status_code, detail=str(exc))
 
     # 清理缓存
-    del _parse_cache[session_id]
+    await run_in_threadpool(_parse_sessions.delete, session_id)
 
     return UploadResponse(
         success=True,
@@ -478,23 +796,59 @@ async def confirm_import(
     )
 
 
+@router.get("/jobs/{job_id}", response_model=UploadResponse, summary="查询后台任务进度")
+async def get_upload_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    轮询异步解析/入库任务的阶段和进度
+
+    任务状态保存在共享的任务文件中，轮询可落到任意 worker；
+    任务文件过期后，入库任务按批次表汇总结果。
+
+    - status: pending/processing/success/failed
+    - result: 解析任务为 parse_result，入库任务为 import_result
+    - error_status: 失败时对应同步接口的 HTTP 状态码 (400/404/409/500/503)
+    """
+    # 任务文件可能包含完整的解析结果，读取放到线程池
+    job = await run_in_threadpool(get_job, job_id)
+    if job:
+        return _job_response(job, job.message)
+
+    job_info = _job_info_from_batches(db, job_id)
+    if not job_info:
+        raise HTTPException(status_code=404, detail="任务不存在或已过期")
+
+    return UploadResponse(success=True, message=job_info.message, data=job_info)
+
+
 @router.delete("/cancel/{session_id}", summary="取消上传", response_model=None)
 async def cancel_upload(session_id: str):
     """
     取消上传，清理临时文件
     """
-    cache = _parse_cache.get(session_id)
+    cache = await run_in_threadpool(_parse_sessions.delete, session_id)
     if cache:
         # 删除临时文件
         file_path = cache.get("file_path")
         if file_path and os.path.exists(file_path):
             os.remove(file_path)
 
-        del _parse_cache[session_id]
-
     return {"success": True, "message": "已取消上传"}
 
 
+@router.get("/parse-cache", summary="解析缓存命中情况", response_model=None)
+async def get_parse_cache_info(
+    current_user: dict = Depends(get_current_manager),
+):
+    """
+    返回解析缓存状态：各解析进程累计的命中/未命中次数、命中率、淘汰次数与磁盘占用
+    """
+    return {"success": True, "data": get_parse_cache().stats()}
+
+
 @router.post("/cleanup-cache", summary="清除缓存文件")
 async def cleanup_cache(
     days: int = Query(7, description="保留最近N天的文件，默认7天"),
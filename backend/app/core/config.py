@@ -32,11 +32,44 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_HOURS: int = 24
     
+    # 登录用户缓存（按 token 缓存用户信息，减少每个请求的 users 表查询）
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_TTL: int = 30  # 缓存过期时间（秒），兜底直接改库等未通知的变更
+    AUTH_CACHE_MAX_ENTRIES: int = 1024  # 缓存条目上限，超出按 LRU 淘汰
+    
     # ==================== 文件上传配置 ====================
     UPLOAD_DIR: str = "./data/uploads"
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 上传文件分块写盘/计算哈希的块大小（字节）
+    UPLOAD_STREAM_THRESHOLD: int = 20 * 1024 * 1024  # 不小于该大小的 CSV 按块流式解析、入库（字节）
+    UPLOAD_XLSX_STREAM_THRESHOLD: int = 5 * 1024 * 1024  # 不小于该大小的 xlsx 按块流式解析（xlsx 为压缩格式，阈值更低）
+    UPLOAD_STREAM_CHUNK_ROWS: int = 5000  # 流式处理每块行数
+    CSV_PARSE_ENGINE: str = "c"  # 整文件读取 CSV 的引擎："c" 或 "pyarrow"（多线程，需安装 pyarrow）
     ALLOWED_EXTENSIONS: set = {".csv", ".xls", ".xlsx"}
     
+    # ==================== 数据入库配置 ====================
+    IMPORT_INSERT_CHUNK_SIZE: int = 2000  # 事实表批量插入每批行数
+    
+    # ==================== 上传流水线并发配置 ====================
+    UPLOAD_PARSE_WORKERS: int = 2  # 解析/清洗并发数（进程池大小）
+    UPLOAD_PARSE_USE_PROCESSES: bool = True  # False 时解析改用线程池
+    UPLOAD_IMPORT_WORKERS: int = 4  # 入库并发数（线程池大小）
+    UPLOAD_MAX_QUEUED: int = 8  # 每个阶段最多排队等待的请求数，超出返回 503
+    UPLOAD_QUEUE_TIMEOUT: float = 60.0  # 排队等待超时（秒）
+    UPLOAD_JOB_WORKERS: int = 2  # 异步导入任务并发数
+    UPLOAD_MAX_JOBS: int = 64  # 未完成的异步任务上限，超出返回 503
+    UPLOAD_JOB_TTL: int = 3600  # 已完成任务状态保留时间（秒）
+    PARSE_SESSION_TTL: int = 2 * 3600  # 解析会话保留时间（秒），超时需重新上传
+    PARSE_SESSION_MEMORY_BUDGET: int = 256 * 1024 * 1024  # 会话热缓存内存预算（按 pickle 大小计，实际内存约为其 5 倍）
+    PARSE_CACHE_ENABLED: bool = True  # 按文件内容缓存 LibreOffice 转换结果与解析后的 DataFrame
+    PARSE_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024  # 解析缓存磁盘上限（字节），超出按最近使用淘汰
+    
+    # ==================== 统计查询配置 ====================
+    STATS_USE_ROLLUP: bool = True  # 按日期/门店维度查询时读取日汇总表（agg_*_daily）
+    STATS_CACHE_ENABLED: bool = True  # 统计结果缓存（按数据版本失效）
+    STATS_CACHE_MAX_ENTRIES: int = 512  # 缓存条目上限，超出按 LRU 淘汰
+    STATS_CACHE_TTL: int = 600  # 缓存兜底过期时间（秒），覆盖维表手工修改等未记版本的变更
+    
     # ==================== 应用配置 ====================
     APP_NAME: str = "KTV 经营分析系统"
     APP_VERSION: str = "1.0.0"
@@ -117,6 +117,17 @@ async def get_current_user(request: Request, db: Session = Depends(get_db)) -> d
 
     username = payload.get("sub")
 
+    # 先查进程内缓存（token 已通过签名与过期校验），用户被停用/改密/强制登出时会主动失效
+    from app.services.auth_cache import get_auth_cache
+    cache = get_auth_cache() if settings.AUTH_CACHE_ENABLED else None
+    epoch = None
+    if cache is not None:
+        cached = cache.get(token)
+        if cached is not None:
+            return cached
+        # 查库前记下 epoch，查库期间发生的失效操作会让回写被跳过
+        epoch = cache.current_epoch()
+
     # 使用数据库查询
     from app.services.user_service import UserService
     user_service = UserService(db)
@@ -126,7 +137,10 @@ async def get_current_user(request: Request, db: Session = Depends(get_db)) -> d
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token 已过期或已被强制登出"
         )
-    return user.to_user_info()
+    user_info = user.to_user_info()
+    if cache is not None:
+        cache.set(token, user_info, epoch)
+    return user_info
 
 
 async def get_current_user_legacy(request: Request) -> dict:
@@ -9,6 +9,8 @@ from contextlib import asynccontextmanager
 from app.core import get_settings, get_db_info, check_db_connection
 from app.api import v1_router
 from app.services.cleanup import start_scheduler, stop_scheduler
+from app.services.pipeline import shutdown_pipeline_executors
+from app.services.jobs import shutdown_job_executor
 
 settings = get_settings()
 
@@ -33,6 +35,8 @@ async def lifespan(app: FastAPI):
     
     # 关闭时
     stop_scheduler()
+    shutdown_job_executor()
+    shutdown_pipeline_executors()
     print(f"👋 {settings.APP_NAME} 正在关闭...")
 
 
@@ -9,7 +9,7 @@ from app.core.database import Base
 from app.models.user import User
 
 # 元数据表
-from app.models.meta import MetaFileBatch
+from app.models.meta import MetaFileBatch, MetaDataVersion
 
 # 维度表
 from app.models.dims import (
@@ -25,6 +25,17 @@ from app.models.facts import (
     FactBooking,
     FactRoom,
     FactSales,
+    FactMemberChange,
+    FactPaymentLine,
+)
+
+# 日汇总表
+from app.models.rollups import (
+    AggBookingDaily,
+    AggRoomDaily,
+    AggRoomHourly,
+    AggSalesDaily,
+    AggMemberChangeDaily,
 )
 
 
@@ -37,6 +48,7 @@ __all__ = [
 
     # 元数据表
     "MetaFileBatch",
+    "MetaDataVersion",
 
     # 维度表
     "DimStore",
@@ -49,5 +61,14 @@ __all__ = [
     "FactBooking",
     "FactRoom",
     "FactSales",
+    "FactMemberChange",
+    "FactPaymentLine",
+
+    # 日汇总表
+    "AggBookingDaily",
+    "AggRoomDaily",
+    "AggRoomHourly",
+    "AggSalesDaily",
+    "AggMemberChangeDaily",
 ]
 
@@ -64,6 +64,7 @@ class FactBooking(Base):
         Index("idx_batch", "batch_id"),
         Index("idx_employee", "employee_id"),
         Index("idx_date_store_employee", "biz_date", "store_id", "employee_id"),
+        Index("idx_store_date", "store_id", "biz_date"),
         {"comment": "预订汇总事实表"}
     )
     
@@ -139,6 +140,8 @@ class FactRoom(Base):
         Index("idx_batch", "batch_id"),
         Index("idx_room", "room_id"),
         Index("idx_date_store_room", "biz_date", "store_id", "room_id"),
+        # 覆盖小时利用率实时计算所需的列
+        Index("idx_store_date_times", "store_id", "biz_date", "open_time", "close_time", "duration_min"),
         {"comment": "包厢开台事实表"}
     )
     
@@ -205,6 +208,7 @@ class FactSales(Base):
         Index("idx_batch", "batch_id"),
         Index("idx_category", "category_name"),
         Index("idx_date_store_product", "biz_date", "store_id", "product_id"),
+        Index("idx_store_date_product", "store_id", "biz_date", "product_id"),
         {"comment": "酒水销售事实表"}
     )
     
@@ -283,6 +287,7 @@ class FactMemberChange(Base):
         Index("idx_card_no", "card_no"),
         Index("idx_change_type", "change_type"),
         Index("idx_batch", "batch_id"),
+        Index("idx_store_date", "store_id", "biz_date"),
         {"comment": "连锁会员变动明细事实表"},
     )
 
@@ -290,11 +295,43 @@ class FactMemberChange(Base):
         return f"<FactMemberChange(id={self.id}, card_no={self.card_no})>"
 
 
+class FactPaymentLine(Base):
+    """
+    动态支付方式明细表
+
+    入库时把 fact_booking / fact_room 的 extra_payments、extra_info 中的动态支付金额
+    拆成 (明细ID, 支付方式, 金额) 行，统计时直接 GROUP BY，无需逐行解析 JSON。
+    """
+    __tablename__ = "fact_payment_line"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True, comment="自增主键")
+    fact_table = Column(String(20), nullable=False, comment="来源表类型: booking/room")
+    fact_id = Column(BigInteger, nullable=False, comment="来源明细ID")
+    batch_id = Column(BigInteger, nullable=False, comment="关联批次")
+    store_id = Column(Integer, nullable=False, comment="关联门店")
+    biz_date = Column(Date, nullable=False, comment="营业日期")
+    pay_code = Column(String(100), nullable=False, comment="支付方式键(pay_ 前缀)")
+    amount = Column(DECIMAL(14, 2), nullable=False, default=0, comment="金额")
+
+    __table_args__ = (
+        Index("idx_pay_line_table_date_store", "fact_table", "biz_date", "store_id", "pay_code"),
+        Index("idx_pay_line_fact", "fact_table", "fact_id"),
+        Index("idx_pay_line_batch", "batch_id"),
+        # 单门店查询：门店在前，并覆盖 pay_code / amount
+        Index("idx_pay_line_table_store_date", "fact_table", "store_id", "biz_date", "pay_code", "amount"),
+        {"comment": "动态支付方式明细表"}
+    )
+
+    def __repr__(self):
+        return f"<FactPaymentLine(fact_table={self.fact_table}, fact_id={self.fact_id}, pay_code={self.pay_code})>"
+
+
 # 导出所有事实表模型
 __all__ = [
     "FactBooking",
     "FactRoom",
     "FactSales",
     "FactMemberChange",
+    "FactPaymentLine",
 ]
 
@@ -31,6 +31,7 @@ class MetaFileBatch(Base):
     
     # 状态管理
     status = Column(String(20), default="pending", comment="状态: pending/processing/success/failed")
+    job_id = Column(String(36), comment="异步导入任务ID")
     row_count = Column(Integer, default=0, comment="导入行数")
     error_count = Column(Integer, default=0, comment="错误行数")
     error_log = Column(Text, comment="错误日志(JSON格式)")
@@ -44,6 +45,7 @@ class MetaFileBatch(Base):
         Index("idx_batch_no", "batch_no", unique=True),
         Index("idx_store_date", "store_id", "created_at"),
         Index("idx_status", "status"),
+        Index("idx_job_id", "job_id"),
         Index("uq_meta_file_batch_file_hash", "file_hash", unique=True),
         {"comment": "文件导入批次管理表"}
     )
@@ -65,3 +67,25 @@ class MetaFileBatch(Base):
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
 
+
+
+class MetaDataVersion(Base):
+    """
+    数据版本表
+
+    每个 (表类型, 门店) 一行，批次入库/删除时在同一事务内递增 version，
+    统计结果缓存以此作为失效水位，多 worker 进程共享。
+    """
+    __tablename__ = "meta_data_version"
+
+    table_type = Column(String(50), primary_key=True, comment="表类型: booking/room/sales/member_change")
+    store_id = Column(Integer, primary_key=True, comment="关联门店ID")
+    version = Column(BigInteger, nullable=False, default=0, comment="数据版本号")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="更新时间")
+
+    __table_args__ = (
+        {"comment": "事实数据版本表(统计缓存失效)"},
+    )
+
+    def __repr__(self):
+        return f"<MetaDataVersion(table_type={self.table_type}, store_id={self.store_id}, version={self.version})>"
@@ -0,0 +1,160 @@
+"""
+日汇总表模型
+
+按 门店 × 营业日期 预聚合的事实表指标，由 ImporterService 在批次入库/删除时增量维护，
+StatsService 在按日期/门店维度查询时优先读取，避免扫描明细事实表。
+
+所有列均为可加字段（SUM/COUNT），平均值类指标拆成 *_sum + *_count 存储，
+查询时再相除，保证跨天/跨门店再聚合的结果与明细表一致。
+"""
+from sqlalchemy import Column, Integer, BigInteger, SmallInteger, Date, DateTime, DECIMAL, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class AggBookingDaily(Base):
+    """预订汇总日汇总表 (fact_booking)"""
+    __tablename__ = "agg_booking_daily"
+
+    store_id = Column(Integer, primary_key=True, comment="关联门店")
+    biz_date = Column(Date, primary_key=True, comment="营业日期")
+
+    row_count = Column(BigInteger, nullable=False, default=0, comment="明细行数")
+    booking_qty = Column(BigInteger, default=0, comment="订台数")
+    sales_amount = Column(DECIMAL(16, 2), default=0, comment="销售金额")
+    receivable_amount = Column(DECIMAL(16, 2), default=0, comment="应收金额")
+    actual_amount = Column(DECIMAL(16, 2), default=0, comment="实收金额")
+    base_performance = Column(DECIMAL(16, 2), default=0, comment="基本业绩")
+    gift_amount = Column(DECIMAL(16, 2), default=0, comment="赠送金额")
+    discount_amount = Column(DECIMAL(16, 2), default=0, comment="折扣金额")
+    credit_amount = Column(DECIMAL(16, 2), default=0, comment="挂账金额")
+    free_amount = Column(DECIMAL(16, 2), default=0, comment="免单金额")
+    round_off_amount = Column(DECIMAL(16, 2), default=0, comment="抹零金额")
+    service_fee = Column(DECIMAL(16, 2), default=0, comment="服务费")
+    adjustment_amount = Column(DECIMAL(16, 2), default=0, comment="调整金额")
+    pay_wechat = Column(DECIMAL(16, 2), default=0, comment="微信支付")
+    pay_alipay = Column(DECIMAL(16, 2), default=0, comment="支付宝")
+    pay_cash = Column(DECIMAL(16, 2), default=0, comment="现金")
+    pay_pos = Column(DECIMAL(16, 2), default=0, comment="POS/银行卡")
+    pay_member = Column(DECIMAL(16, 2), default=0, comment="会员支付")
+    pay_douyin = Column(DECIMAL(16, 2), default=0, comment="抖音")
+    pay_meituan = Column(DECIMAL(16, 2), default=0, comment="美团/团购")
+    pay_scan = Column(DECIMAL(16, 2), default=0, comment="扫码支付")
+    pay_deposit = Column(DECIMAL(16, 2), default=0, comment="定金消费")
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="刷新时间")
+
+    __table_args__ = (
+        Index("idx_agg_booking_date", "biz_date"),
+        {"comment": "预订汇总日汇总表"}
+    )
+
+
+class AggRoomDaily(Base):
+    """包厢开台日汇总表 (fact_room)"""
+    __tablename__ = "agg_room_daily"
+
+    store_id = Column(Integer, primary_key=True, comment="关联门店")
+    biz_date = Column(Date, primary_key=True, comment="营业日期")
+
+    order_count = Column(BigInteger, nullable=False, default=0, comment="开台单数")
+    receivable_amount = Column(DECIMAL(16, 2), default=0, comment="应收金额")
+    bill_total = Column(DECIMAL(16, 2), default=0, comment="账单合计")
+    actual_amount = Column(DECIMAL(16, 2), default=0, comment="实收金额")
+    min_consumption = Column(DECIMAL(16, 2), default=0, comment="低消费")
+    min_consumption_diff = Column(DECIMAL(16, 2), default=0, comment="低消差额")
+    gift_amount = Column(DECIMAL(16, 2), default=0, comment="赠送金额")
+    free_amount = Column(DECIMAL(16, 2), default=0, comment="免单金额")
+    credit_amount = Column(DECIMAL(16, 2), default=0, comment="挂账金额")
+    room_discount = Column(DECIMAL(16, 2), default=0, comment="房费折扣")
+    beverage_discount = Column(DECIMAL(16, 2), default=0, comment="酒水折扣")
+    duration_min = Column(BigInteger, default=0, comment="时长合计(分钟)")
+    low_consume_rate_sum = Column(DECIMAL(20, 6), default=0, comment="单次低消达成率之和")
+    low_consume_rate_count = Column(BigInteger, default=0, comment="有低消的开台单数")
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="刷新时间")
+
+    __table_args__ = (
+        Index("idx_agg_room_date", "biz_date"),
+        {"comment": "包厢开台日汇总表"}
+    )
+
+
+class AggRoomHourly(Base):
+    """
+    包厢小时占用汇总表 (fact_room)
+
+    按 门店 × 包厢 × 营业日期 × 钟点 预先摊好占用分钟，
+    orders / gmv 按开房（缺失则关房）时间所在钟点归属。
+    """
+    __tablename__ = "agg_room_hourly"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True, comment="自增主键")
+    store_id = Column(Integer, nullable=False, comment="关联门店")
+    room_id = Column(Integer, comment="关联包厢")
+    biz_date = Column(Date, nullable=False, comment="营业日期")
+    hour = Column(SmallInteger, nullable=False, comment="钟点(0-23)")
+
+    orders = Column(BigInteger, nullable=False, default=0, comment="开台单数")
+    gmv = Column(DECIMAL(16, 2), default=0, comment="应收金额")
+    occupied_minutes = Column(DECIMAL(14, 4), default=0, comment="占用分钟")
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="刷新时间")
+
+    __table_args__ = (
+        Index("idx_agg_room_hourly_store_date", "store_id", "biz_date", "hour"),
+        Index("idx_agg_room_hourly_date", "biz_date", "hour"),
+        {"comment": "包厢小时占用汇总表"}
+    )
+
+
+class AggSalesDaily(Base):
+    """酒水销售日汇总表 (fact_sales)"""
+    __tablename__ = "agg_sales_daily"
+
+    store_id = Column(Integer, primary_key=True, comment="关联门店")
+    biz_date = Column(Date, primary_key=True, comment="营业日期")
+
+    row_count = Column(BigInteger, nullable=False, default=0, comment="明细行数")
+    sales_qty = Column(BigInteger, comment="销售数量")
+    sales_amount = Column(DECIMAL(16, 2), comment="销售金额")
+    gift_qty = Column(BigInteger, comment="赠送数量")
+    gift_amount = Column(DECIMAL(16, 2), comment="赠送金额")
+    cost_total = Column(DECIMAL(16, 2), comment="成本小计")
+    profit = Column(DECIMAL(16, 2), comment="毛利")
+    profit_rate_sum = Column(DECIMAL(20, 4), comment="毛利率之和")
+    profit_rate_count = Column(BigInteger, default=0, comment="有毛利率的明细行数")
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="刷新时间")
+
+    __table_args__ = (
+        Index("idx_agg_sales_date", "biz_date"),
+        {"comment": "酒水销售日汇总表"}
+    )
+
+
+class AggMemberChangeDaily(Base):
+    """会员变动日汇总表 (fact_member_change)"""
+    __tablename__ = "agg_member_change_daily"
+
+    store_id = Column(Integer, primary_key=True, comment="关联门店")
+    biz_date = Column(Date, primary_key=True, comment="营业日期")
+
+    row_count = Column(BigInteger, nullable=False, default=0, comment="明细行数")
+    recharge_real_income = Column(DECIMAL(16, 2), default=0, comment="充值实收")
+    room_amount_principal = Column(DECIMAL(16, 2), default=0, comment="房费变动金额_本金")
+    drink_amount_principal = Column(DECIMAL(16, 2), default=0, comment="酒水变动金额_本金")
+    room_amount_gift = Column(DECIMAL(16, 2), default=0, comment="房费变动金额_赠送")
+    drink_amount_gift = Column(DECIMAL(16, 2), default=0, comment="酒水变动金额_赠送")
+    balance_total = Column(DECIMAL(18, 2), default=0, comment="余额_合计")
+    points_delta = Column(BigInteger, default=0, comment="变动积分")
+    growth_delta = Column(BigInteger, default=0, comment="成长值_变动")
+    recharge_count = Column(BigInteger, default=0, comment="充值笔数")
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="刷新时间")
+
+    __table_args__ = (
+        Index("idx_agg_member_change_date", "biz_date"),
+        {"comment": "会员变动日汇总表"}
+    )
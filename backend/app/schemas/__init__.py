@@ -18,6 +18,7 @@ from .upload import (
     RowError,
     ImportResult,
     ImportSummary,
+    ImportJobInfo,
 )
 from .stats import (
     QueryFilters,
@@ -61,6 +62,7 @@ __all__ = [
     "RowError",
     "ImportResult",
     "ImportSummary",
+    "ImportJobInfo",
     # Stats
     "QueryFilters",
     "StatsResponse",
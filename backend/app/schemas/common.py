@@ -45,7 +45,8 @@ class TableType(StrEnum):
 
 class BatchStatus(StrEnum):
     """批次状态枚举"""
-    PENDING = "pending"     # 处理中
+    PENDING = "pending"     # 排队中
+    PROCESSING = "processing"  # 处理中
     SUCCESS = "success"     # 成功
     FAILED = "failed"       # 失败
     WARNING = "warning"     # 有警告但成功
@@ -104,6 +104,29 @@ class ImportResult(BaseModel):
     message: str = Field("入库成功", description="结果消息")
 
 
+# ============================================================
+# 异步任务 Schema (async_mode=true)
+# ============================================================
+
+class ImportJobInfo(BaseModel):
+    """
+    后台解析/入库任务状态
+
+    由 /upload/parse、/upload/confirm 异步模式返回，通过 /upload/jobs/{job_id} 轮询
+    """
+    job_id: str = Field(..., description="任务ID")
+    kind: str = Field(..., description="任务类型: parse/import")
+    status: str = Field(..., description="任务状态: pending/processing/success/failed")
+    stage: Optional[str] = Field(None, description="当前阶段")
+    progress: int = Field(0, description="进度百分比 (0-100)")
+    message: str = Field("", description="状态说明")
+    result: Optional[Dict[str, Any]] = Field(None, description="任务结果 (parse_result / import_result)")
+    error: Optional[str] = Field(None, description="失败原因")
+    error_status: Optional[int] = Field(None, description="失败时对应的 HTTP 状态码 (如 409 重复文件)")
+    created_at: Optional[datetime] = Field(None, description="创建时间")
+    updated_at: Optional[datetime] = Field(None, description="最近更新时间")
+
+
 # ============================================================
 # 上传响应 Schema (统一响应)
 # ============================================================
@@ -114,6 +137,6 @@ class UploadResponse(BaseModel):
     """
     success: bool = True
     message: str = "操作成功"
-    data: Optional[ParseResult | ImportResult] = None
+    data: Optional[ParseResult | ImportResult | ImportJobInfo] = None
     timestamp: datetime = Field(default_factory=datetime.now)
 
@@ -0,0 +1,159 @@
+"""
+登录用户缓存
+
+get_current_user 每次请求都要按 token 查一次 users 表，看板一个页面并发
+6 个接口就是 6 次相同的查询。这里按 token 缓存 to_user_info() 结果，
+条目带短 TTL 和数量上限。
+
+失效：
+- UserService 停用/删除用户、改密/重置密码、强制登出时调用 invalidate_user，
+  本进程立即删除该用户的全部条目；
+- 同时更新 UPLOAD_DIR/auth/epoch 文件的修改时间，其他 worker 进程查缓存时
+  发现 epoch 变化即清空本地缓存，强制登出对所有进程立即生效；
+- 查库前先读取 epoch，回写缓存时若 epoch 已变化（查库期间有失效操作）则不写入，
+  避免把查到的旧用户信息缓存到失效之后。
+"""
+
+import copy
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class AuthPrincipalCache:
+    """token -> 用户信息 的进程内缓存（LRU + TTL + 跨进程 epoch）"""
+
+    def __init__(self, max_entries: int, ttl_seconds: int, epoch_path: str):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.epoch_path = epoch_path
+        # token -> (写入时间, 用户信息)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = self._read_epoch()
+        self.hits = 0
+        self.misses = 0
+
+    def _read_epoch(self) -> Optional[int]:
+        try:
+            return os.stat(self.epoch_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _touch_epoch(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.epoch_path), exist_ok=True)
+            with open(self.epoch_path, "a"):
+                pass
+            now = time.time_ns()
+            os.utime(self.epoch_path, ns=(now, now))
+        except OSError as exc:
+            # 写不了 epoch 时其他进程只能等 TTL 过期
+            logger.warning("更新登录缓存 epoch 失败 %s: %s", self.epoch_path, exc)
+
+    def _sync_epoch(self) -> None:
+        """其他进程有失效操作时清空本地缓存（需持有锁）"""
+        epoch = self._read_epoch()
+        if epoch != self._epoch:
+            self._entries.clear()
+            self._epoch = epoch
+
+    def current_epoch(self) -> Optional[int]:
+        """当前 epoch，查库前读取并在回写时传给 set()"""
+        return self._read_epoch()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """命中时返回用户信息副本，未命中返回 None"""
+        with self._lock:
+            self._sync_epoch()
+            entry = self._entries.get(token)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[token]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def set(self, token: str, user_info: Dict[str, Any], epoch: Optional[int]) -> None:
+        """
+        写入用户信息
+
+        epoch 为查库前 current_epoch() 的返回值；此后任一进程执行过失效操作时，
+        查到的信息可能已过期，不写入缓存。
+        """
+        user_info = copy.deepcopy(user_info)
+        with self._lock:
+            self._sync_epoch()
+            if self._epoch != epoch:
+                return
+            self._entries[token] = (time.monotonic(), user_info)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: Optional[int] = None, username: Optional[str] = None) -> None:
+        """删除指定用户的全部缓存条目，并通知其他进程"""
+        with self._lock:
+            stale = [
+                token
+                for token, (_, info) in self._entries.items()
+                if (user_id is not None and info.get("id") == user_id)
+                or (username is not None and info.get("username") == username)
+            ]
+            for token in stale:
+                del self._entries[token]
+            self._touch_epoch()
+            self._epoch = self._read_epoch()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+_cache: Optional[AuthPrincipalCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_auth_cache() -> AuthPrincipalCache:
+    """获取进程级登录用户缓存单例"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = get_settings()
+            _cache = AuthPrincipalCache(
+                max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.AUTH_CACHE_TTL,
+                # 放在子目录，避免被上传目录的过期文件清理删除
+                epoch_path=os.path.join(settings.UPLOAD_DIR, "auth", "epoch"),
+            )
+        return _cache
+
+
+def invalidate_user(user_id: Optional[int] = None, username: Optional[str] = None) -> None:
+    """用户状态/凭据变化后调用，使其已缓存的登录态立即失效"""
+    if not get_settings().AUTH_CACHE_ENABLED:
+        return
+    get_auth_cache().invalidate_user(user_id=user_id, username=username)
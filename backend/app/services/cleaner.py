@@ -17,8 +17,9 @@ import re
 import difflib
 from datetime import datetime
 from enum import Enum
-from typing import List, Dict, Tuple, Any, Optional, Set
+from typing import List, Dict, Tuple, Any, Optional, Sequence, Set, Union
 
+import numpy as np
 import pandas as pd
 from pydantic import BaseModel, Field
 
@@ -372,6 +373,19 @@ class ValidationResult(BaseModel):
 # ============================================================================
 
 
+# 日期时间字符串支持的格式（按优先级排列）
+DATETIME_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d",
+    "%Y/%m/%d %H:%M:%S",
+    "%Y/%m/%d %H:%M",
+    "%Y/%m/%d",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y",
+]
+
+
 def _clean_numeric_value(value: Any) -> float:
     """
     清洗数值字段
@@ -442,18 +456,7 @@ def _clean_datetime_value(value: Any) -> Optional[str]:
         return None
 
     # 尝试多种日期格式
-    date_formats = [
-        "%Y-%m-%d %H:%M:%S",
-        "%Y-%m-%d %H:%M",
-        "%Y-%m-%d",
-        "%Y/%m/%d %H:%M:%S",
-        "%Y/%m/%d %H:%M",
-        "%Y/%m/%d",
-        "%d/%m/%Y %H:%M:%S",
-        "%d/%m/%Y",
-    ]
-
-    for fmt in date_formats:
+    for fmt in DATETIME_FORMATS:
         try:
             dt = datetime.strptime(value_str, fmt)
             return dt.isoformat()
@@ -471,6 +474,200 @@ def _clean_datetime_value(value: Any) -> Optional[str]:
     return None
 
 
+def _clean_numeric_series(series: pd.Series) -> pd.Series:
+    """
+    按列清洗数值字段（_clean_numeric_value 的向量化版本，结果逐值一致）
+
+    处理：
+    1. 数值类型列直接转 float64，NaN 转为 0.0
+    2. category 列只清洗各分类取值一次，再按编码映射回各行
+    3. 原生 int/float 单元格直接批量转换；字符串单元格使用向量操作去除
+       货币符号、千分位、空格和末尾百分号后批量转换（与 float() 解析精度一致）
+    4. 无法批量解析的少量单元格回退到 _clean_numeric_value
+
+    Args:
+        series: 原始列
+
+    Returns:
+        pd.Series: float64 列（索引与原列一致）
+    """
+    if (
+        pd.api.types.is_bool_dtype(series.dtype)
+        or pd.api.types.is_integer_dtype(series.dtype)
+        or pd.api.types.is_float_dtype(series.dtype)
+    ):
+        return series.astype(np.float64).fillna(0.0)
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        cleaned_categories = _clean_numeric_series(
+            pd.Series(series.cat.categories.to_numpy(dtype=object))
+        ).to_numpy()
+        # 编码 -1（缺失值）取末尾追加的 0.0
+        lookup = np.append(cleaned_categories, 0.0)
+        return pd.Series(
+            lookup[series.cat.codes.to_numpy()], index=series.index, name=series.name
+        )
+
+    values = series.to_numpy(dtype=object)
+    result = np.zeros(len(values), dtype=np.float64)
+
+    value_types = [type(v) for v in values]
+    native_mask = np.fromiter(
+        (t is float or t is int or t is bool for t in value_types),
+        dtype=bool,
+        count=len(values),
+    )
+    str_mask = np.fromiter(
+        (t is str for t in value_types), dtype=bool, count=len(values)
+    )
+    na_mask = pd.isna(values)
+
+    # 1. 原生数值：等价于 float(value)
+    native_mask &= ~na_mask
+    if native_mask.any():
+        result[native_mask] = values[native_mask].astype(np.float64)
+
+    # 2. 字符串：向量化清洗后批量转换
+    fallback_positions = list(np.flatnonzero(~na_mask & ~native_mask & ~str_mask))
+    if str_mask.any():
+        text = pd.Series(values[str_mask], index=np.flatnonzero(str_mask)).str.strip()
+        text = text[(text != "") & (text.str.lower() != "nan")]
+
+        cleaned = text.str.replace(r"[¥$, ]", "", regex=True)
+        percent_mask = cleaned.str.endswith("%")
+        if percent_mask.any():
+            cleaned = cleaned.where(~percent_mask, cleaned.str[:-1])
+
+        # pd.to_numeric 仅用于筛选；取值使用 numpy 转换以保证与 float() 完全一致
+        parsable = pd.to_numeric(cleaned, errors="coerce").notna()
+        try:
+            result[cleaned.index[parsable]] = (
+                cleaned[parsable].to_numpy(dtype=object).astype(np.float64)
+            )
+            fallback_positions.extend(cleaned.index[~parsable])
+        except (ValueError, TypeError, OverflowError):
+            fallback_positions.extend(cleaned.index)
+
+    # 3. 其余单元格逐个回退
+    for pos in fallback_positions:
+        result[pos] = _clean_numeric_value(values[pos])
+
+    return pd.Series(result, index=series.index, name=series.name)
+
+
+def _clean_datetime_series(series: pd.Series) -> pd.Series:
+    """
+    按列清洗日期时间字段（_clean_datetime_value 的向量化版本，结果逐值一致）
+
+    处理：
+    1. datetime64 列直接批量格式化为 ISO 8601；category 列只解析各分类取值一次
+    2. 字符串单元格按 DATETIME_FORMATS 顺序逐个格式批量解析，
+       每个格式只对尚未解析成功的单元格尝试一次
+    3. datetime 对象直接格式化；非标准格式字符串按唯一值回退到 _clean_datetime_value
+
+    Args:
+        series: 原始列
+
+    Returns:
+        pd.Series: object 列，元素为 ISO 8601 字符串或 None
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        cleaned_categories = _clean_datetime_series(
+            pd.Series(series.cat.categories.to_numpy(dtype=object))
+        ).to_numpy()
+        # 编码 -1（缺失值）取末尾追加的 None
+        lookup = np.append(cleaned_categories, None)
+        return pd.Series(
+            lookup[series.cat.codes.to_numpy()], index=series.index, name=series.name
+        )
+
+    result = np.full(len(series), None, dtype=object)
+
+    if pd.api.types.is_datetime64_dtype(series.dtype):
+        values = pd.Series(series.to_numpy())
+        valid = values.notna()
+        whole_seconds = valid & (values.dt.microsecond == 0) & (values.dt.nanosecond == 0)
+        if whole_seconds.any():
+            result[whole_seconds.to_numpy()] = (
+                values[whole_seconds].dt.strftime("%Y-%m-%dT%H:%M:%S").to_numpy()
+            )
+        for pos in np.flatnonzero((valid & ~whole_seconds).to_numpy()):
+            result[pos] = values.iat[pos].isoformat()
+        return pd.Series(result, index=series.index, name=series.name)
+
+    values = pd.Series(series.to_numpy(dtype=object))
+    na_mask = values.isna().to_numpy()
+    str_mask = np.fromiter(
+        (isinstance(v, str) for v in values), dtype=bool, count=len(values)
+    )
+    datetime_mask = np.fromiter(
+        (isinstance(v, datetime) for v in values), dtype=bool, count=len(values)
+    ) & ~na_mask
+
+    # datetime 对象（含 pd.Timestamp）直接格式化
+    if datetime_mask.any():
+        result[datetime_mask] = [v.isoformat() for v in values[datetime_mask]]
+
+    # 非空、非字符串、非 datetime 的值（数字等）逐个处理
+    fallback_positions = list(np.flatnonzero(~na_mask & ~str_mask & ~datetime_mask))
+
+    text = values[str_mask].str.strip()
+    remaining = text[(text != "") & (text.str.lower() != "nan")]
+    for fmt in DATETIME_FORMATS:
+        if remaining.empty:
+            break
+        parsed = pd.to_datetime(remaining, format=fmt, errors="coerce")
+        matched = parsed.notna()
+        if matched.any():
+            result[remaining.index[matched]] = (
+                parsed[matched].dt.strftime("%Y-%m-%dT%H:%M:%S").to_numpy()
+            )
+            remaining = remaining[~matched]
+
+    # 非标准格式的字符串按唯一值回退解析，避免重复解析相同取值
+    if not remaining.empty:
+        parsed_by_value = {
+            value: _clean_datetime_value(value) for value in remaining.unique()
+        }
+        result[remaining.index] = [parsed_by_value[value] for value in remaining]
+
+    for pos in fallback_positions:
+        result[pos] = _clean_datetime_value(values.iat[pos])
+
+    return pd.Series(result, index=series.index, name=series.name)
+
+
+def _round_float_array(values: np.ndarray, ndigits: int = 2) -> np.ndarray:
+    """
+    向量化保留小数位（与内置 round() 逐值一致）
+
+    先按 rint(x * 10^n) / 10^n 批量取整；只有乘法误差可能影响舍入方向的
+    “接近 .5”的值，以及非有限值/超大值才逐个回退到 round()。
+
+    Args:
+        values: float64 数组（不含 NaN 的语义由调用方处理）
+        ndigits: 保留小数位数
+
+    Returns:
+        np.ndarray: 取整后的 float64 数组
+    """
+    scale = 10.0 ** ndigits
+    with np.errstate(invalid="ignore", over="ignore"):
+        scaled = values * scale
+        rounded = np.rint(scaled) / scale
+        fraction = scaled - np.floor(scaled)
+        ambiguous = (
+            ~np.isfinite(scaled)
+            | (np.abs(scaled) >= 2.0**52)
+            | (np.abs(fraction - 0.5) <= 8 * np.spacing(np.abs(scaled)))
+        )
+
+    for pos in np.flatnonzero(ambiguous):
+        rounded[pos] = round(float(values[pos]), ndigits)
+
+    return rounded
+
+
 def _convert_to_snake_case(chinese_name: str) -> str:
     """
     将中文支付方式名称转换为 snake_case 英文名
@@ -796,7 +993,8 @@ class CleanerService:
         report_type: str,
         filename: str = "",
         detected_date: Optional[str] = None,
-    ) -> Tuple[List[Dict], ValidationResult]:
+        columnar: bool = False,
+    ) -> Tuple[Union[List[Dict], Dict[str, List[Any]]], ValidationResult]:
         """
         主入口函数：清洗数据并校验
 
@@ -810,9 +1008,11 @@ class CleanerService:
             report_type: 报表类型 ('booking' | 'sales' | 'room')
             filename: 原始文件名，用于缺失时推断 biz_date
             detected_date: 从文件标题行检测到的日期（Parser 提供）
+            columnar: 为 True 时返回列式结构 {列名: 值列表}，不逐行构建字典
 
         Returns:
-            Tuple[List[Dict], ValidationResult]: (清洗后的数据列表, 校验报告)
+            Tuple[Union[List[Dict], Dict[str, List]], ValidationResult]:
+                (清洗后的数据列表或列式数据, 校验报告)
         """
         # 重置错误和警告收集器（确保无状态）
         self._errors = []
@@ -821,7 +1021,7 @@ class CleanerService:
         # 1. 获取对应的映射字典
         mapping = self._get_mapping_by_type(report_type)
         if mapping is None:
-            return [], ValidationResult(
+            return ({} if columnar else []), ValidationResult(
                 is_valid=False,
                 total_rows=len(df),
                 error_count=1,
@@ -838,14 +1038,13 @@ class CleanerService:
                 summary={"error": "不支持的报表类型"},
             )
 
-        # 2. 复制 DataFrame 避免修改原数据
-        df_clean = df.copy()
-
-        # 3. 动态列归集（处理未知支付方式）
-        df_clean, extra_data_list = self._pack_dynamic_columns(df_clean, mapping)
+        # 2. 动态列归集（处理未知支付方式），只读 df
+        dynamic_columns, extra_data_list = self._pack_dynamic_columns(df, mapping)
 
-        # 4. 重命名列（应用映射，包含模糊匹配）
-        df_clean = self._apply_mapping(df_clean, mapping)
+        # 3. 重命名列（应用映射，包含模糊匹配）
+        # 选取已映射列时生成清洗过程中唯一的一份副本，之后的步骤都在这份副本上原地修改，
+        # 传入的 df 不会被修改
+        df_clean = self._apply_mapping(df, mapping, exclude=dynamic_columns)
         df_clean = self._ensure_core_numeric_fields(df_clean, report_type)
 
         extracted_store_name = self._extract_store_from_filename(filename)
@@ -1064,8 +1263,11 @@ class CleanerService:
             meta_summary["payment_methods"] = payment_methods_meta
         validation_result.summary["meta"] = meta_summary
 
-        # 9. 转换为 List[Dict]
-        cleaned_data = self._dataframe_to_records(df_clean)
+        # 9. 转换为 List[Dict]（或列式结构）
+        if columnar:
+            cleaned_data = self._dataframe_to_columns(df_clean)
+        else:
+            cleaned_data = self._dataframe_to_records(df_clean)
 
         return cleaned_data, validation_result
 
@@ -1089,17 +1291,19 @@ class CleanerService:
 
     def _pack_dynamic_columns(
         self, df: pd.DataFrame, mapping: Dict[str, str]
-    ) -> Tuple[pd.DataFrame, List[Dict]]:
+    ) -> Tuple[List[str], List[Dict]]:
         """
         动态列归集：将未映射的支付方式列打包到 extra_info
 
+        不修改也不复制 df，动态列由 _apply_mapping 按 exclude 排除。
+
         Args:
             df: 输入 DataFrame
             mapping: 字段映射字典
 
         Returns:
-            Tuple[pd.DataFrame, List[Dict]]:
-                - 移除动态列后的 DataFrame
+            Tuple[List[str], List[Dict]]:
+                - 动态列列名
                 - 每行的额外支付方式字典列表
         """
         dynamic_columns: List[str] = []
@@ -1111,7 +1315,7 @@ class CleanerService:
                 dynamic_columns.append(col)
 
         if not dynamic_columns:
-            return df, [{} for _ in range(len(df))]
+            return dynamic_columns, [{} for _ in range(len(df))]
 
         column_field_map = {
             col: _convert_to_snake_case(str(col).replace("支付方式_", "", 1))
@@ -1127,8 +1331,7 @@ class CleanerService:
         )
 
         if melted.empty:
-            df_clean = df.drop(columns=dynamic_columns, errors="ignore")
-            return df_clean, [{} for _ in range(len(df_clean))]
+            return dynamic_columns, [{} for _ in range(len(df))]
 
         raw_str = melted["raw_value"].astype(str).str.strip()
 
@@ -1147,8 +1350,7 @@ class CleanerService:
         filtered = melted[numeric_values != 0].copy()
 
         if filtered.empty:
-            df_clean = df.drop(columns=dynamic_columns, errors="ignore")
-            return df_clean, [{} for _ in range(len(df_clean))]
+            return dynamic_columns, [{} for _ in range(len(df))]
 
         filtered["field"] = filtered["column"].map(column_field_map)
 
@@ -1177,10 +1379,14 @@ class CleanerService:
                     extra_dict_series.values
                 )
 
-        df_clean = df.drop(columns=dynamic_columns, errors="ignore")
-        return df_clean, extra_info_series.tolist()
+        return dynamic_columns, extra_info_series.tolist()
 
-    def _apply_mapping(self, df: pd.DataFrame, mapping: Dict[str, str]) -> pd.DataFrame:
+    def _apply_mapping(
+        self,
+        df: pd.DataFrame,
+        mapping: Dict[str, str],
+        exclude: Sequence[str] = (),
+    ) -> pd.DataFrame:
         """
         应用字段映射，重命名列（支持模糊匹配）
 
@@ -1189,13 +1395,17 @@ class CleanerService:
         2. 模糊匹配：相似度 > FUZZY_MATCH_THRESHOLD (0.85) 时自动映射
         3. 记录警告：模糊匹配成功时生成 WARNING 级别日志
 
+        结果只含保留的列，是 df 的副本（按列位置一次选取），df 本身不被修改。
+
         Args:
             df: 输入 DataFrame
             mapping: 字段映射字典 (中文名 -> 英文名)
+            exclude: 不参与映射、也不保留的列（动态支付方式列）
 
         Returns:
             pd.DataFrame: 重命名后的 DataFrame
         """
+        excluded = set(exclude)
         rename_dict: Dict[str, str] = {}
         # 跟踪已使用的映射目标，避免多列映射到同一字段
         used_targets: Set[str] = set()
@@ -1204,6 +1414,8 @@ class CleanerService:
 
         # === 第一轮：精确匹配 ===
         for col in df.columns:
+            if col in excluded:
+                continue
             col_str = str(col)
             if col_str in mapping:
                 target = mapping[col_str]
@@ -1247,36 +1459,45 @@ class CleanerService:
                     )
                 )
 
-        # 重命名
-        df = df.rename(columns=rename_dict)
+        # 重命名后的列名（按位置）
+        positions = [
+            position for position, col in enumerate(df.columns) if col not in excluded
+        ]
+        new_names = {
+            position: rename_dict.get(df.columns[position], df.columns[position])
+            for position in positions
+        }
 
         # 保留已映射的列
         mapped_columns = set(rename_dict.values())
-        columns_to_keep = [col for col in df.columns if col in mapped_columns]
+        positions_to_keep = [p for p in positions if new_names[p] in mapped_columns]
 
         # 如果有 extra_info 列，保留它
-        if "extra_info" in df.columns:
-            columns_to_keep.append("extra_info")
+        positions_to_keep += [p for p in positions if new_names[p] == "extra_info"]
+
+        if not positions_to_keep:
+            positions_to_keep = positions
 
-        return df[columns_to_keep] if columns_to_keep else df
+        df_mapped = df.take(positions_to_keep, axis=1)
+        df_mapped.columns = [new_names[p] for p in positions_to_keep]
+        return df_mapped
 
     def _ensure_core_numeric_fields(
         self, df: pd.DataFrame, report_type: str
     ) -> pd.DataFrame:
         """
-        确保关键数值字段存在且缺失值补 0。
+        确保关键数值字段存在且缺失值补 0（原地修改）。
         """
         required_fields = CORE_NUMERIC_FIELDS.get(report_type.lower())
         if not required_fields:
             return df
 
-        df_filled = df.copy()
         for field in required_fields:
-            if field not in df_filled.columns:
-                df_filled[field] = 0
+            if field not in df.columns:
+                df[field] = 0
             else:
-                df_filled[field] = df_filled[field].fillna(0)
-        return df_filled
+                df[field] = df[field].fillna(0)
+        return df
 
     def _find_best_fuzzy_match(
         self, column_name: str, available_sources: Dict[str, str]
@@ -1310,7 +1531,7 @@ class CleanerService:
 
     def _convert_types(self, df: pd.DataFrame, report_type: str) -> pd.DataFrame:
         """
-        数据类型转换
+        数据类型转换（逐列替换，原地修改 clean_data 持有的副本）
 
         Args:
             df: 输入 DataFrame
@@ -1319,7 +1540,6 @@ class CleanerService:
         Returns:
             pd.DataFrame: 类型转换后的 DataFrame
         """
-        df = df.copy()
 
         # 日期时间字段
         datetime_fields = {
@@ -1373,31 +1593,38 @@ class CleanerService:
                 continue
 
             if col in datetime_fields:
-                # 日期时间转换
-                df[col] = df[col].apply(_clean_datetime_value)
+                # 日期时间转换（逐列批量解析）
+                df[col] = _clean_datetime_series(df[col])
             elif col in string_fields:
                 # 字符串字段：确保转换为字符串，避免科学计数法
                 df[col] = df[col].astype(str).replace("nan", "").replace("None", "")
                 # 对于 card_no，如果是科学计数法格式，尝试恢复原始值
                 if col == "card_no":
-                    def _fix_card_no(val):
-                        if pd.isna(val) or val == "" or val == "nan":
-                            return ""
-                        val_str = str(val).strip()
-                        # 如果是科学计数法格式（包含 'e' 或 'E'）
-                        if "e" in val_str.lower() and "." in val_str:
-                            try:
-                                # 尝试转换为浮点数再转回整数，然后转字符串
-                                num = float(val_str)
-                                # 去掉小数点，恢复原始长数字
-                                return str(int(num))
-                            except (ValueError, OverflowError):
-                                return val_str
-                        return val_str
-                    df[col] = df[col].apply(_fix_card_no)
+                    df[col] = df[col].str.strip()
+
+                    def _fix_card_no(val_str: str) -> str:
+                        try:
+                            # 尝试转换为浮点数再转回整数，然后转字符串
+                            num = float(val_str)
+                            # 去掉小数点，恢复原始长数字
+                            return str(int(num))
+                        except (ValueError, OverflowError):
+                            return val_str
+
+                    # 科学计数法格式（包含 'e' 或 'E' 且包含小数点）
+                    sci_mask = df[col].str.lower().str.contains(
+                        "e", regex=False
+                    ) & df[col].str.contains(".", regex=False)
+                    if sci_mask.any():
+                        df.loc[sci_mask, col] = df.loc[sci_mask, col].map(_fix_card_no)
             elif col in integer_fields:
-                # 整数转换
-                df[col] = df[col].apply(lambda x: int(_clean_numeric_value(x)))
+                # 整数转换（向下取整语义与 int() 一致）
+                numeric = _clean_numeric_series(df[col])
+                if np.isfinite(numeric).all() and (numeric.abs() < 2**63).all():
+                    df[col] = np.trunc(numeric).astype(np.int64)
+                else:
+                    # NaN/inf/超出 int64 范围时保持逐值 int() 的原有行为
+                    df[col] = df[col].apply(lambda x: int(_clean_numeric_value(x)))
             else:
                 # 尝试数值转换
                 try:
@@ -1413,7 +1640,7 @@ class CleanerService:
                                 break
 
                     if is_numeric or df[col].dtype in ["int64", "float64"]:
-                        df[col] = df[col].apply(_clean_numeric_value)
+                        df[col] = _clean_numeric_series(df[col])
                 except Exception:
                     pass
 
@@ -1421,27 +1648,19 @@ class CleanerService:
         if report_type == "member_change":
             if "change_type" in df.columns:
                 # 仅对充值类变动计算充值实收，其它类型默认为 0
-                def _calc_recharge_income(row: pd.Series) -> float:
-                    try:
-                        change_type_str = str(row.get("change_type", "")).strip()
-                        # 使用包含匹配，兼容 "充值"、"充值-首充"、"会员充值" 等变体
-                        if "充值" not in change_type_str:
-                            return 0.0
-                    except Exception:
-                        return 0.0
-
-                    principal_room = _clean_numeric_value(
-                        row.get("room_amount_principal", 0)
-                    )
-                    principal_drink = _clean_numeric_value(
-                        row.get("drink_amount_principal", 0)
-                    )
-                    return principal_room + principal_drink
-
-                df["recharge_real_income"] = df.apply(
-                    _calc_recharge_income,
-                    axis=1,
+                # 使用包含匹配，兼容 "充值"、"充值-首充"、"会员充值" 等变体
+                is_recharge = (
+                    df["change_type"].astype(str).str.strip().str.contains("充值", regex=False)
                 )
+
+                principal_income = pd.Series(0.0, index=df.index)
+                for principal_col in ("room_amount_principal", "drink_amount_principal"):
+                    if principal_col in df.columns:
+                        principal_income = principal_income + _clean_numeric_series(
+                            df[principal_col]
+                        )
+
+                df["recharge_real_income"] = principal_income.where(is_recharge, 0.0)
             else:
                 # 缺少 change_type 时，仍然补一个字段，全部为 0，避免下游 KeyError
                 df["recharge_real_income"] = 0.0
@@ -1499,6 +1718,51 @@ class CleanerService:
             summary=summary,
         )
 
+    @staticmethod
+    def _numeric_column(df: pd.DataFrame, field: str) -> np.ndarray:
+        """
+        取出数值列（按 _clean_numeric_value 规则清洗），列不存在时返回全 0
+
+        Args:
+            df: 清洗后的 DataFrame
+            field: 字段名
+
+        Returns:
+            np.ndarray: float64 数组
+        """
+        if field not in df.columns:
+            return np.zeros(len(df), dtype=np.float64)
+        return _clean_numeric_series(df[field]).to_numpy()
+
+    @staticmethod
+    def _extra_info_numeric_frame(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        将 extra_info 字典列展开为数值矩阵（缺失键视为 0）
+
+        列按键名排序，与 _pack_dynamic_columns 生成字典时的键顺序一致，
+        从而保证逐列累加与逐行按字典顺序累加的结果完全相同。
+
+        Args:
+            df: 清洗后的 DataFrame
+
+        Returns:
+            pd.DataFrame: 行号为 0..n-1、每个动态字段一列的 float64 矩阵
+        """
+        row_index = pd.RangeIndex(len(df))
+        if "extra_info" not in df.columns:
+            return pd.DataFrame(index=row_index)
+
+        infos = [info if isinstance(info, dict) else {} for info in df["extra_info"]]
+        if not any(infos):
+            return pd.DataFrame(index=row_index)
+
+        extra_df = pd.DataFrame.from_records(infos, index=row_index)
+        extra_df = extra_df[sorted(extra_df.columns, key=str)]
+        return pd.DataFrame(
+            {key: _clean_numeric_series(extra_df[key]) for key in extra_df.columns},
+            index=row_index,
+        )
+
     def _validate_balance(self, df: pd.DataFrame, report_type: str) -> List[RowError]:
         """
         平衡性校验：实收金额 = 收入类支付方式合计
@@ -1515,40 +1779,39 @@ class CleanerService:
         if "actual_amount" not in df.columns:
             return errors
 
-        for idx in range(len(df)):
-            row = df.iloc[idx]
-            actual_amount = _clean_numeric_value(row.get("actual_amount", 0))
-
-            # 计算收入类支付方式合计
-            income_sum = 0.0
-            for field in INCOME_PAYMENT_FIELDS:
-                if field in df.columns:
-                    income_sum += _clean_numeric_value(row.get(field, 0))
-
-            # 加上 extra_info 中的动态支付方式
-            extra_info = row.get("extra_info", {})
-            if isinstance(extra_info, dict):
-                for key, value in extra_info.items():
-                    # 动态支付方式默认视为收入类
-                    income_sum += _clean_numeric_value(value)
-
-            # 计算差异
-            diff = abs(actual_amount - income_sum)
-            if diff > self.tolerance:
-                errors.append(
-                    RowError(
-                        row_index=idx,
-                        column="actual_amount",
-                        message=f"实收金额({actual_amount:.2f})与支付方式合计({income_sum:.2f})不平衡，差异: {diff:.2f}元",
-                        error_type=ETLErrorType.LOGIC_ERROR,
-                        severity="error",
-                        raw_data={
-                            "actual_amount": actual_amount,
-                            "pay_sum": income_sum,
-                            "difference": diff,
-                        },
-                    )
+        actual_amount = self._numeric_column(df, "actual_amount")
+
+        # 计算收入类支付方式合计
+        income_sum = np.zeros(len(df), dtype=np.float64)
+        for field in INCOME_PAYMENT_FIELDS:
+            if field in df.columns:
+                income_sum = income_sum + self._numeric_column(df, field)
+
+        # 加上 extra_info 中的动态支付方式（动态支付方式默认视为收入类）
+        extra_df = self._extra_info_numeric_frame(df)
+        for key in extra_df.columns:
+            income_sum = income_sum + extra_df[key].to_numpy()
+
+        # 计算差异，仅为违规行构建错误
+        diff = np.abs(actual_amount - income_sum)
+        for idx in np.flatnonzero(diff > self.tolerance):
+            row_actual = float(actual_amount[idx])
+            row_income = float(income_sum[idx])
+            row_diff = float(diff[idx])
+            errors.append(
+                RowError(
+                    row_index=int(idx),
+                    column="actual_amount",
+                    message=f"实收金额({row_actual:.2f})与支付方式合计({row_income:.2f})不平衡，差异: {row_diff:.2f}元",
+                    error_type=ETLErrorType.LOGIC_ERROR,
+                    severity="error",
+                    raw_data={
+                        "actual_amount": row_actual,
+                        "pay_sum": row_income,
+                        "difference": row_diff,
+                    },
                 )
+            )
 
         return errors
 
@@ -1562,64 +1825,62 @@ class CleanerService:
         Returns:
             List[RowError]: 错误列表
         """
-        errors: List[RowError] = []
-
-        for idx in range(len(df)):
-            row = df.iloc[idx]
+        # 保持逐行校验时的错误顺序：同一行的成本错误在利润错误之前
+        row_errors: Dict[int, List[RowError]] = {}
 
-            # 成本平衡校验：成本_小计 = 成本_销售 + 成本_赠送
-            if all(f in df.columns for f in ["cost_total", "cost_sales", "cost_gift"]):
-                cost_total = _clean_numeric_value(row.get("cost_total", 0))
-                cost_sales = _clean_numeric_value(row.get("cost_sales", 0))
-                cost_gift = _clean_numeric_value(row.get("cost_gift", 0))
+        # 成本平衡校验：成本_小计 = 成本_销售 + 成本_赠送
+        if all(f in df.columns for f in ["cost_total", "cost_sales", "cost_gift"]):
+            cost_total = self._numeric_column(df, "cost_total")
+            cost_sales = self._numeric_column(df, "cost_sales")
+            cost_gift = self._numeric_column(df, "cost_gift")
 
-                expected_total = cost_sales + cost_gift
-                diff = abs(cost_total - expected_total)
+            expected_total = cost_sales + cost_gift
+            diff = np.abs(cost_total - expected_total)
 
-                if diff > self.tolerance:
-                    errors.append(
-                        RowError(
-                            row_index=idx,
-                            column="cost_total",
-                            message=f"成本小计({cost_total:.2f})与成本_销售+成本_赠送({expected_total:.2f})不匹配",
-                            error_type=ETLErrorType.LOGIC_ERROR,
-                            severity="error",
-                            raw_data={
-                                "cost_total": cost_total,
-                                "cost_sales": cost_sales,
-                                "cost_gift": cost_gift,
-                                "expected": expected_total,
-                            },
-                        )
+            for idx in np.flatnonzero(diff > self.tolerance):
+                row_errors.setdefault(int(idx), []).append(
+                    RowError(
+                        row_index=int(idx),
+                        column="cost_total",
+                        message=f"成本小计({cost_total[idx]:.2f})与成本_销售+成本_赠送({expected_total[idx]:.2f})不匹配",
+                        error_type=ETLErrorType.LOGIC_ERROR,
+                        severity="error",
+                        raw_data={
+                            "cost_total": float(cost_total[idx]),
+                            "cost_sales": float(cost_sales[idx]),
+                            "cost_gift": float(cost_gift[idx]),
+                            "expected": float(expected_total[idx]),
+                        },
                     )
+                )
 
-            # 利润校验：利润 = 销售金额_小计 - 成本_小计
-            if all(f in df.columns for f in ["profit", "sales_amount", "cost_total"]):
-                profit = _clean_numeric_value(row.get("profit", 0))
-                sales_amount = _clean_numeric_value(row.get("sales_amount", 0))
-                cost_total = _clean_numeric_value(row.get("cost_total", 0))
+        # 利润校验：利润 = 销售金额_小计 - 成本_小计
+        if all(f in df.columns for f in ["profit", "sales_amount", "cost_total"]):
+            profit = self._numeric_column(df, "profit")
+            sales_amount = self._numeric_column(df, "sales_amount")
+            cost_total = self._numeric_column(df, "cost_total")
 
-                expected_profit = sales_amount - cost_total
-                diff = abs(profit - expected_profit)
+            expected_profit = sales_amount - cost_total
+            diff = np.abs(profit - expected_profit)
 
-                if diff > self.tolerance:
-                    errors.append(
-                        RowError(
-                            row_index=idx,
-                            column="profit",
-                            message=f"利润({profit:.2f})与销售金额-成本({expected_profit:.2f})不匹配",
-                            error_type=ETLErrorType.LOGIC_ERROR,
-                            severity="error",
-                            raw_data={
-                                "profit": profit,
-                                "sales_amount": sales_amount,
-                                "cost_total": cost_total,
-                                "expected_profit": expected_profit,
-                            },
-                        )
+            for idx in np.flatnonzero(diff > self.tolerance):
+                row_errors.setdefault(int(idx), []).append(
+                    RowError(
+                        row_index=int(idx),
+                        column="profit",
+                        message=f"利润({profit[idx]:.2f})与销售金额-成本({expected_profit[idx]:.2f})不匹配",
+                        error_type=ETLErrorType.LOGIC_ERROR,
+                        severity="error",
+                        raw_data={
+                            "profit": float(profit[idx]),
+                            "sales_amount": float(sales_amount[idx]),
+                            "cost_total": float(cost_total[idx]),
+                            "expected_profit": float(expected_profit[idx]),
+                        },
                     )
+                )
 
-        return errors
+        return [error for idx in sorted(row_errors) for error in row_errors[idx]]
 
     def _validate_booking_logic(self, df: pd.DataFrame) -> List[RowError]:
         """
@@ -1636,11 +1897,11 @@ class CleanerService:
         """
         errors: List[RowError] = []
 
-        # 必须存在 actual_amount 字段才能进行校验
-        if "actual_amount" not in df.columns:
+        # 必须存在 actual_amount 与 sales_amount 字段才能进行校验
+        if "actual_amount" not in df.columns or "sales_amount" not in df.columns:
             return errors
 
-        # 定义扣减字段及其默认值
+        # 定义扣减字段（缺失字段按 0 计）
         deduction_fields = [
             "free_amount",  # 免单金额
             "credit_amount",  # 挂账金额
@@ -1649,56 +1910,46 @@ class CleanerService:
             "adjustment_amount",  # 调整金额
         ]
 
-        for idx in range(len(df)):
-            row = df.iloc[idx]
+        actual_amount = self._numeric_column(df, "actual_amount")
+        sales_amount = self._numeric_column(df, "sales_amount")
 
-            # 获取实收金额
-            actual_amount = _clean_numeric_value(row.get("actual_amount", 0))
-
-            # 获取销售金额（如果不存在则跳过该行校验）
-            if "sales_amount" not in df.columns:
-                continue
-            sales_amount = _clean_numeric_value(row.get("sales_amount", 0))
-
-            # 累加所有扣减金额
-            total_deduction = 0.0
-            deduction_details = {}
-            for field in deduction_fields:
-                if field in df.columns:
-                    value = _clean_numeric_value(row.get(field, 0))
-                else:
-                    value = 0.0
-                deduction_details[field] = value
-                total_deduction += value
-
-            # 计算预期实收金额
-            expected_actual = sales_amount - total_deduction
-
-            # 计算差异
-            diff = abs(actual_amount - expected_actual)
-
-            if diff > self.tolerance:
-                errors.append(
-                    RowError(
-                        row_index=idx,
-                        column="actual_amount",
-                        message=(
-                            f"账单构成校验失败: 实收金额({actual_amount:.2f}) != "
-                            f"销售金额({sales_amount:.2f}) - 扣减合计({total_deduction:.2f}) = "
-                            f"预期({expected_actual:.2f})，差异: {diff:.2f}元"
-                        ),
-                        error_type=ETLErrorType.LOGIC_ERROR,
-                        severity="error",
-                        raw_data={
-                            "actual_amount": actual_amount,
-                            "sales_amount": sales_amount,
-                            "total_deduction": total_deduction,
-                            "expected_actual": expected_actual,
-                            "difference": diff,
-                            **deduction_details,
+        # 累加所有扣减金额
+        deduction_values = {
+            field: self._numeric_column(df, field) for field in deduction_fields
+        }
+        total_deduction = np.zeros(len(df), dtype=np.float64)
+        for field in deduction_fields:
+            total_deduction = total_deduction + deduction_values[field]
+
+        # 计算预期实收金额与差异
+        expected_actual = sales_amount - total_deduction
+        diff = np.abs(actual_amount - expected_actual)
+
+        for idx in np.flatnonzero(diff > self.tolerance):
+            errors.append(
+                RowError(
+                    row_index=int(idx),
+                    column="actual_amount",
+                    message=(
+                        f"账单构成校验失败: 实收金额({actual_amount[idx]:.2f}) != "
+                        f"销售金额({sales_amount[idx]:.2f}) - 扣减合计({total_deduction[idx]:.2f}) = "
+                        f"预期({expected_actual[idx]:.2f})，差异: {diff[idx]:.2f}元"
+                    ),
+                    error_type=ETLErrorType.LOGIC_ERROR,
+                    severity="error",
+                    raw_data={
+                        "actual_amount": float(actual_amount[idx]),
+                        "sales_amount": float(sales_amount[idx]),
+                        "total_deduction": float(total_deduction[idx]),
+                        "expected_actual": float(expected_actual[idx]),
+                        "difference": float(diff[idx]),
+                        **{
+                            field: float(values[idx])
+                            for field, values in deduction_values.items()
                         },
-                    )
+                    },
                 )
+            )
 
         return errors
 
@@ -1758,109 +2009,136 @@ class CleanerService:
             "beverage_discount",  # 酒水折扣
         ]
 
-        for idx in range(len(df)):
-            row = df.iloc[idx]
+        row_count = len(df)
+        actual_amount = self._numeric_column(df, "actual_amount")
+        bill_total = self._numeric_column(df, "bill_total")
 
-            # 获取实收金额和账单合计
-            actual_amount = _clean_numeric_value(row.get("actual_amount", 0))
-            bill_total = _clean_numeric_value(row.get("bill_total", 0))
-
-            # 累加扣减金额
-            total_deduction = 0.0
-            deduction_details = {}
-            for field in deduction_fields:
-                if field in df.columns:
-                    value = _clean_numeric_value(row.get(field, 0))
-                else:
-                    value = 0.0
-                deduction_details[field] = value
-                total_deduction += value
-
-            # 累加权益类支付（COST_PAYMENT_FIELDS）
-            cost_payment_sum = 0.0
-            cost_payment_details = {}
-
-            # —— 会员支付互斥处理 ——
-            member_total = (
-                _clean_numeric_value(row.get("pay_member", 0))
-                if "pay_member" in df.columns
-                else 0.0
+        # 累加扣减金额
+        deduction_values = {
+            field: self._numeric_column(df, field) for field in deduction_fields
+        }
+        total_deduction = np.zeros(row_count, dtype=np.float64)
+        for field in deduction_fields:
+            total_deduction = total_deduction + deduction_values[field]
+
+        # 累加权益类支付（COST_PAYMENT_FIELDS），只记录非 0 明细
+        cost_payment_sum = np.zeros(row_count, dtype=np.float64)
+        cost_payment_columns: List[Tuple[str, np.ndarray, np.ndarray]] = []
+
+        # —— 会员支付互斥处理：有本金/赠送明细时用明细，否则用会员支付合计 ——
+        member_total = self._numeric_column(df, "pay_member")
+        member_detail_sum = np.zeros(row_count, dtype=np.float64)
+        member_detail_has_value = np.zeros(row_count, dtype=bool)
+        member_detail_values: Dict[str, np.ndarray] = {}
+        for member_field in ("pay_member_principal", "pay_member_gift"):
+            if member_field in df.columns:
+                value = self._numeric_column(df, member_field)
+                member_detail_values[member_field] = value
+                member_detail_sum = member_detail_sum + value
+                member_detail_has_value |= value != 0
+
+        use_member_total = ~member_detail_has_value & (member_total != 0)
+        cost_payment_sum = cost_payment_sum + np.where(
+            member_detail_has_value,
+            member_detail_sum,
+            np.where(use_member_total, member_total, 0.0),
+        )
+        for field, value in member_detail_values.items():
+            cost_payment_columns.append(
+                (field, value, member_detail_has_value & (value != 0))
             )
-            member_detail_sum = 0.0
-            member_detail_values: Dict[str, float] = {}
-            member_detail_has_value = False
-            for member_field in ("pay_member_principal", "pay_member_gift"):
-                if member_field in df.columns:
-                    value = _clean_numeric_value(row.get(member_field, 0))
-                    member_detail_values[member_field] = value
-                    member_detail_sum += value
-                    if value != 0:
-                        member_detail_has_value = True
-
-            if member_detail_has_value:
-                cost_payment_sum += member_detail_sum
-                for field, value in member_detail_values.items():
-                    if value != 0:
-                        cost_payment_details[field] = value
-            elif member_total != 0:
-                cost_payment_sum += member_total
-                cost_payment_details["pay_member"] = member_total
-
-            # —— 其他权益类支付方式 ——
-            for field in COST_PAYMENT_FIELDS:
-                if field in MEMBER_PAYMENT_FIELDS:
-                    continue
-                if field in df.columns:
-                    value = _clean_numeric_value(row.get(field, 0))
-                    if value != 0:
-                        cost_payment_details[field] = value
-                        cost_payment_sum += value
-
-            # 检查 extra_info 中是否有额外的权益类支付
-            extra_info = row.get("extra_info", {})
-            if isinstance(extra_info, dict):
-                for key, value in extra_info.items():
-                    # 调用统一分类方法，判断是否属于权益类 (equity)
-                    if self._classify_payment_category(key) == "equity":
-                        val = _clean_numeric_value(value)
-                        if val != 0:
-                            cost_payment_sum += val
-                            cost_payment_details[key] = val
-
-            # 计算预期实收金额
-            expected_actual = bill_total - total_deduction - cost_payment_sum
-
-            # 计算差异
-            diff = abs(actual_amount - expected_actual)
-
-            if diff > self.tolerance:
-                errors.append(
-                    RowError(
-                        row_index=idx,
-                        column="actual_amount",
-                        message=(
-                            f"包厢账单构成校验失败: 实收金额({actual_amount:.2f}) != "
-                            f"账单合计({bill_total:.2f}) - 扣减({total_deduction:.2f}) - "
-                            f"权益类支付({cost_payment_sum:.2f}) = 预期({expected_actual:.2f})，"
-                            f"差异: {diff:.2f}元"
-                        ),
-                        error_type=ETLErrorType.LOGIC_ERROR,
-                        severity="error",
-                        raw_data={
-                            "actual_amount": actual_amount,
-                            "bill_total": bill_total,
-                            "total_deduction": total_deduction,
-                            "cost_payment_sum": cost_payment_sum,
-                            "expected_actual": expected_actual,
-                            "difference": diff,
-                            **deduction_details,
-                            **cost_payment_details,
-                        },
-                    )
+        cost_payment_columns.append(("pay_member", member_total, use_member_total))
+
+        # —— 其他权益类支付方式 ——
+        for field in COST_PAYMENT_FIELDS:
+            if field in MEMBER_PAYMENT_FIELDS:
+                continue
+            if field in df.columns:
+                value = self._numeric_column(df, field)
+                nonzero = value != 0
+                cost_payment_sum = cost_payment_sum + np.where(nonzero, value, 0.0)
+                cost_payment_columns.append((field, value, nonzero))
+
+        # extra_info 中的额外权益类支付
+        extra_df = self._extra_info_numeric_frame(df)
+        for key in extra_df.columns:
+            # 调用统一分类方法，判断是否属于权益类 (equity)
+            if self._classify_payment_category(key) != "equity":
+                continue
+            value = extra_df[key].to_numpy()
+            nonzero = value != 0
+            cost_payment_sum = cost_payment_sum + np.where(nonzero, value, 0.0)
+            cost_payment_columns.append((key, value, nonzero))
+
+        # 计算预期实收金额与差异
+        expected_actual = bill_total - total_deduction - cost_payment_sum
+        diff = np.abs(actual_amount - expected_actual)
+
+        for idx in np.flatnonzero(diff > self.tolerance):
+            deduction_details = {
+                field: float(values[idx]) for field, values in deduction_values.items()
+            }
+            cost_payment_details = {
+                field: float(values[idx])
+                for field, values, present in cost_payment_columns
+                if present[idx]
+            }
+            errors.append(
+                RowError(
+                    row_index=int(idx),
+                    column="actual_amount",
+                    message=(
+                        f"包厢账单构成校验失败: 实收金额({actual_amount[idx]:.2f}) != "
+                        f"账单合计({bill_total[idx]:.2f}) - 扣减({total_deduction[idx]:.2f}) - "
+                        f"权益类支付({cost_payment_sum[idx]:.2f}) = 预期({expected_actual[idx]:.2f})，"
+                        f"差异: {diff[idx]:.2f}元"
+                    ),
+                    error_type=ETLErrorType.LOGIC_ERROR,
+                    severity="error",
+                    raw_data={
+                        "actual_amount": float(actual_amount[idx]),
+                        "bill_total": float(bill_total[idx]),
+                        "total_deduction": float(total_deduction[idx]),
+                        "cost_payment_sum": float(cost_payment_sum[idx]),
+                        "expected_actual": float(expected_actual[idx]),
+                        "difference": float(diff[idx]),
+                        **deduction_details,
+                        **cost_payment_details,
+                    },
                 )
+            )
 
         return errors
 
+    def _parse_time_column(self, df: pd.DataFrame, field: str) -> pd.Series:
+        """
+        批量解析时间列（_parse_time_safely 的列式版本）
+
+        先按 ISO 8601 批量解析（_convert_types 输出的标准格式），
+        解析失败的非空值再逐个回退到 _parse_time_safely。
+
+        Args:
+            df: 清洗后的 DataFrame
+            field: 时间字段名
+
+        Returns:
+            pd.Series: datetime64 列（行号为 0..n-1），无法解析为 NaT
+        """
+        row_index = pd.RangeIndex(len(df))
+        if field not in df.columns:
+            return pd.Series(pd.NaT, index=row_index, dtype="datetime64[ns]")
+
+        values = pd.Series(df[field].to_numpy(dtype=object), index=row_index)
+        parsed = pd.to_datetime(values, format="ISO8601", errors="coerce")
+
+        unresolved = parsed.isna() & values.notna()
+        for idx in np.flatnonzero(unresolved.to_numpy()):
+            fallback = self._parse_time_safely(values.iat[idx])
+            if fallback is not None:
+                parsed.iat[idx] = fallback
+
+        return parsed
+
     def _validate_room_time_logic(self, df: pd.DataFrame) -> List[RowError]:
         """
         包厢开台表时间逻辑校验
@@ -1876,40 +2154,37 @@ class CleanerService:
         """
         errors: List[RowError] = []
 
-        for idx in range(len(df)):
-            row = df.iloc[idx]
-
-            # 获取时间字段值（可能是 ISO 字符串或 None）
-            open_time_str = row.get("open_time")
-            close_time_str = row.get("close_time")
-            clean_time_str = row.get("clean_time")
-
-            # 解析时间（忽略空值）
-            open_time = self._parse_time_safely(open_time_str)
-            close_time = self._parse_time_safely(close_time_str)
-            clean_time = self._parse_time_safely(clean_time_str)
+        if "open_time" not in df.columns or "close_time" not in df.columns:
+            return errors
 
-            # 规则1: open_time <= close_time
-            if open_time is not None and close_time is not None:
-                if open_time > close_time:
-                    errors.append(
-                        RowError(
-                            row_index=idx,
-                            column="close_time",
-                            message=(
-                                f"时间逻辑错误: 开房时间({open_time_str}) > "
-                                f"关房时间({close_time_str})，开房时间应早于或等于关房时间"
-                            ),
-                            error_type=ETLErrorType.LOGIC_ERROR,
-                            severity="error",
-                            raw_data={
-                                "open_time": open_time_str,
-                                "close_time": close_time_str,
-                            },
-                        )
-                    )
+        # 解析时间（忽略空值，NaT 参与比较恒为 False）
+        open_time = self._parse_time_column(df, "open_time")
+        close_time = self._parse_time_column(df, "close_time")
+
+        # 规则1: open_time <= close_time
+        violation_mask = (open_time > close_time).to_numpy()
+        for idx in np.flatnonzero(violation_mask):
+            # 错误信息保留原始时间值（可能是 ISO 字符串）
+            open_time_str = df["open_time"].iat[idx]
+            close_time_str = df["close_time"].iat[idx]
+            errors.append(
+                RowError(
+                    row_index=int(idx),
+                    column="close_time",
+                    message=(
+                        f"时间逻辑错误: 开房时间({open_time_str}) > "
+                        f"关房时间({close_time_str})，开房时间应早于或等于关房时间"
+                    ),
+                    error_type=ETLErrorType.LOGIC_ERROR,
+                    severity="error",
+                    raw_data={
+                        "open_time": open_time_str,
+                        "close_time": close_time_str,
+                    },
+                )
+            )
 
-            # 规则2: close_time <= clean_time
+        # 规则2: close_time <= clean_time
         return errors
 
     def _parse_time_safely(self, time_value: Any) -> Optional[datetime]:
@@ -1946,6 +2221,81 @@ class CleanerService:
 
         return None
 
+    @staticmethod
+    def _column_to_values(series: pd.Series, column: str) -> np.ndarray:
+        """
+        将单列转换为输出值数组（object 数组，元素为 Python 原生类型）
+
+        规则：
+        - extra_info 必须是字典，否则替换为 {}
+        - NaN/None/NaT 转为 None
+        - float64（含 object 列中的 float）保留 2 位小数（与 round() 一致）
+
+        Args:
+            series: 列数据
+            column: 列名
+
+        Returns:
+            np.ndarray: object 数组
+        """
+        if column == "extra_info":
+            return np.array(
+                [value if isinstance(value, dict) else {} for value in series],
+                dtype=object,
+            )
+
+        if series.dtype == np.float64:
+            raw = series.to_numpy()
+            na_mask = np.isnan(raw)
+            values = _round_float_array(np.where(na_mask, 0.0, raw)).astype(object)
+            values[na_mask] = None
+            return values
+
+        values = series.to_numpy(dtype=object).copy()
+        na_mask = pd.isna(values)
+
+        # object 列中可能混有浮点数，仅对这些单元格取整
+        # （float32 等非 float64 数值列的元素不是 float 实例，原样输出）
+        float_mask = np.fromiter(
+            (isinstance(value, float) for value in values),
+            dtype=bool,
+            count=len(values),
+        ) & ~na_mask
+        if not pd.api.types.is_float_dtype(series.dtype) and float_mask.any():
+            values[float_mask] = _round_float_array(
+                values[float_mask].astype(np.float64)
+            ).astype(object)
+
+        # numpy 标量统一转为 Python 原生类型（与 to_dict("records") 保持一致）
+        generic_mask = np.fromiter(
+            (isinstance(value, np.generic) for value in values),
+            dtype=bool,
+            count=len(values),
+        ) & ~na_mask
+        if generic_mask.any():
+            values[generic_mask] = [value.item() for value in values[generic_mask]]
+
+        values[na_mask] = None
+        return values
+
+    def _dataframe_to_columns(self, df: pd.DataFrame) -> Dict[str, List[Any]]:
+        """
+        将 DataFrame 转换为列式结构 {列名: 值列表}
+
+        与 _dataframe_to_records 的取值规则完全一致，但不为每一行构建字典，
+        适合批量写库等按列消费的场景。
+
+        Args:
+            df: 输入 DataFrame
+
+        Returns:
+            Dict[str, List[Any]]: 列名 -> 值列表
+        """
+        return {
+            column: self._column_to_values(df.iloc[:, position], column).tolist()
+            for position, column in enumerate(df.columns)
+        }
+
     def _dataframe_to_records(self, df: pd.DataFrame) -> List[Dict]:
         """
         将 DataFrame 转换为 List[Dict]
@@ -1953,6 +2303,9 @@ class CleanerService:
         确保：
         - NaN 转为 None 或 0
         - extra_info 保持为 Dict
+        - 浮点数保留 2 位小数
+
+        实现：按列完成取整与空值掩码，再按行 zip 组装字典。
 
         Args:
             df: 输入 DataFrame
@@ -1960,30 +2313,16 @@ class CleanerService:
         Returns:
             List[Dict]: 记录列表
         """
-        records = []
-
-        for idx in range(len(df)):
-            row = df.iloc[idx]
-            record = {}
-
-            for col in df.columns:
-                value = row[col]
-
-                if col == "extra_info":
-                    # extra_info 必须是字典
-                    record[col] = value if isinstance(value, dict) else {}
-                elif pd.isna(value):
-                    # NaN 处理
-                    record[col] = None
-                elif isinstance(value, float):
-                    # 浮点数保留2位小数
-                    record[col] = round(value, 2)
-                else:
-                    record[col] = value
+        columns = list(df.columns)
+        if not columns:
+            return [{} for _ in range(len(df))]
 
-            records.append(record)
+        column_values = [
+            self._column_to_values(df.iloc[:, position], column)
+            for position, column in enumerate(columns)
+        ]
 
-        return records
+        return [dict(zip(columns, row)) for row in zip(*column_values)]
 
 
 # ============================================================================
@@ -2017,6 +2356,132 @@ def clean_and_validate(
     )
 
 
+# ============================================================================
+# 分块校验结果合并
+# ============================================================================
+
+
+class ValidationAccumulator:
+    """
+    合并分块清洗的校验结果（流式上传使用）
+
+    clean_data 对每个分块单独返回 ValidationResult，合并规则：
+    - 行级错误的 row_index 相对于分块，加上分块起始行号
+    - 文件级错误/警告（row_index = -1，如营业日缺失）每块都会重复出现，按 (列, 信息) 去重
+    - meta 中的门店名称与支付方式按全文件重新汇总，规则与 clean_data 一致
+
+    行级错误只保留前 max_row_errors 条（error_count 仍为全量计数），
+    避免大文件错误过多时内存随文件大小增长。
+    """
+
+    def __init__(self, report_type: str, filename: str = "", max_row_errors: int = 1000):
+        self.report_type = report_type
+        self.max_row_errors = max_row_errors
+        self.total_rows = 0
+        self.error_count = 0
+        self.is_valid = True
+        self.errors: List[RowError] = []
+        # 原始 biz_store_name，按首次出现顺序（入库时按此顺序创建批次）
+        self.store_names: List[str] = []
+        self._store_name_set: Set[str] = set()
+        self._extracted_store_names: Set[str] = set()
+        self._has_store_column = False
+        self._filename_store_name = CleanerService()._extract_store_from_filename(filename)
+        self._row_error_total = 0
+        self._file_level_keys: Set[Tuple[str, str, str]] = set()
+        self._warning_count = 0
+        self._payment_methods: Dict[str, Dict[str, Any]] = {}
+        self._summary: Dict[str, Any] = {}
+
+    def add(self, validation: ValidationResult, records: List[Dict], row_offset: int) -> None:
+        """合并一个分块的校验结果，records 为该分块清洗后的数据"""
+        self.total_rows += validation.total_rows
+        self.is_valid = self.is_valid and validation.is_valid
+
+        duplicate_errors = 0
+        for error in validation.errors:
+            if error.row_index >= 0:
+                self._row_error_total += 1
+                if self._row_error_total <= self.max_row_errors:
+                    self.errors.append(
+                        error.model_copy(update={"row_index": error.row_index + row_offset})
+                    )
+                continue
+            key = (error.column, error.message, error.severity)
+            if key in self._file_level_keys:
+                if error.severity != "warning":
+                    duplicate_errors += 1
+                continue
+            self._file_level_keys.add(key)
+            self.errors.append(error)
+            if error.severity == "warning":
+                self._warning_count += 1
+        self.error_count += validation.error_count - duplicate_errors
+
+        summary = validation.summary or {}
+        self._summary = {k: v for k, v in summary.items() if k != "meta"}
+        for meta in summary.get("meta", {}).get("payment_methods") or []:
+            self._payment_methods.setdefault(meta["code"], meta)
+
+        if self.report_type == "member_change" and records and "biz_store_name" in records[0]:
+            self._has_store_column = True
+            for row in records:
+                value = row.get("biz_store_name")
+                if not isinstance(value, str) or not value.strip():
+                    continue
+                raw_name = value.strip()
+                if raw_name in self._store_name_set:
+                    continue
+                self._store_name_set.add(raw_name)
+                self.store_names.append(raw_name)
+                extracted = CleanerService._extract_store_name_from_brackets(raw_name)
+                if extracted:
+                    self._extracted_store_names.add(extracted)
+
+    def result(self) -> ValidationResult:
+        """生成整文件的校验结果"""
+        summary = dict(self._summary)
+        summary.update(
+            {
+                "report_type": self.report_type,
+                "total_rows": self.total_rows,
+                "error_count": self.error_count,
+            }
+        )
+        if self._warning_count:
+            summary["fuzzy_match_warnings"] = self._warning_count
+        if self._row_error_total > self.max_row_errors:
+            summary["row_errors_truncated"] = self._row_error_total - self.max_row_errors
+
+        meta: Dict[str, Any] = {}
+        store_names = sorted(self._extracted_store_names)
+        if self._has_store_column and len(store_names) > 1:
+            meta["store_name"] = f"多门店 ({len(store_names)}个)"
+            meta["store_names"] = store_names
+        elif self._has_store_column and len(store_names) == 1:
+            meta["store_name"] = store_names[0]
+        else:
+            meta["store_name"] = self._filename_store_name
+        if self._payment_methods:
+            meta["payment_methods"] = sorted(
+                self._payment_methods.values(),
+                key=lambda item: (
+                    not item["is_core"],
+                    item.get("sort_order", 999),
+                    item["code"],
+                ),
+            )
+        summary["meta"] = meta
+
+        return ValidationResult(
+            is_valid=self.is_valid,
+            total_rows=self.total_rows,
+            error_count=self.error_count,
+            errors=list(self.errors),
+            summary=summary,
+        )
+
+
 def _demo_payment_meta_extraction() -> None:
     """
     最小验证脚本：python backend/app/services/cleaner.py
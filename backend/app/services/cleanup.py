@@ -18,6 +18,8 @@ except ImportError:
     IntervalTrigger = None
 
 from app.config import get_settings
+from app.services.jobs import purge_expired_jobs
+from app.services.session_store import get_parse_session_store
 
 settings = get_settings()
 scheduler: Optional[AsyncIOScheduler] = None
@@ -80,6 +82,16 @@ def cleanup_old_files(days: int = 7) -> dict:
         }
 
 
+async def purge_expired_sessions():
+    """清理过期的解析会话文件和后台任务状态文件"""
+    expired_sessions = get_parse_session_store().purge_expired()
+    if expired_sessions:
+        print(f"🧹 清理过期解析会话: {expired_sessions} 个")
+    expired_jobs = purge_expired_jobs()
+    if expired_jobs:
+        print(f"🧹 清理过期后台任务: {expired_jobs} 个")
+
+
 async def scheduled_cleanup():
     """定时清理任务"""
     result = cleanup_old_files(days=7)
@@ -106,6 +118,15 @@ def start_scheduler():
     try:
         scheduler = AsyncIOScheduler()
         
+        # 每小时清理过期解析会话和后台任务状态
+        scheduler.add_job(
+            purge_expired_sessions,
+            trigger=IntervalTrigger(hours=1),
+            id="purge_parse_sessions",
+            name="清理过期解析会话",
+            replace_existing=True,
+        )
+
         # 每24小时执行清理任务
         scheduler.add_job(
             scheduled_cleanup,
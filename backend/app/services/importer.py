@@ -4,18 +4,27 @@
 基础骨架：批次创建、数据入库、维度处理
 """
 
+import logging
+import time
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Dict, Any, Optional, Set, Tuple
+from typing import Callable, List, Dict, Any, Iterable, Optional, Set, Tuple
 
-from sqlalchemy import delete
+from sqlalchemy import delete, insert, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.models.meta import MetaFileBatch
 from app.models.facts import FactBooking, FactRoom, FactSales, FactMemberChange
 from app.models.dims import DimEmployee, DimProduct, DimRoom, DimStore, DimPaymentMethod
+from app.services.payment_lines import PaymentLineService
+from app.services.rollup import RollupService
+from app.services.stats_cache import bump_data_versions
+
+
+logger = logging.getLogger(__name__)
 
 
 class DuplicateFileError(Exception):
@@ -49,10 +58,46 @@ class ImporterService:
         "member_change": FactMemberChange,
     }
 
-    def __init__(self, db: Session):
+    # 维度批量查找时单条 IN 查询的最大参数个数
+    DIMENSION_LOOKUP_CHUNK_SIZE = 1000
+
+    def __init__(
+        self,
+        db: Session,
+        insert_chunk_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[str, int], None]] = None,
+        job_id: Optional[str] = None,
+    ):
         self.db = db
+        # 异步导入任务ID，写入本次创建的所有批次，任务状态过期后可按批次查询结果
+        self.job_id = job_id
         # 缓存模型列集合，避免重复解析
         self._model_columns_cache: Dict[type, Set[str]] = {}
+        self.insert_chunk_size = max(
+            1, insert_chunk_size or get_settings().IMPORT_INSERT_CHUNK_SIZE
+        )
+        # 最近一次 save_batch 的写入统计：rows / seconds / rows_per_sec
+        self.last_insert_stats: Dict[str, float] = {}
+        # 进度回调 (stage, percent)，供异步导入任务轮询使用
+        self.progress_callback = progress_callback
+        # 当前批次在整体进度中所占区间（多门店上传时每个门店占一段）
+        self._progress_span: Tuple[float, float] = (0.0, 100.0)
+
+    def _report_progress(self, stage: str, percent: float) -> None:
+        """
+        上报当前批次进度
+
+        把映射到整体区间后的百分比通知 progress_callback（由异步任务写入共享的任务状态）。
+        数据写入在单个事务中提交，中间进度对其他连接不可见，因此不写数据库。
+        """
+        percent = min(max(percent, 0.0), 100.0)
+        if self.progress_callback:
+            low, high = self._progress_span
+            overall = low + (high - low) * percent / 100.0
+            try:
+                self.progress_callback(stage, int(overall))
+            except Exception:
+                logger.exception("进度回调失败")
 
     def generate_batch_no(self, store_id: int, table_type: str) -> str:
         """生成批次号: YYYYMMDDHHMMSS_StoreID_Type"""
@@ -69,6 +114,7 @@ class ImporterService:
             store_id=store_id,
             table_type=table_type,
             status="pending",
+            job_id=self.job_id,
         )
         self.db.add(batch)
         self.db.flush()  # 获取 ID，但不提交
@@ -103,20 +149,28 @@ class ImporterService:
 
         model = self.TABLE_MODEL_MAP[table_type]
 
+        rollup = RollupService(self.db)
+        payment_lines = PaymentLineService(self.db)
         try:
-            # 如果需要覆盖，先删除旧数据
+            # 如果需要覆盖，先删除旧数据（旧数据覆盖的日期也要重算汇总）
+            affected_keys = set()
             if overwrite:
+                affected_keys = rollup.keys_for_batch(table_type, batch_id)
                 self.db.execute(delete(model).where(model.batch_id == batch_id))
+                payment_lines.delete_where(table_type, batch_id=batch_id)
 
-            # 批量插入新数据
+            # 批量插入新数据（Core executemany，绕过 ORM 对象构建与状态跟踪）
             model_columns = self._get_model_columns(model)
-            records = []
-            for row in cleaned_data:
-                prepared_row = self._prepare_record(model_columns, batch_id, row)
-                records.append(model(**prepared_row))
+            records = [
+                self._prepare_record(model_columns, batch_id, row)
+                for row in cleaned_data
+            ]
+            self._insert_records(model, records)
+            payment_lines.write_for_batch(table_type, batch_id)
 
-            if records:
-                self.db.bulk_save_objects(records)
+            # 同一事务内刷新 门店×日期 汇总表
+            affected_keys |= rollup.collect_keys(records)
+            rollup.refresh(table_type, affected_keys)
 
             # 更新批次状态
             batch = (
@@ -130,6 +184,12 @@ class ImporterService:
                 if file_hash:
                     batch.file_hash = file_hash
 
+            # 递增数据版本，使统计缓存失效
+            affected_stores = {store_id for store_id, _ in affected_keys}
+            if batch:
+                affected_stores.add(batch.store_id)
+            bump_data_versions(self.db, table_type, affected_stores)
+
             # 提交事务
             self.db.commit()
 
@@ -149,6 +209,47 @@ class ImporterService:
             self._mark_batch_failed(batch_id, e)
             raise
 
+    def _insert_records(
+        self, model, records: List[Dict[str, Any]], report_progress: bool = True
+    ) -> None:
+        """
+        按 insert_chunk_size 分批执行 INSERT ... VALUES
+
+        executemany 要求同一批参数字段一致，因此先按字段集合分组（与 bulk_save_objects
+        的分组方式相同），缺失字段仍由列默认值填充。写入速率记录在 last_insert_stats。
+        流式入库按块调用，进度由调用方按全文件行数上报（report_progress=False）。
+        """
+        started = time.perf_counter()
+
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for record in records:
+            groups.setdefault(tuple(sorted(record)), []).append(record)
+
+        statement = insert(model.__table__)
+        chunk_size = self.insert_chunk_size
+        inserted = 0
+        for group in groups.values():
+            for start in range(0, len(group), chunk_size):
+                chunk = group[start:start + chunk_size]
+                self.db.execute(statement, chunk)
+                inserted += len(chunk)
+                if report_progress:
+                    self._report_progress("insert", 60 + 35 * inserted / len(records))
+
+        elapsed = time.perf_counter() - started
+        self.last_insert_stats = {
+            "rows": len(records),
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(len(records) / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        logger.info(
+            "写入 %s: %d 行, 耗时 %.3fs, %.1f 行/秒",
+            model.__tablename__,
+            len(records),
+            elapsed,
+            self.last_insert_stats["rows_per_sec"],
+        )
+
     def _get_model_columns(self, model) -> Set[str]:
         """获取并缓存模型列名集合"""
         if model not in self._model_columns_cache:
@@ -273,7 +374,18 @@ class ImporterService:
 
             model = self.TABLE_MODEL_MAP.get(batch.table_type)
             if model:
+                rollup = RollupService(self.db)
+                affected_keys = rollup.keys_for_batch(batch.table_type, batch_id)
                 self.db.execute(delete(model).where(model.batch_id == batch_id))
+                PaymentLineService(self.db).delete_where(
+                    batch.table_type, batch_id=batch_id
+                )
+                rollup.refresh(batch.table_type, affected_keys)
+                bump_data_versions(
+                    self.db,
+                    batch.table_type,
+                    {store_id for store_id, _ in affected_keys} | {batch.store_id},
+                )
 
             self.db.delete(batch)
             self.db.commit()
@@ -301,6 +413,135 @@ class ImporterService:
         self.db.flush()
         return new_record.id
 
+    def resolve_dimension_ids(
+        self,
+        model_class,
+        store_id: int,
+        keys: Iterable[Dict[str, Any]],
+    ) -> Dict[Tuple, int]:
+        """
+        批量获取或创建维度记录
+
+        与 get_or_create_dimension 的匹配语义一致（按 store_id + 给定字段做等值匹配），
+        但对整批数据只做：一次 IN 查询取已有记录 -> 一次批量插入缺失记录 -> 一次回查 ID。
+
+        Args:
+            model_class: 维度模型
+            store_id: 门店ID
+            keys: 每行的维度字段字典（与 get_or_create_dimension 的 kwargs 相同）
+
+        Returns:
+            Dict[Tuple, int]: 以 _dimension_lookup_key(kwargs) 为键的维度ID映射
+        """
+        pending: Dict[Tuple, Dict[str, Any]] = {}
+        for kwargs in keys:
+            fields = {k: v for k, v in kwargs.items() if hasattr(model_class, k)}
+            pending.setdefault(self._dimension_lookup_key(fields), fields)
+
+        if not pending:
+            return {}
+
+        resolved = self._match_existing_dimensions(model_class, store_id, pending)
+
+        # 逐行语义下，先插入的记录会被后续字段更少的键命中；这里同样只插入真正缺失的组合
+        field_sets = {tuple(fields.keys()) for fields in pending.values()}
+        planned: Set[Tuple] = set()
+        missing: List[Dict[str, Any]] = []
+        for key, fields in pending.items():
+            if key in resolved or key in planned:
+                continue
+            missing.append(fields)
+            for names in field_sets:
+                if set(names) <= fields.keys():
+                    planned.add(
+                        self._dimension_lookup_key({name: fields[name] for name in names})
+                    )
+
+        if missing:
+            self.db.execute(
+                insert(model_class),
+                [{"store_id": store_id, **fields} for fields in missing],
+            )
+            remaining = {
+                key: fields for key, fields in pending.items() if key not in resolved
+            }
+            resolved.update(
+                self._match_existing_dimensions(model_class, store_id, remaining)
+            )
+
+        unresolved = [key for key in pending if key not in resolved]
+        if unresolved:
+            raise ValueError(
+                f"{model_class.__tablename__} 维度写入后仍无法匹配: {unresolved[:5]}"
+            )
+
+        return resolved
+
+    def _match_existing_dimensions(
+        self,
+        model_class,
+        store_id: int,
+        pending: Dict[Tuple, Dict[str, Any]],
+    ) -> Dict[Tuple, int]:
+        """按 IN 查询拉取候选维度记录，并在内存中完成多字段匹配"""
+        field_sets: Dict[Tuple[str, ...], Set[Tuple]] = {}
+        for key, fields in pending.items():
+            field_sets.setdefault(tuple(fields.keys()), set()).add(key)
+
+        # 所有键都带有的字段用于缩小候选范围；缺失时退化为整店查询（与逐行查询语义一致）
+        common_fields = set.intersection(*(set(names) for names in field_sets))
+        lookup_field = next(
+            (name for name in ("name", "room_no") if name in common_fields), None
+        )
+
+        columns = sorted({name for names in field_sets for name in names})
+        base_query = (
+            select(model_class.id, *(getattr(model_class, name) for name in columns))
+            .where(model_class.store_id == store_id)
+            .order_by(model_class.id)
+        )
+
+        candidates = []
+        if lookup_field is None:
+            candidates.extend(self.db.execute(base_query).all())
+        else:
+            lookup_values = list(
+                {fields[lookup_field] for fields in pending.values()}
+            )
+            column = getattr(model_class, lookup_field)
+            for start in range(0, len(lookup_values), self.DIMENSION_LOOKUP_CHUNK_SIZE):
+                chunk = lookup_values[start:start + self.DIMENSION_LOOKUP_CHUNK_SIZE]
+                non_null = [value for value in chunk if value is not None]
+                condition = column.in_(non_null)
+                if len(non_null) != len(chunk):
+                    condition = condition | column.is_(None)
+                candidates.extend(self.db.execute(base_query.where(condition)).all())
+            candidates.sort(key=lambda record: record.id)
+
+        resolved: Dict[Tuple, int] = {}
+        for names, wanted in field_sets.items():
+            for record in candidates:
+                key = self._dimension_lookup_key(
+                    {name: getattr(record, name) for name in names}
+                )
+                if key in wanted and key not in resolved:
+                    resolved[key] = record.id
+
+        return resolved
+
+    @staticmethod
+    def _dimension_lookup_key(fields: Dict[str, Any]) -> Tuple:
+        """
+        构造维度匹配键
+
+        字符串按 MySQL 默认排序规则（大小写不敏感、忽略尾部空格）归一，
+        保证内存匹配结果与数据库等值查询一致。
+        """
+        return tuple(
+            (name, value.rstrip().casefold() if isinstance(value, str) else value)
+            for name, value in fields.items()
+        )
+
     @staticmethod
     def _extract_store_name_from_brackets(store_name: str) -> str:
         """
@@ -400,6 +641,49 @@ class ImporterService:
             return new_store.id, new_store
         return new_store.id
 
+    def _resolve_store_ids(self, session: Session, store_names: Iterable[str]) -> Dict[str, int]:
+        """
+        批量将门店名称解析为 store_id
+
+        先用一次 IN 查询匹配已有门店，仅对不存在的门店逐个走 _get_or_create_store 创建。
+
+        Args:
+            session: 数据库会话
+            store_names: 原始门店名称（如 biz_store_name）
+
+        Returns:
+            Dict[str, int]: 原始门店名称 -> store_id
+        """
+        extracted: Dict[str, str] = {}
+        for store_name in store_names:
+            if store_name in extracted or not store_name:
+                continue
+            normalized_name = self._extract_store_name_from_brackets(store_name).strip()
+            if not normalized_name:
+                raise ValueError("store_name 不能为空白字符串")
+            extracted[store_name] = normalized_name
+
+        if not extracted:
+            return {}
+
+        existing = dict(
+            session.execute(
+                select(DimStore.store_name, DimStore.id).where(
+                    DimStore.store_name.in_(set(extracted.values()))
+                )
+            ).all()
+        )
+
+        store_ids: Dict[str, int] = {}
+        for store_name, normalized_name in extracted.items():
+            store_id = existing.get(normalized_name)
+            if store_id is None:
+                store_id = self._get_or_create_store(session, store_name)
+                existing[normalized_name] = store_id
+            store_ids[store_name] = store_id
+
+        return store_ids
+
     def _sync_payment_methods(
         self,
         session: Session,
@@ -503,26 +787,8 @@ class ImporterService:
         sales_total = 0.0
         actual_total = 0.0
         try:
-            resolved_store_id = store_id
-            
-            # 如果指定了 store_id，先校验是否存在
-            if resolved_store_id is not None:
-                existing_store = self.db.query(DimStore).filter(DimStore.id == resolved_store_id).first()
-                if not existing_store:
-                    # 如果不存在，但提供了 store_name，尝试通过名字查找或创建
-                    if store_name:
-                        # 此时忽略传入的无效 store_id，改为根据名字处理
-                        resolved_store_id = self._get_or_create_store(self.db, store_name)
-                    else:
-                        raise ValueError(f"指定的 store_id {resolved_store_id} 不存在，且未提供 store_name")
-            
-            # 如果没指定 store_id，通过 store_name 获取或创建
-            elif store_name:
-                resolved_store_id = self._get_or_create_store(self.db, store_name)
-            
-            if resolved_store_id is None:
-                raise ValueError("store_id 或 store_name 必须提供其一")
-            
+            resolved_store_id = self._resolve_upload_store_id(store_id, store_name)
+
             # 0. 确保支付方式维度已初始化
             self._ensure_payment_methods()
             if payment_methods:
@@ -536,6 +802,7 @@ class ImporterService:
             # 1. 创建批次并标记处理中
             batch = self.create_batch(file_name, resolved_store_id, table_type)
             batch.status = "processing"
+            self._report_progress("processing", 10)
             self.db.commit()
 
             # 1.1 如指定 biz_date，先写入每一行
@@ -551,11 +818,16 @@ class ImporterService:
                         model.store_id == resolved_store_id, model.biz_date == biz_date
                     )
                 )
+                PaymentLineService(self.db).delete_where(
+                    table_type, store_id=resolved_store_id, biz_date=biz_date
+                )
 
             # 3. 处理维度，填充外键 ID
+            self._report_progress("dimensions", 20)
             processed_data = self._process_dimensions(
                 table_type, resolved_store_id, cleaned_data
             )
+            self._report_progress("insert", 60)
 
             sales_total, actual_total = self._calculate_totals(processed_data)
 
@@ -567,6 +839,7 @@ class ImporterService:
                 overwrite=False,
                 file_hash=file_hash,
             )
+            self._report_progress("done", 100)
 
             return {
                 "batch_id": batch.id,
@@ -591,12 +864,264 @@ class ImporterService:
                 "error": str(e),
             }
 
+    def _resolve_upload_store_id(
+        self, store_id: Optional[int], store_name: Optional[str]
+    ) -> int:
+        """
+        确定单门店上传的 store_id
+
+        指定的 store_id 不存在时改用 store_name 获取或创建门店。
+        """
+        resolved_store_id = store_id
+
+        # 如果指定了 store_id，先校验是否存在
+        if resolved_store_id is not None:
+            existing_store = self.db.query(DimStore).filter(DimStore.id == resolved_store_id).first()
+            if not existing_store:
+                # 如果不存在，但提供了 store_name，尝试通过名字查找或创建
+                if store_name:
+                    # 此时忽略传入的无效 store_id，改为根据名字处理
+                    resolved_store_id = self._get_or_create_store(self.db, store_name)
+                else:
+                    raise ValueError(f"指定的 store_id {resolved_store_id} 不存在，且未提供 store_name")
+
+        # 如果没指定 store_id，通过 store_name 获取或创建
+        elif store_name:
+            resolved_store_id = self._get_or_create_store(self.db, store_name)
+
+        if resolved_store_id is None:
+            raise ValueError("store_id 或 store_name 必须提供其一")
+        return resolved_store_id
+
+    def process_upload_stream(
+        self,
+        file_name: str,
+        store_id: Optional[int],
+        table_type: str,
+        chunks: Iterable[List[Dict[str, Any]]],
+        total_rows: Optional[int] = None,
+        biz_date: Optional[str] = None,
+        store_name: Optional[str] = None,
+        store_names: Optional[List[str]] = None,
+        payment_methods: Optional[List[Dict[str, Any]]] = None,
+        file_hash: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        流式入库：逐块写入清洗结果（大 CSV / xlsx 上传使用）
+
+        与 process_upload 的区别：
+        - chunks 逐块产出清洗后的数据，内存中只保留当前块；
+        - 会员变动表的门店由解析阶段汇总（store_names，按首次出现顺序），
+          入库前一次性解析，多门店时按该顺序为每个门店预建批次，
+          没有门店信息的行归入第一个门店；
+        - 所有批次在同一事务中写入，任一块失败整体回滚并标记全部批次失败，
+          不会出现多门店部分成功（partial）的结果。
+
+        返回值结构与 process_upload 相同。
+        """
+        if table_type not in self.TABLE_MODEL_MAP:
+            raise ValueError(f"不支持的表类型: {table_type}")
+
+        batches: Dict[int, MetaFileBatch] = {}
+        totals: Dict[int, List[float]] = {}
+        try:
+            # 1. 解析门店（可能提交事务，必须在写入数据之前完成）
+            member_store_ids: Dict[str, int] = {}
+            if table_type == "member_change" and store_names:
+                member_store_ids = self._resolve_store_ids(self.db, store_names)
+            batch_store_ids = list(dict.fromkeys(member_store_ids.values()))
+            multi_store = len(batch_store_ids) > 1
+            if not multi_store:
+                batch_store_ids = [self._resolve_upload_store_id(store_id, store_name)]
+
+            self._ensure_payment_methods()
+            if payment_methods:
+                self._sync_payment_methods(self.db, payment_methods)
+
+            if file_hash:
+                duplicate_batch = self._find_success_batch_by_hash(file_hash)
+                if duplicate_batch:
+                    raise DuplicateFileError(duplicate_batch)
+
+            # 2. 预建批次并标记处理中
+            for batch_store_id in batch_store_ids:
+                batch = self.create_batch(file_name, batch_store_id, table_type)
+                batch.status = "processing"
+                batches[batch_store_id] = batch
+                totals[batch.id] = [0, 0.0, 0.0]
+            first_batch = batches[batch_store_ids[0]]
+            self._report_progress("processing", 10)
+            self.db.commit()
+
+            model = self.TABLE_MODEL_MAP[table_type]
+            payment_lines = PaymentLineService(self.db)
+            if biz_date:
+                for batch_store_id in batch_store_ids:
+                    self.db.execute(
+                        delete(model).where(
+                            model.store_id == batch_store_id, model.biz_date == biz_date
+                        )
+                    )
+                    payment_lines.delete_where(
+                        table_type, store_id=batch_store_id, biz_date=biz_date
+                    )
+
+            # 3. 逐块处理维度并写入
+            model_columns = self._get_model_columns(model)
+            rollup = RollupService(self.db)
+            affected_keys = set()
+            processed_rows = 0
+            for chunk in chunks:
+                if biz_date:
+                    for row in chunk:
+                        row["biz_date"] = biz_date
+                processed = self._process_dimensions(
+                    table_type, batch_store_ids[0], chunk
+                )
+                records = []
+                for row in processed:
+                    batch = batches.get(row["store_id"], first_batch) if multi_store else first_batch
+                    records.append(self._prepare_record(model_columns, batch.id, row))
+                    batch_totals = totals[batch.id]
+                    batch_totals[0] += 1
+                    batch_totals[1] += self._to_float(row.get("sales_amount", 0))
+                    batch_totals[2] += self._to_float(row.get("actual_amount", 0))
+                self._insert_records(model, records, report_progress=False)
+                affected_keys |= rollup.collect_keys(records)
+
+                processed_rows += len(records)
+                if total_rows:
+                    self._report_progress("insert", 20 + 70 * processed_rows / total_rows)
+
+            # 4. 支付明细、汇总表、批次状态与数据版本，和数据在同一事务中提交
+            self._report_progress("rollup", 90)
+            for batch in batches.values():
+                payment_lines.write_for_batch(table_type, batch.id)
+            rollup.refresh(table_type, affected_keys)
+
+            for index, batch in enumerate(batches.values()):
+                batch.status = "success"
+                batch.row_count = int(totals[batch.id][0])
+                # 多门店时 file_hash 只写入第一个批次
+                if file_hash and index == 0:
+                    batch.file_hash = file_hash
+
+            affected_stores = {key_store_id for key_store_id, _ in affected_keys}
+            affected_stores.update(batches)
+            bump_data_versions(self.db, table_type, affected_stores)
+            self.db.commit()
+            self._report_progress("done", 100)
+
+        except DuplicateFileError:
+            raise
+
+        except IntegrityError as exc:
+            self.db.rollback()
+            for batch in batches.values():
+                self._mark_batch_failed(batch.id, exc)
+            if file_hash and self._is_file_hash_constraint(exc):
+                raise DuplicateFileError(self._find_success_batch_by_hash(file_hash))
+            return self._stream_failed_result(batches, exc)
+
+        except Exception as e:
+            self.db.rollback()
+            for batch in batches.values():
+                self._mark_batch_failed(batch.id, e)
+            return self._stream_failed_result(batches, e)
+
+        row_count = int(sum(item[0] for item in totals.values()))
+        sales_total = sum(item[1] for item in totals.values())
+        actual_total = sum(item[2] for item in totals.values())
+        result = {
+            "batch_id": first_batch.id,
+            "batch_no": first_batch.batch_no,
+            "row_count": row_count,
+            "sales_total": sales_total,
+            "actual_total": actual_total,
+            "status": "success",
+        }
+        if multi_store:
+            store_names_by_id = dict(
+                self.db.execute(
+                    select(DimStore.id, DimStore.store_name).where(
+                        DimStore.id.in_(list(batches))
+                    )
+                ).all()
+            )
+            result["multi_store"] = True
+            result["batch_results"] = [
+                {
+                    "batch_id": batch.id,
+                    "batch_no": batch.batch_no,
+                    "store_id": batch_store_id,
+                    "store_name": store_names_by_id.get(batch_store_id, f"门店{batch_store_id}"),
+                    "row_count": int(totals[batch.id][0]),
+                    "sales_total": totals[batch.id][1],
+                    "actual_total": totals[batch.id][2],
+                    "status": "success",
+                }
+                for batch_store_id, batch in batches.items()
+            ]
+        return result
+
+    @staticmethod
+    def _stream_failed_result(
+        batches: Dict[int, MetaFileBatch], error: Exception
+    ) -> Dict[str, Any]:
+        first_batch = next(iter(batches.values()), None)
+        return {
+            "batch_id": first_batch.id if first_batch else None,
+            "batch_no": first_batch.batch_no if first_batch else None,
+            "row_count": 0,
+            "sales_total": 0.0,
+            "actual_total": 0.0,
+            "status": "failed",
+            "error": str(error),
+        }
+
     def _process_dimensions(
         self, table_type: str, store_id: int, data: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
         """
         处理维度数据，获取或创建维度ID
+
+        先收集整批数据的维度键并批量解析（见 resolve_dimension_ids），再逐行回填外键。
         """
+        # 1. 批量解析维度
+        employee_ids: Dict[Tuple, int] = {}
+        room_ids: Dict[Tuple, int] = {}
+        product_ids: Dict[Tuple, int] = {}
+        member_store_ids: Dict[str, int] = {}
+
+        if table_type == "booking":
+            employee_ids = self.resolve_dimension_ids(
+                DimEmployee,
+                store_id,
+                (self._employee_kwargs(row) for row in data if "employee_name" in row),
+            )
+        elif table_type == "room":
+            room_ids = self.resolve_dimension_ids(
+                DimRoom,
+                store_id,
+                (self._room_kwargs(row) for row in data if "room_no" in row),
+            )
+        elif table_type == "sales":
+            product_ids = self.resolve_dimension_ids(
+                DimProduct,
+                store_id,
+                (self._product_kwargs(row) for row in data if "product_name" in row),
+            )
+        elif table_type == "member_change":
+            member_store_ids = self._resolve_store_ids(
+                self.db,
+                (
+                    row["biz_store_name"].strip()
+                    for row in data
+                    if isinstance(row.get("biz_store_name"), str)
+                ),
+            )
+
+        # 2. 回填外键
         processed: List[Dict[str, Any]] = []
 
         for row in data:
@@ -606,13 +1131,9 @@ class ImporterService:
             # booking: 员工维度
             if table_type == "booking" and "employee_name" in row:
                 employee_name = row.get("employee_name")
-                employee_id = self.get_or_create_dimension(
-                    DimEmployee,
-                    store_id,
-                    name=employee_name,
-                    department=row.get("department"),
-                )
-                row_copy["employee_id"] = employee_id
+                row_copy["employee_id"] = employee_ids[
+                    self._dimension_lookup_key(self._employee_kwargs(row))
+                ]
                 row_copy.pop("employee_name", None)
 
                 customer_name = row_copy.get("customer_name")
@@ -628,36 +1149,18 @@ class ImporterService:
 
             # room: 包厢维度
             if table_type == "room" and "room_no" in row:
-                room_kwargs = {
-                    "room_no": row.get("room_no"),
-                    "room_type": row.get("room_type"),
-                    "area_name": row.get("area_name"),
-                }
-                room_id = self.get_or_create_dimension(
-                    DimRoom,
-                    store_id,
-                    **{k: v for k, v in room_kwargs.items() if v is not None},
-                )
-                row_copy["room_id"] = room_id
+                row_copy["room_id"] = room_ids[
+                    self._dimension_lookup_key(self._room_kwargs(row))
+                ]
                 row_copy.pop("room_no", None)
                 row_copy.pop("room_type", None)
                 row_copy.pop("area_name", None)
 
             # sales: 商品维度
             if table_type == "sales" and "product_name" in row:
-                category_value = row.get("category_name")
-                if category_value is None:
-                    category_value = row.get("category")
-                product_kwargs = {
-                    "name": row.get("product_name"),
-                    "category": category_value,
-                }
-                product_id = self.get_or_create_dimension(
-                    DimProduct,
-                    store_id,
-                    **{k: v for k, v in product_kwargs.items() if v is not None},
-                )
-                row_copy["product_id"] = product_id
+                row_copy["product_id"] = product_ids[
+                    self._dimension_lookup_key(self._product_kwargs(row))
+                ]
                 # 兼容字段命名差异：category -> category_name
                 if "category_name" not in row_copy and "category" in row_copy:
                     row_copy["category_name"] = row_copy.pop("category")
@@ -669,9 +1172,8 @@ class ImporterService:
                 biz_store_name = row.get("biz_store_name")
                 if biz_store_name and isinstance(biz_store_name, str) and biz_store_name.strip():
                     # 从 biz_store_name 中提取括号内的门店名称（如"空境·派对KTV（万象城店）" -> "万象城店"）
-                    # 然后根据提取的名称获取或创建门店，并更新该行的 store_id
-                    row_store_id = self._get_or_create_store(self.db, biz_store_name.strip())
-                    row_copy["store_id"] = row_store_id
+                    # 对应门店已在上方批量获取或创建
+                    row_copy["store_id"] = member_store_ids[biz_store_name.strip()]
                 else:
                     # 如果没有 biz_store_name，使用默认的 store_id
                     row_copy["store_id"] = store_id
@@ -680,6 +1182,36 @@ class ImporterService:
 
         return processed
 
+    @staticmethod
+    def _employee_kwargs(row: Dict[str, Any]) -> Dict[str, Any]:
+        """booking 行对应的员工维度字段"""
+        return {
+            "name": row.get("employee_name"),
+            "department": row.get("department"),
+        }
+
+    @staticmethod
+    def _room_kwargs(row: Dict[str, Any]) -> Dict[str, Any]:
+        """room 行对应的包厢维度字段（忽略空值）"""
+        room_kwargs = {
+            "room_no": row.get("room_no"),
+            "room_type": row.get("room_type"),
+            "area_name": row.get("area_name"),
+        }
+        return {k: v for k, v in room_kwargs.items() if v is not None}
+
+    @staticmethod
+    def _product_kwargs(row: Dict[str, Any]) -> Dict[str, Any]:
+        """sales 行对应的商品维度字段（忽略空值）"""
+        category_value = row.get("category_name")
+        if category_value is None:
+            category_value = row.get("category")
+        product_kwargs = {
+            "name": row.get("product_name"),
+            "category": category_value,
+        }
+        return {k: v for k, v in product_kwargs.items() if v is not None}
+
     @staticmethod
     def _calculate_totals(data: List[Dict[str, Any]]) -> Tuple[float, float]:
         """
@@ -783,14 +1315,23 @@ class ImporterService:
         store_data_map: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
         rows_without_store = []
         
+        # 批量获取或创建门店，避免逐行查询
+        store_ids = self._resolve_store_ids(
+            self.db,
+            (
+                row["biz_store_name"].strip()
+                for row in cleaned_data
+                if isinstance(row.get("biz_store_name"), str)
+            ),
+        )
+
         for row in cleaned_data:
             biz_store_name = row.get("biz_store_name")
             if not biz_store_name or not isinstance(biz_store_name, str) or not biz_store_name.strip():
                 rows_without_store.append(row)
                 continue
             
-            # 获取或创建门店
-            store_id = self._get_or_create_store(self.db, biz_store_name.strip())
+            store_id = store_ids[biz_store_name.strip()]
             store_data_map[store_id].append(row)
         
         if not store_data_map:
@@ -807,7 +1348,12 @@ class ImporterService:
         total_sales_total = 0.0
         total_actual_total = 0.0
         
-        for store_id, store_data in store_data_map.items():
+        store_count = len(store_data_map)
+        for index, (store_id, store_data) in enumerate(store_data_map.items()):
+            self._progress_span = (
+                100.0 * index / store_count,
+                100.0 * (index + 1) / store_count,
+            )
             try:
                 # 获取门店信息
                 store = self.db.query(DimStore).filter(DimStore.id == store_id).first()
@@ -816,6 +1362,7 @@ class ImporterService:
                 # 创建批次
                 batch = self.create_batch(file_name, store_id, table_type)
                 batch.status = "processing"
+                self._report_progress("processing", 10)
                 self.db.commit()
                 
                 # 处理日期
@@ -831,11 +1378,16 @@ class ImporterService:
                             model.store_id == store_id, model.biz_date == biz_date
                         )
                     )
+                    PaymentLineService(self.db).delete_where(
+                        table_type, store_id=store_id, biz_date=biz_date
+                    )
                 
                 # 处理维度
+                self._report_progress("dimensions", 20)
                 processed_data = self._process_dimensions(
                     table_type, store_id, store_data
                 )
+                self._report_progress("insert", 60)
                 
                 # 计算总额
                 sales_total, actual_total = self._calculate_totals(processed_data)
@@ -849,6 +1401,7 @@ class ImporterService:
                     overwrite=False,
                     file_hash=use_file_hash,
                 )
+                self._report_progress("done", 100)
                 
                 batch_results.append({
                     "batch_id": batch.id,
@@ -879,6 +1432,8 @@ class ImporterService:
                     "error": str(e),
                 })
         
+        self._progress_span = (0.0, 100.0)
+
         # 3. 返回汇总结果
         return {
             "batch_id": batch_results[0]["batch_id"] if batch_results else None,
@@ -0,0 +1,301 @@
+"""
+异步导入任务队列
+
+/upload/parse、/upload/confirm 以异步模式调用时，只登记任务并立即返回 job_id，
+实际的 解析 -> 清洗 -> 入库 在后台线程池中执行，前端通过轮询接口获取阶段和进度。
+
+任务状态（阶段、进度、结果、错误）以 JSON 文件落盘到 UPLOAD_DIR/jobs：
+登记时即写入，每次阶段/进度变化和结束时原子覆盖，轮询落到任意 worker 进程都能读到。
+执行任务的进程同时在内存中保留一份，读取自己的任务不走磁盘。
+任务所在进程退出（重启、崩溃）后未结束的任务按失败返回。
+已结束的任务保留 UPLOAD_JOB_TTL 秒。
+"""
+
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import get_settings
+from app.services.pipeline import PipelineBusyError, PipelineTaskError
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_JOB_SUFFIX = ".job.json"
+_HOSTNAME = socket.gethostname()
+
+
+class ImportJob:
+    """单个后台任务的状态"""
+
+    def __init__(self, kind: str, job_id: Optional[str] = None):
+        self.job_id = job_id or str(uuid.uuid4())
+        self.kind = kind  # parse / import
+        self.status = "pending"  # pending / processing / success / failed
+        self.stage = "queued"
+        self.progress = 0
+        self.message = "任务排队中"
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.error_status: Optional[int] = None
+        self.created_at = datetime.now()
+        self.updated_at = self.created_at
+        self.finished_at: Optional[float] = None  # 结束时的 time.time()
+        self.owner_pid = os.getpid()
+        self.owner_host = _HOSTNAME
+
+    def update(self, stage: str, progress: int, message: Optional[str] = None) -> None:
+        """更新阶段和进度（进度只增不减），有变化时写入任务文件"""
+        progress = max(self.progress, min(int(progress), 100))
+        if (
+            self.status == "processing"
+            and stage == self.stage
+            and progress == self.progress
+            and (not message or message == self.message)
+        ):
+            return
+        self.status = "processing"
+        self.stage = stage
+        self.progress = progress
+        if message:
+            self.message = message
+        self.updated_at = datetime.now()
+        _save_job(self)
+
+    def owner_alive(self) -> bool:
+        """执行该任务的进程是否仍在运行（无法判断时视为运行中）"""
+        if self.owner_host != _HOSTNAME or self.owner_pid == os.getpid():
+            return True
+        if os.name == "nt":
+            # Windows 下 os.kill 会直接结束目标进程，不能用来探测
+            return True
+        try:
+            os.kill(self.owner_pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "error_status": self.error_status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        """任务文件内容"""
+        state = self.to_dict()
+        state.update(
+            created_at=self.created_at.isoformat(),
+            updated_at=self.updated_at.isoformat(),
+            finished_at=self.finished_at,
+            owner_pid=self.owner_pid,
+            owner_host=self.owner_host,
+        )
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "ImportJob":
+        job = cls(state["kind"], job_id=state["job_id"])
+        for key in ("status", "stage", "progress", "message", "result", "error", "error_status",
+                    "finished_at", "owner_pid", "owner_host"):
+            setattr(job, key, state.get(key))
+        job.created_at = datetime.fromisoformat(state["created_at"])
+        job.updated_at = datetime.fromisoformat(state["updated_at"])
+        return job
+
+
+_jobs: Dict[str, ImportJob] = {}
+_jobs_lock = threading.Lock()
+_job_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _jobs_dir() -> str:
+    # 放在子目录，避免被上传目录的过期文件清理删除
+    return os.path.join(settings.UPLOAD_DIR, "jobs")
+
+
+def _job_path(job_id: str) -> str:
+    # job_id 来自客户端，只取文件名部分防止路径穿越
+    return os.path.join(_jobs_dir(), f"{os.path.basename(job_id)}{_JOB_SUFFIX}")
+
+
+def _save_job(job: ImportJob) -> None:
+    """原子覆盖任务文件；写入失败只记录日志，不影响任务执行"""
+    directory = _jobs_dir()
+    tmp_path = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(job.to_state(), f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, _job_path(job.job_id))
+    except (OSError, TypeError, ValueError) as exc:
+        logger.warning("写入任务状态失败 %s: %s", job.job_id, exc)
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _load_job(job_id: str) -> Optional[ImportJob]:
+    try:
+        with open(_job_path(job_id), encoding="utf-8") as f:
+            return ImportJob.from_state(json.load(f))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        logger.warning("读取任务状态失败 %s: %s", job_id, exc)
+        return None
+
+
+def _get_job_pool() -> ThreadPoolExecutor:
+    global _job_pool
+    with _jobs_lock:
+        if _job_pool is None:
+            _job_pool = ThreadPoolExecutor(
+                max_workers=max(1, settings.UPLOAD_JOB_WORKERS),
+                thread_name_prefix="upload-job",
+            )
+        return _job_pool
+
+
+def _prune_finished_jobs() -> None:
+    """移除内存中已结束且超过保留时间的任务（调用方需持有 _jobs_lock）"""
+    cutoff = time.time() - settings.UPLOAD_JOB_TTL
+    expired = [
+        job_id
+        for job_id, job in _jobs.items()
+        if job.finished_at is not None and job.finished_at < cutoff
+    ]
+    for job_id in expired:
+        del _jobs[job_id]
+
+
+def purge_expired_jobs() -> int:
+    """删除已结束（或所在进程已退出）且超过保留时间的任务文件，返回删除数量"""
+    directory = _jobs_dir()
+    if not os.path.isdir(directory):
+        return 0
+
+    removed = 0
+    cutoff = time.time() - settings.UPLOAD_JOB_TTL
+    for name in os.listdir(directory):
+        if not name.endswith(_JOB_SUFFIX):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) >= cutoff:
+                continue
+        except OSError:
+            continue
+        job = _load_job(name[: -len(_JOB_SUFFIX)])
+        if job is not None and job.finished_at is None and job.owner_alive():
+            continue
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def _finish(job: ImportJob) -> None:
+    job.updated_at = datetime.now()
+    job.finished_at = time.time()
+    _save_job(job)
+
+
+def _run_job(job: ImportJob, func: Callable[[ImportJob], Dict[str, Any]]) -> None:
+    job.update("started", 0, "任务处理中")
+    try:
+        job.result = func(job)
+        job.status = "success"
+        job.stage = "done"
+        job.progress = 100
+        job.message = (job.result or {}).get("message") or "任务完成"
+    except PipelineTaskError as exc:
+        job.status = "failed"
+        job.stage = "failed"
+        job.error = str(exc)
+        job.error_status = exc.status_code
+        job.message = str(exc)
+    except Exception as exc:
+        logger.exception("后台任务 %s 执行失败", job.job_id)
+        job.status = "failed"
+        job.stage = "failed"
+        job.error = str(exc)
+        job.error_status = 500
+        job.message = f"任务执行失败: {exc}"
+    finally:
+        _finish(job)
+
+
+def submit_job(kind: str, func: Callable[[ImportJob], Dict[str, Any]]) -> ImportJob:
+    """
+    登记并提交后台任务
+
+    func 在任务线程中执行，接收 ImportJob 用于上报进度，返回值保存为 job.result
+    （需可 JSON 序列化）。任务文件在返回前写入，随后的轮询落到任何进程都能查到。
+    本进程未结束的任务数达到 UPLOAD_MAX_JOBS 时抛出 PipelineBusyError。
+    """
+    job = ImportJob(kind)
+    with _jobs_lock:
+        _prune_finished_jobs()
+        active = sum(1 for j in _jobs.values() if j.finished_at is None)
+        if active >= settings.UPLOAD_MAX_JOBS:
+            raise PipelineBusyError("后台导入任务过多，请稍后重试")
+        _jobs[job.job_id] = job
+
+    _save_job(job)
+    _get_job_pool().submit(_run_job, job, func)
+    return job
+
+
+def get_job(job_id: str) -> Optional[ImportJob]:
+    """
+    查询任务：本进程的任务直接返回内存状态，其他进程的任务读取任务文件
+
+    任务文件显示未结束、但所在进程已不存在时，按失败返回。
+    """
+    if not job_id:
+        return None
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is not None:
+        return job
+
+    job = _load_job(job_id)
+    if job is not None and job.finished_at is None and not job.owner_alive():
+        job.status = "failed"
+        job.stage = "failed"
+        job.error = job.message = "任务所在进程已退出，请重新提交"
+        job.error_status = 500
+    return job
+
+
+def shutdown_job_executor() -> None:
+    """应用关闭时停止接收新任务，已在执行的任务继续完成"""
+    global _job_pool
+    with _jobs_lock:
+        pool = _job_pool
+        _job_pool = None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,97 @@
+"""
+包厢占用时长按钟点摊分
+
+把开台区间 [开始, 结束) 摊到 0-23 各钟点，供小时汇总表维护（RollupService）
+和查询时直接计算（StatsService）共用，保证两条路径的口径一致：
+- 开始时间：开房时间，缺失则用关房时间
+- 结束时间：关房时间，缺失则用 开始时间 + duration_min（负数按 0）
+- 结束早于或等于开始的区间不计占用
+"""
+
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+HOUR_US = 3_600_000_000
+DAY_US = 24 * HOUR_US
+MINUTE_US = 60_000_000
+
+
+def session_bounds(
+    starts: Sequence[Any],
+    closes: Sequence[Any],
+    durations: Sequence[Any],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    由查询列构造区间数组
+
+    Args:
+        starts: COALESCE(open_time, close_time)
+        closes: close_time
+        durations: duration_min
+
+    Returns:
+        (开始, 结束, 有效区间掩码)，时间为 datetime64[us]
+    """
+    start_arr = np.array(starts, dtype="datetime64[us]")
+    close_arr = np.array(closes, dtype="datetime64[us]")
+    duration_arr = np.array(
+        [max(int(d or 0), 0) for d in durations], dtype="int64"
+    ).astype("timedelta64[m]")
+    end_arr = np.where(np.isnat(close_arr), start_arr + duration_arr, close_arr)
+    valid = ~np.isnat(start_arr) & (end_arr > start_arr)
+    return start_arr, end_arr, valid
+
+
+def clock_hours(points: np.ndarray) -> np.ndarray:
+    """datetime64 数组对应的钟点（0-23）"""
+    return (points.astype("int64") % DAY_US) // HOUR_US
+
+
+def spread_hourly_minutes(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    groups: Optional[np.ndarray] = None,
+    group_count: int = 1,
+) -> np.ndarray:
+    """
+    计算各分组的区间落在每个钟点内的分钟数之和
+
+    对钟点 h，记 F_h(t) 为从纪元起到 t 落在钟点 h 内的累计时长：
+    F_h(t) = 整天数 × 1h + clip(当日时刻 - h, 0, 1h)，
+    区间在钟点 h 的占用即 F_h(end) - F_h(start)，各区间一次性用 bincount 求和，
+    计算量与区间跨越的小时数无关。
+
+    Args:
+        starts / ends: datetime64[us] 数组（需已过滤无效区间）
+        groups: 每个区间所属分组下标（0..group_count-1），None 表示全部同组
+
+    Returns:
+        np.ndarray: 形状 (group_count, 24) 的占用分钟
+    """
+    if starts.size == 0:
+        return np.zeros((group_count, 24))
+    if groups is None:
+        groups = np.zeros(starts.size, dtype="int64")
+    size = group_count * 24
+
+    def clock_part(points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        ticks = points.astype("int64")
+        days, time_of_day = np.divmod(ticks, DAY_US)
+        hours, remainder = np.divmod(time_of_day, HOUR_US)
+        index = groups * 24 + hours
+        counts = np.bincount(index, minlength=size).reshape(group_count, 24)
+        partial = np.bincount(index, weights=remainder, minlength=size).reshape(
+            group_count, 24
+        )
+        # 当日时刻已越过钟点 h 的点数（钟点下标 > h）
+        passed = counts[:, ::-1].cumsum(axis=1)[:, ::-1] - counts
+        return days, passed * HOUR_US + partial
+
+    start_days, start_part = clock_part(starts)
+    end_days, end_part = clock_part(ends)
+    # 先逐区间求整天差再累加，避免大数相减的溢出与精度损失
+    full_days = np.bincount(groups, weights=end_days - start_days, minlength=group_count)
+    total_us = full_days[:, None] * HOUR_US + end_part - start_part
+    return total_us / MINUTE_US
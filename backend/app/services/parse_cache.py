@@ -0,0 +1,303 @@
+"""
+解析结果缓存（按文件内容寻址）
+
+店长经常在 409 或取消后重新上传同一份导出，LibreOffice 转换和 pandas 解析都要重做。
+这里以上传时计算的 SHA-256 为键，把两类中间结果落盘：
+- converted/{hash}.xlsx：损坏 xls 经 LibreOffice 转换后的 xlsx
+- frames/{hash}.{csv-<引擎>|excel}.pkl：read_excel_file 的结果（DataFrame + 标题行日期），
+  CSV 的键包含 CSV_PARSE_ENGINE（不同引擎推断的列类型可能不同），
+  pyarrow 可用时 DataFrame 以 Parquet 存放，否则（或该表无法转成 Parquet 时）直接 pickle
+
+目录按 PARSE_CACHE_VERSION 分版本，解析逻辑变化时递增版本即可整体失效。
+总大小超过 PARSE_CACHE_MAX_BYTES 时按最近使用时间（命中时更新 mtime）淘汰。
+
+解析在进程池中执行，各进程的命中计数写入 stats/{主机名}-{pid}.json，stats() 汇总全部进程。
+进程池会回收重建工作进程，已退出进程的计数文件在进程初始化和 stats() 时删除，
+因此统计只覆盖仍在运行的进程。
+"""
+
+import io
+import json
+import logging
+import os
+import pickle
+import socket
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from app.core.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+# 解析逻辑（parser.read_excel_file）输出变化时递增，旧版本缓存不再命中
+PARSE_CACHE_VERSION = 2
+
+_HOSTNAME = socket.gethostname()
+
+try:  # pyarrow 为可选依赖，且与 numpy 版本不匹配时导入会失败
+    import pyarrow  # noqa: F401
+
+    _HAS_PYARROW = True
+except Exception:  # pragma: no cover
+    _HAS_PYARROW = False
+
+
+class ParseCache:
+    """磁盘上的 转换结果 / 解析结果 缓存"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = os.path.join(directory, f"v{PARSE_CACHE_VERSION}")
+        self.max_bytes = max_bytes
+        self._stats_dir = os.path.join(directory, "stats")
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {
+            "frame_hits": 0,
+            "frame_misses": 0,
+            "converted_hits": 0,
+            "converted_misses": 0,
+            "evictions": 0,
+        }
+        self._prune_stats()
+
+    # ---------------- 路径 ----------------
+
+    def _frame_path(self, content_hash: str, filename: str, csv_engine: str) -> str:
+        # 解析结果只与内容、文件类型（csv / excel）及 CSV 解析引擎有关
+        if filename.lower().endswith(".csv"):
+            kind = f"csv-{os.path.basename(csv_engine)}"
+        else:
+            kind = "excel"
+        return os.path.join(
+            self.directory, "frames", f"{os.path.basename(content_hash)}.{kind}.pkl"
+        )
+
+    def _converted_path(self, content_hash: str) -> str:
+        return os.path.join(
+            self.directory, "converted", f"{os.path.basename(content_hash)}.xlsx"
+        )
+
+    # ---------------- 解析结果 ----------------
+
+    def get_frame(
+        self, content_hash: str, filename: str, csv_engine: str = "c"
+    ) -> Optional[Tuple[pd.DataFrame, Optional[str]]]:
+        """命中时返回 (DataFrame, 标题行日期)，未命中返回 None"""
+        path = self._frame_path(content_hash, filename, csv_engine)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+            if entry["format"] == "parquet":
+                df = pd.read_parquet(io.BytesIO(entry["data"]))
+            else:
+                df = entry["data"]
+        except FileNotFoundError:
+            self._count("frame_misses")
+            return None
+        except Exception as exc:
+            logger.warning("解析缓存读取失败 %s: %s", path, exc)
+            self._remove(path)
+            self._count("frame_misses")
+            return None
+        self._touch(path)
+        self._count("frame_hits")
+        return df, entry.get("detected_date")
+
+    def put_frame(
+        self,
+        content_hash: str,
+        filename: str,
+        df: pd.DataFrame,
+        detected_date: Optional[str],
+        csv_engine: str = "c",
+    ) -> None:
+        entry: Dict[str, Any] = {"detected_date": detected_date}
+        if _HAS_PYARROW:
+            try:
+                buffer = io.BytesIO()
+                df.to_parquet(buffer)
+                entry.update(format="parquet", data=buffer.getvalue())
+            except Exception as exc:
+                # 混合类型的 object 列等无法转成 Arrow，改为 pickle
+                logger.debug("DataFrame 无法写为 Parquet，改用 pickle: %s", exc)
+        if "format" not in entry:
+            entry.update(format="pickle", data=df)
+        self._write(
+            self._frame_path(content_hash, filename, csv_engine),
+            pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL),
+        )
+
+    # ---------------- 转换结果 ----------------
+
+    def get_converted(self, content_hash: str) -> Optional[bytes]:
+        path = self._converted_path(content_hash)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self._count("converted_misses")
+            return None
+        self._touch(path)
+        self._count("converted_hits")
+        return data
+
+    def put_converted(self, content_hash: str, data: bytes) -> None:
+        self._write(self._converted_path(content_hash), data)
+
+    # ---------------- 存储与淘汰 ----------------
+
+    def _write(self, path: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logger.warning("解析缓存写入失败 %s: %s", path, exc)
+            self._remove(tmp_path)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        """总大小超过上限时删除最久未使用的条目"""
+        entries = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            self._count("evictions")
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # ---------------- 命中统计 ----------------
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counters[key] += 1
+            counters = dict(self._counters)
+        path = os.path.join(self._stats_dir, f"{_HOSTNAME}-{os.getpid()}.json")
+        try:
+            os.makedirs(self._stats_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(counters, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _pid_alive(pid: int) -> bool:
+        """进程是否仍在运行（无法判断时视为运行中）"""
+        if os.name == "nt":
+            # Windows 下 os.kill 会直接结束目标进程，不能用来探测
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True
+        return True
+
+    def _prune_stats(self) -> None:
+        """删除本机已退出进程的计数文件（其他主机的文件无法判断，保留）"""
+        try:
+            names = os.listdir(self._stats_dir)
+        except OSError:
+            return
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            host, _, pid = stem.rpartition("-")
+            if ext != ".json" or not pid.isdigit():
+                continue
+            # 旧格式 {pid}.json 没有主机名，按本机处理
+            if host and host != _HOSTNAME:
+                continue
+            if not self._pid_alive(int(pid)):
+                self._remove(os.path.join(self._stats_dir, name))
+
+    def stats(self) -> Dict[str, Any]:
+        """汇总所有仍在运行的进程的命中情况及当前缓存大小"""
+        self._prune_stats()
+        totals = {key: 0 for key in self._counters}
+        if os.path.isdir(self._stats_dir):
+            for name in os.listdir(self._stats_dir):
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(self._stats_dir, name), encoding="utf-8") as f:
+                        counters = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                for key in totals:
+                    totals[key] += int(counters.get(key, 0))
+
+        size = 0
+        entries = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                try:
+                    size += os.path.getsize(os.path.join(root, name))
+                    entries += 1
+                except OSError:
+                    continue
+
+        result: Dict[str, Any] = dict(totals)
+        for kind in ("frame", "converted"):
+            lookups = totals[f"{kind}_hits"] + totals[f"{kind}_misses"]
+            result[f"{kind}_hit_rate"] = (
+                round(totals[f"{kind}_hits"] / lookups, 4) if lookups else 0.0
+            )
+        result.update(entries=entries, size_bytes=size, max_bytes=self.max_bytes)
+        return result
+
+
+_cache: Optional[ParseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_parse_cache() -> ParseCache:
+    """获取进程级解析缓存单例"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = get_settings()
+            _cache = ParseCache(
+                # 放在子目录，避免被上传目录的过期文件清理删除
+                directory=os.path.join(settings.UPLOAD_DIR, "parse_cache"),
+                max_bytes=settings.PARSE_CACHE_MAX_BYTES,
+            )
+        return _cache
@@ -6,23 +6,45 @@ Excel/CSV 通用解析服务
 2. 处理多级表头（合并单元格 Forward Fill + 扁平化）
 3. 数据清理（去空行、过滤合计行）
 4. 内存优化（类型降级、Category 转换）
-5. 流式处理（大文件 CSV 分块读取）
+5. 流式处理（大文件 CSV 分块读取、xlsx 只读模式逐行读取）
 
 Author: Dev B (Data Specialist)
 """
 
+import codecs
+import hashlib
 import io
+import logging
 import os
+import pickle
 import re
 import shutil
 import subprocess
 import tempfile
 import numpy as np
-from typing import Union, Optional, List, Tuple, Iterator
+from typing import Union, Optional, List, Set, Tuple, Iterator
 from zipfile import BadZipFile
 
 import pandas as pd
 from pandas.errors import EmptyDataError, ParserError as PandasParserError
+from pandas.io.parsers import TextParser
+
+try:  # 编码嗅探兜底，requirements 已包含，缺失时只用内置规则
+    import chardet
+except ImportError:  # pragma: no cover
+    chardet = None
+
+try:  # 可选依赖：pyarrow CSV 引擎（多线程解析）；与 numpy 版本不匹配时导入也会失败
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    from pandas._libs.parsers import STR_NA_VALUES
+except Exception:  # pragma: no cover
+    pa = None
+    pa_csv = None
+
+
+logger = logging.getLogger(__name__)
 
 
 # 用于识别表头的关键词列表
@@ -54,11 +76,107 @@ class ParserError(ValueError):
     pass
 
 
+# 文件来源：二进制内容，或已落盘的文件路径（上传接口流式写盘后只传路径，
+# pandas 直接按路径读取，避免整文件读入内存再复制一份 BytesIO）
+FileSource = Union[bytes, str, "os.PathLike[str]"]
+
+# 按行预读 CSV 文件头时每次读取的字节数
+_HEAD_READ_SIZE = 64 * 1024
+
+# CSV 编码嗅探的样本大小（字节）
+_SNIFF_SAMPLE_SIZE = 64 * 1024
+
+# 内置规则依次尝试的编码（GB2312 是 GBK 的子集，GB18030 是 GBK 的超集）
+_CSV_ENCODINGS = ("utf-8", "gbk", "gb18030")
+
+_BOM_ENCODINGS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+_NON_ASCII = re.compile(rb"[\x80-\xff]")
+
+# optimize_dataframe 估计 object 列唯一值比例时的抽样行数
+_CATEGORY_SAMPLE_ROWS = 10000
+
+# Excel 错误值（openpyxl.cell.cell.ERROR_CODES），pandas 读取为 NaN
+_XLSX_ERROR_CODES = frozenset(
+    ("#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A")
+)
+
+
+def _is_path_source(source: FileSource) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+
+def _read_source_head(source: FileSource, size: int) -> bytes:
+    """读取文件开头 size 字节"""
+    if _is_path_source(source):
+        with open(source, "rb") as f:
+            return f.read(size)
+    return bytes(source[:size])
+
+
+def _pandas_input(source: FileSource):
+    """转换为 pandas 可读取的输入：路径原样传入，二进制内容包装为 BytesIO"""
+    if _is_path_source(source):
+        return source
+    return io.BytesIO(source)
+
+
+def _csv_memory_map(source: FileSource) -> dict:
+    """路径输入时让 read_csv 以内存映射方式读取（BytesIO 不支持 memory_map）"""
+    return {"memory_map": True} if _is_path_source(source) else {}
+
+
+def _iter_source_chunks(source: FileSource, size: int) -> Iterator[bytes]:
+    """按 size 字节分块读取文件内容（二进制内容按切片产出，不整体复制）"""
+    if _is_path_source(source):
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(size), b""):
+                yield chunk
+        return
+    view = memoryview(source)
+    for start in range(0, len(view), size):
+        yield bytes(view[start:start + size])
+
+
+def _source_sha256(source: FileSource) -> str:
+    """文件内容的 SHA-256（与上传接口计算的 file_hash 一致）"""
+    digest = hashlib.sha256()
+    if not _is_path_source(source):
+        digest.update(source)
+        return digest.hexdigest()
+    with open(source, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_text_head_lines(source: FileSource, encoding: str, max_rows: int) -> List[str]:
+    """
+    解码文件开头的 max_rows 行（与整文件 decode + splitlines 的结果一致）
+
+    按块读取直到凑满 max_rows 行或到达文件末尾，大文件不必整体解码。
+    """
+    buffer = b""
+    lines: List[str] = []
+    for chunk in _iter_source_chunks(source, _HEAD_READ_SIZE):
+        buffer += chunk
+        # 每次整段重新解码，避免多字节字符/\r\n 被块边界截断
+        lines = buffer.decode(encoding, errors="ignore").splitlines()
+        # 多读到一行才能确认第 max_rows 行已完整
+        if len(lines) > max_rows:
+            break
+    return lines[:max_rows]
+
+
 _OLE_XLS_MAGIC = b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1"  # OLE2 / BIFF (xls)
 _ZIP_MAGIC = b"PK"  # zip container (xlsx)
 
 
-def _sniff_excel_container(file_content: bytes) -> str:
+def _sniff_excel_container(file_content: FileSource) -> str:
     """
     粗略识别 Excel 文件“容器类型”，用于给出更友好的错误提示。
 
@@ -68,11 +186,10 @@ def _sniff_excel_container(file_content: bytes) -> str:
         - "html": 很多系统导出的“伪 xls”（HTML 表格 + .xls 后缀）
         - "unknown": 其他/无法识别
     """
-    if not file_content:
+    head = _read_source_head(file_content, 4096)
+    if not head:
         return "unknown"
 
-    head = file_content[:4096]
-
     # xls (OLE2)
     if head.startswith(_OLE_XLS_MAGIC):
         return "ole"
@@ -92,10 +209,24 @@ def _sniff_excel_container(file_content: bytes) -> str:
     return "unknown"
 
 
-def _convert_excel_to_xlsx_via_libreoffice(file_content: bytes, filename: str) -> bytes:
+def _convert_excel_to_xlsx_via_libreoffice(file_content: FileSource, filename: str) -> bytes:
     """
     使用 LibreOffice(soffice) 将 Excel 转换为 xlsx。
+
+    转换结果按文件内容缓存（parse_cache），同一文件的表头探测与整表读取、
+    以及重复上传都只转换一次。
     """
+    # 延迟导入：解析模块本身不依赖应用配置，可单独运行
+    from app.core.config import get_settings
+    from app.services.parse_cache import get_parse_cache
+
+    cache = get_parse_cache() if get_settings().PARSE_CACHE_ENABLED else None
+    content_hash = _source_sha256(file_content) if cache else None
+    if cache:
+        cached = cache.get_converted(content_hash)
+        if cached is not None:
+            return cached
+
     # 增加对 .com 的显式检查，并增加 Windows 默认路径硬探测
     soffice = (
         shutil.which("soffice") 
@@ -125,8 +256,11 @@ def _convert_excel_to_xlsx_via_libreoffice(file_content: bytes, filename: str) -
         src_path = os.path.join(tmpdir, f"{name}{ext}")
         out_dir = tmpdir
 
-        with open(src_path, "wb") as f:
-            f.write(file_content)
+        if _is_path_source(file_content):
+            shutil.copyfile(file_content, src_path)
+        else:
+            with open(src_path, "wb") as f:
+                f.write(file_content)
 
         # LibreOffice 会把输出放到 --outdir，并使用相同文件名但后缀为 .xlsx
         # 注：Windows 下同样可用；无需显示窗口，用 --headless
@@ -178,18 +312,24 @@ def _convert_excel_to_xlsx_via_libreoffice(file_content: bytes, filename: str) -
 
         try:
             with open(out_path, "rb") as f:
-                return f.read()
+                converted = f.read()
         except Exception as exc:
             raise ParserError(f"读取 LibreOffice 转换结果失败: {exc}") from exc
 
+    if cache:
+        cache.put_converted(content_hash, converted)
+    return converted
+
 
 def _read_excel_with_fallback(
-    file_content: bytes,
+    file_content: FileSource,
     filename: str,
     *,
     nrows: Optional[int] = None,
     header: Union[int, List[int], None] = None,
     skiprows: Optional[Union[int, List[int], range]] = None,
+    dtype: Optional[object] = None,
+    na_filter: bool = True,
 ) -> pd.DataFrame:
     """
     读取 Excel（.xls/.xlsx）并在引擎不匹配时自动 fallback。
@@ -197,6 +337,12 @@ def _read_excel_with_fallback(
     背景：真实文件格式与扩展名不一致时（例如把 xlsx 重命名为 xls），
     会导致 pandas+引擎抛出非 ValueError/BadZipFile 的异常（如 XLRDError），
     进而冒泡成 500。这里统一将读取错误包装为 ParserError。
+
+    dtype=object + na_filter=False 时返回未经类型推断的原始单元格网格，
+    供 _read_excel_single_pass 一次读取后复用。
+
+    file_content 为路径时直接交给引擎按文件读取（xlrd 会内存映射文件，
+    openpyxl 按 zip 目录随机读取），不再整体读入内存。
     """
     filename_lower = (filename or "").lower()
     container = _sniff_excel_container(file_content)
@@ -218,13 +364,13 @@ def _read_excel_with_fallback(
     engine_errors: List[str] = []
     for engine in engines:
         try:
-            stream = io.BytesIO(file_content)
-            stream.seek(0)
             return pd.read_excel(
-                stream,
+                _pandas_input(file_content),
                 nrows=nrows,
                 header=header,
                 skiprows=skiprows,
+                dtype=dtype,
+                na_filter=na_filter,
                 engine=engine,
             )
         except ImportError as exc:
@@ -251,6 +397,8 @@ def _read_excel_with_fallback(
                 nrows=nrows,
                 header=header,
                 skiprows=skiprows,
+                dtype=dtype,
+                na_filter=na_filter,
                 engine="openpyxl",
             )
         except ParserError as exc:
@@ -329,7 +477,12 @@ def _extract_date_from_preview_df(preview_df: pd.DataFrame) -> Optional[str]:
     return None
 
 
-def find_header_row(file_content: bytes, filename: str, max_rows: int = 20) -> Tuple[int, Optional[str]]:
+def find_header_row(
+    file_content: FileSource,
+    filename: str,
+    max_rows: int = 20,
+    encoding: Optional[str] = None,
+) -> Tuple[int, Optional[str]]:
     """
     智能定位标题行索引（基于关键词密度评分机制）并提取潜在日期
 
@@ -341,9 +494,10 @@ def find_header_row(file_content: bytes, filename: str, max_rows: int = 20) -> T
     5. 如果最高分为 0，抛出 ParserError
 
     Args:
-        file_content: 文件二进制内容
+        file_content: 文件二进制内容或文件路径
         filename: 文件名（用于判断文件类型）
         max_rows: 搜索的最大行数（默认 20 行）
+        encoding: CSV 编码（已检测过时传入，避免重复检测）
 
     Returns:
         Tuple[int, Optional[str]]: (标题行索引, 检测到的日期)
@@ -352,27 +506,19 @@ def find_header_row(file_content: bytes, filename: str, max_rows: int = 20) -> T
         ParserError: 无法识别表头
     """
     # 根据文件类型读取前 N 行
-    file_stream = io.BytesIO(file_content)
-
     if filename.lower().endswith(".csv"):
         # CSV：直接按行解码，避免列数不一致导致的行被跳过
-        try:
-            encoding = _detect_csv_encoding(file_content)
-        except ParserError:
-            raise
+        encoding = encoding or _detect_csv_encoding(file_content)
 
         try:
-            # 解码并保留空行，便于行号对应
-            text = file_content.decode(encoding, errors="ignore")
+            # 解码并保留空行，便于行号对应；只取前 max_rows 行进行评分
+            preview_lines = _read_text_head_lines(file_content, encoding, max_rows)
         except UnicodeError as exc:
             raise ParserError("无法识别文件编码") from exc
 
-        # 只取前 max_rows 行进行评分
-        lines = text.splitlines()
-        if len(lines) == 0:
+        if len(preview_lines) == 0:
             raise ParserError("空文件无法解析")
 
-        preview_lines = lines[:max_rows]
         preview_df = pd.DataFrame(preview_lines)
     else:
         # Excel 文件
@@ -383,6 +529,28 @@ def find_header_row(file_content: bytes, filename: str, max_rows: int = 20) -> T
         except ParserError:
             raise
 
+    return _locate_header_in_preview(preview_df, is_csv=filename.lower().endswith(".csv"))
+
+
+def _locate_header_in_preview(
+    preview_df: pd.DataFrame, is_csv: bool = False
+) -> Tuple[int, Optional[str]]:
+    """
+    在预览数据（前 N 行）上执行关键词密度评分，定位标题行并提取日期
+
+    Args:
+        preview_df: 预览数据（header=None 读取）
+        is_csv: 是否为 CSV 按行预览（每行只有一个单元格）
+
+    Returns:
+        Tuple[int, Optional[str]]: (标题行索引, 检测到的日期)
+
+    Raises:
+        ParserError: 无法识别表头
+    """
+    if len(preview_df) == 0:
+        raise ParserError("空文件无法解析")
+
     # 提取日期
     detected_date = _extract_date_from_preview_df(preview_df)
 
@@ -393,7 +561,7 @@ def find_header_row(file_content: bytes, filename: str, max_rows: int = 20) -> T
     row_scores: List[Tuple[int, int]] = []  # (row_index, score)
 
     for row_idx in range(len(preview_df)):
-        if filename.lower().endswith(".csv"):
+        if is_csv:
             # DataFrame 每行只有一个单元格（原始行文本）
             row_raw = preview_df.iloc[row_idx, 0]
             row_text = _normalize_text_for_match(row_raw)
@@ -428,87 +596,247 @@ def find_header_row(file_content: bytes, filename: str, max_rows: int = 20) -> T
 
 def optimize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
-    优化 DataFrame 内存占用
+    优化 DataFrame 内存占用（原地修改，返回同一个 DataFrame）
 
     优化策略：
-    1. Category 转换：对 object 类型列，如果 unique_count / total_count < 0.5，转换为 category
+    1. Category 转换：对 object 类型列，如果 unique_count / total_count <= 0.5，转换为 category；
+       超过 _CATEGORY_SAMPLE_ROWS 行时按等间隔抽样估计唯一值比例，不对整列求 nunique
     2. 数值降级：int64 -> int32（如果范围允许），float64 -> float32
 
+    逐列替换，不复制整个 DataFrame：峰值只多出正在转换的那一列。
+
+    pyarrow 引擎读出的 Arrow 列先转换为 C 引擎对应的类型（见 _arrow_column_to_numpy），
+    低重复率字符串列直接由 Arrow 数据生成 category，不经过 Python 字符串对象。
+
     Args:
         df: 输入 DataFrame
 
     Returns:
-        pd.DataFrame: 内存优化后的 DataFrame
+        pd.DataFrame: 内存优化后的 DataFrame（即传入的 df）
     """
-    if len(df) == 0:
+    total_count = len(df)
+    if total_count == 0:
         return df
 
-    # 创建副本避免修改原始数据
-    df = df.copy()
+    sample_rows: Optional[np.ndarray] = None
+    if total_count > _CATEGORY_SAMPLE_ROWS:
+        sample_rows = np.linspace(0, total_count - 1, _CATEGORY_SAMPLE_ROWS).astype(np.intp)
+
+    for position in range(df.shape[1]):
+        column = df.iloc[:, position]
+        col_dtype = column.dtype
 
-    for col in df.columns:
-        col_dtype = df[col].dtype
+        if isinstance(col_dtype, pd.ArrowDtype):
+            column = _arrow_column_to_numpy(column, sample_rows)
+            df.isetitem(position, column)
+            col_dtype = column.dtype
 
         # 1. 处理 object (字符串) 类型列 -> Category
         if col_dtype == "object":
-            # 计算唯一值比例
-            unique_count = df[col].nunique()
-            total_count = len(df)
-
+            sample = column if sample_rows is None else column.take(sample_rows)
             # 重复率高于 50% 时转换为 category
-            if total_count > 0 and unique_count / total_count <= 0.5:
-                df[col] = df[col].astype("category")
+            if sample.nunique() / len(sample) <= 0.5:
+                df.isetitem(position, column.astype("category"))
 
         # 2. 处理 int64 类型列 -> int32
         elif col_dtype == np.int64:
-            col_min = df[col].min()
-            col_max = df[col].max()
-
             # int32 范围: -2147483648 到 2147483647
-            if col_min >= np.iinfo(np.int32).min and col_max <= np.iinfo(np.int32).max:
-                df[col] = df[col].astype(np.int32)
+            if (
+                column.min() >= np.iinfo(np.int32).min
+                and column.max() <= np.iinfo(np.int32).max
+            ):
+                df.isetitem(position, column.astype(np.int32))
 
         # 3. 处理 float64 类型列 -> float32
         elif col_dtype == np.float64:
             # float32 精度对于金额计算通常足够（约7位有效数字）
-            df[col] = df[col].astype(np.float32)
+            df.isetitem(position, column.astype(np.float32))
 
     return df
 
 
+def _is_arrow_string(dtype) -> bool:
+    return isinstance(dtype, pd.ArrowDtype) and (
+        pa.types.is_string(dtype.pyarrow_dtype)
+        or pa.types.is_large_string(dtype.pyarrow_dtype)
+    )
+
+
+def _arrow_column_to_numpy(
+    series: pd.Series, sample_rows: Optional[np.ndarray] = None
+) -> pd.Series:
+    """
+    Arrow 列转换为 C 引擎读取同一列时的类型
+
+    - 整数：无空值为 int64，有空值为 float64（NaN）
+    - 浮点：float64；全空列：float64
+    - 布尔：无空值为 bool，有空值为 object
+    - 字符串：重复率高（unique / total <= 0.5）时直接编码为 category，否则 object（空值为 NaN）；
+      传入 sample_rows 时与 optimize_dataframe 一样按抽样行估计唯一值比例
+    """
+    arrow_type = series.dtype.pyarrow_dtype
+    array = pa.array(series.array)
+    has_nulls = array.null_count > 0
+
+    if _is_arrow_string(series.dtype):
+        sample = array if sample_rows is None else array.take(pa.array(sample_rows))
+        sample_unique = pc.count_distinct(sample, mode="only_valid").as_py()
+        if len(sample) > 0 and sample_unique / len(sample) <= 0.5:
+            unique = pc.unique(array).drop_null()
+            # 与 object 列 astype("category") 一致：类别按值排序
+            categories = pc.array_sort_indices(unique)
+            categories = unique.take(categories)
+            codes = pc.index_in(array, value_set=categories)
+            codes = codes.fill_null(-1).to_numpy(zero_copy_only=False)
+            return pd.Series(
+                pd.Categorical.from_codes(
+                    codes, categories=pd.Index(categories.to_pylist(), dtype=object)
+                ),
+                index=series.index,
+                name=series.name,
+            )
+        values = series.to_numpy(dtype=object, na_value=np.nan)
+    elif pa.types.is_integer(arrow_type):
+        if has_nulls:
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            values = series.to_numpy(dtype=np.int64)
+    elif pa.types.is_floating(arrow_type) or pa.types.is_null(arrow_type):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    elif pa.types.is_boolean(arrow_type) and not has_nulls:
+        values = series.to_numpy(dtype=bool)
+    else:
+        values = series.to_numpy(dtype=object, na_value=np.nan)
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def _read_csv_pyarrow(
+    contents: FileSource, header_rows: Union[int, List[int]], encoding: str
+) -> Optional[pd.DataFrame]:
+    """
+    用 pyarrow 多线程读取整个 CSV，结果为 Arrow 类型的 DataFrame
+
+    列名取自 C 引擎（pd.read_csv(nrows=0)），单级/多级表头都与 C 引擎完全一致，
+    pyarrow 只负责读数据行。列值同样与 C 引擎保持一致：
+    - 时间类列（pyarrow 会自动识别为日期/时间戳）按原始文本读取；
+    - 空值标记与 pandas 默认 na_values 相同。
+
+    以下情况返回 None，由调用方改用 C 引擎：
+    - pyarrow 不可用；
+    - 表头及之前的行中有空行或引号（C 引擎的 header 行号跳过空行、引号内可含换行，
+      与 pyarrow 按物理行跳过的行数可能不同）；
+    - 存在列数与表头不一致的行（C 引擎补空值或跳过，首行还可能被当作索引列）；
+    - pyarrow 解析报错。
+    """
+    if pa_csv is None:
+        return None
+
+    levels = header_rows if isinstance(header_rows, list) else [header_rows]
+    data_start = levels[-1] + 1
+    head = _read_text_head_lines(contents, encoding, data_start)
+    if len(head) < data_start or any(not line or '"' in line for line in head):
+        return None
+
+    expected = pd.read_csv(
+        _pandas_input(contents),
+        header=header_rows,
+        encoding=encoding,
+        nrows=0,
+        on_bad_lines="skip",
+    ).columns
+
+    invalid_rows: List[Optional[int]] = []
+
+    def on_invalid_row(row) -> str:
+        invalid_rows.append(row.number)
+        return "skip"
+
+    read_options = pa_csv.ReadOptions(
+        skip_rows=data_start,
+        column_names=[f"c{i}" for i in range(len(expected))],
+        encoding=encoding,
+        use_threads=True,
+    )
+    parse_options = pa_csv.ParseOptions(
+        newlines_in_values=True, invalid_row_handler=on_invalid_row
+    )
+
+    def convert_options(text_columns: Set[str]):
+        return pa_csv.ConvertOptions(
+            null_values=list(STR_NA_VALUES),
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=True,
+            column_types={name: pa.string() for name in text_columns},
+        )
+
+    try:
+        # 首块推断出的时间类列改为文本读取；首块为空、后面才出现时间值的列再读一遍
+        with pa_csv.open_csv(
+            _pandas_input(contents),
+            read_options=read_options,
+            parse_options=parse_options,
+            convert_options=convert_options(set()),
+        ) as reader:
+            text_columns = {
+                field.name for field in reader.schema if pa.types.is_temporal(field.type)
+            }
+        for _ in range(2):
+            invalid_rows.clear()
+            table = pa_csv.read_csv(
+                _pandas_input(contents),
+                read_options=read_options,
+                parse_options=parse_options,
+                convert_options=convert_options(text_columns),
+            )
+            temporal = {
+                field.name for field in table.schema if pa.types.is_temporal(field.type)
+            }
+            if not temporal:
+                break
+            text_columns |= temporal
+        else:
+            return None
+    except (pa.ArrowException, UnicodeError, ValueError, OSError):
+        return None
+
+    if invalid_rows:
+        return None
+
+    df = table.to_pandas(types_mapper=pd.ArrowDtype)
+    df.columns = expected
+    return df
+
+
 def _detect_multi_level_header(
-    file_content: bytes, filename: str, header_row_index: int
+    file_content: FileSource,
+    filename: str,
+    header_row_index: int,
+    encoding: Optional[str] = None,
 ) -> bool:
     """
     检测是否为多级表头
 
     Args:
-        file_content: 文件二进制内容
+        file_content: 文件二进制内容或文件路径
         filename: 文件名
         header_row_index: 主表头行索引
+        encoding: CSV 编码（已检测过时传入，避免重复检测）
 
     Returns:
         bool: 是否为多级表头
     """
-    file_stream = io.BytesIO(file_content)
-
     if filename.lower().endswith(".csv"):
-        for encoding in ["utf-8", "gbk", "gb2312", "utf-8-sig"]:
-            try:
-                file_stream.seek(0)
-                # 读取主表头行和下一行
-                preview_df = pd.read_csv(
-                    file_stream,
-                    skiprows=range(0, header_row_index),
-                    nrows=2,
-                    header=None,
-                    encoding=encoding,
-                    on_bad_lines="skip",
-                )
-                break
-            except (UnicodeDecodeError, UnicodeError):
-                continue
-        else:
+        try:
+            # 读取主表头行和下一行
+            preview_df = pd.read_csv(
+                _pandas_input(file_content),
+                skiprows=range(0, header_row_index),
+                nrows=2,
+                header=None,
+                encoding=encoding or _detect_csv_encoding(file_content),
+                on_bad_lines="skip",
+            )
+        except (UnicodeDecodeError, UnicodeError, ParserError):
             return False
     else:
         try:
@@ -523,6 +851,19 @@ def _detect_multi_level_header(
             # 无法读取则视为非多级表头，交由后续主读取报错
             return False
 
+    return _is_multi_level_header_preview(preview_df)
+
+
+def _is_multi_level_header_preview(preview_df: pd.DataFrame) -> bool:
+    """
+    基于主表头行及其下一行的预览数据判断是否为多级表头
+
+    Args:
+        preview_df: 从主表头行开始的 2 行预览数据（header=None）
+
+    Returns:
+        bool: 是否为多级表头
+    """
     if len(preview_df) < 2:
         return False
 
@@ -630,6 +971,8 @@ def _clean_dataframe(df: pd.DataFrame, filter_summary: bool = True) -> pd.DataFr
     2. 去除列名前后空格
     3. (可选) 过滤合计行
 
+    两类行合并为一个掩码一次过滤，没有需要去除的行时不复制数据。
+
     Args:
         df: 输入 DataFrame
         filter_summary: 是否过滤合计行
@@ -641,19 +984,22 @@ def _clean_dataframe(df: pd.DataFrame, filter_summary: bool = True) -> pd.DataFr
     df.columns = [str(col).strip() for col in df.columns]
 
     # 2. 去除全为空的行
-    df = df.dropna(how="all")
+    keep = df.notna().any(axis=1).to_numpy()
 
     # 3. 过滤合计行
     if filter_summary and len(df) > 0:
-        # 获取第一列名称
-        first_col = df.columns[0]
+        # 过滤掉第一列包含"合计"的行（Arrow 字符串列直接用 Arrow 计算，不转成 Python 字符串）
+        first = df.iloc[:, 0]
+        if not _is_arrow_string(first.dtype):
+            first = first.astype(str)
+        mask = first.str.contains("合计", na=False)
+        keep &= ~mask.to_numpy(dtype=bool, na_value=False)
 
-        # 过滤掉第一列包含"合计"的行
-        mask = df[first_col].astype(str).str.contains("合计", na=False)
-        df = df[~mask]
+    if not keep.all():
+        df = df[keep]
 
     # 重置索引
-    df = df.reset_index(drop=True)
+    df.reset_index(drop=True, inplace=True)
 
     return df
 
@@ -668,13 +1014,24 @@ def _remove_empty_columns(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: 清理后的 DataFrame
     """
-    # 移除全为空的列
-    df = df.dropna(axis=1, how="all")
+    # 移除全为空的列（按位置逐列删除，剩余列不复制）
+    empty = df.isna().all(axis=0).to_numpy()
+    if empty.any():
+        names = [col for col, is_empty in zip(df.columns, empty) if not is_empty]
+        df.columns = range(df.shape[1])
+        for position in np.flatnonzero(empty):
+            del df[position]
+        df.columns = names
+
+    df.columns = _dedupe_column_names(df.columns)
+    return df
 
-    # 处理可能的空列名或重复列名
+
+def _dedupe_column_names(columns) -> List[str]:
+    """空列名改为 unnamed_col，重复列名追加 _1、_2 序号"""
     new_columns = []
     seen = {}
-    for col in df.columns:
+    for col in columns:
         col_str = str(col).strip()
         if col_str == "" or col_str == "nan":
             col_str = "unnamed_col"
@@ -688,54 +1045,206 @@ def _remove_empty_columns(df: pd.DataFrame) -> pd.DataFrame:
 
         new_columns.append(col_str)
 
-    df.columns = new_columns
-    return df
+    return new_columns
 
 
-def _detect_csv_encoding(file_content: bytes) -> str:
+def _detect_csv_encoding(file_content: FileSource) -> str:
     """
-    检测 CSV 文件编码
+    检测 CSV 文件编码（只读取有限的字节样本）
+
+    1. BOM：UTF-8 / UTF-16 带 BOM 时直接确定；
+    2. 取样：从第一个非 ASCII 字节起取 _SNIFF_SAMPLE_SIZE 字节
+       （开头的英文标题/空行不参与判断；全文件都是 ASCII 时按 UTF-8）；
+    3. 样本能严格按 UTF-8 / GBK / GB18030 依次解码即采用（样本末尾被截断的
+       多字节字符不算错误）；
+    4. 都不能解码时交给 chardet 判断。
+
+    解析流程中只调用一次，结果传给表头定位、多级表头检测和正式读取。
 
     Args:
-        file_content: 文件二进制内容
+        file_content: 文件二进制内容或文件路径
 
     Returns:
         str: 检测到的编码名称
 
     Raises:
-        ParserError: 无法识别编码
+        ParserError: 空文件或无法识别编码
     """
-    file_stream = io.BytesIO(file_content)
+    head = _read_source_head(file_content, 4)
+    if not head:
+        raise ParserError("空文件无法解析")
+    for bom, encoding in _BOM_ENCODINGS:
+        if head.startswith(bom):
+            return encoding
 
-    for encoding in ["utf-8", "gbk", "gb2312", "utf-8-sig"]:
+    sample = b""
+    at_eof = True
+    for chunk in _iter_source_chunks(file_content, _HEAD_READ_SIZE):
+        if sample:
+            sample += chunk
+        else:
+            match = _NON_ASCII.search(chunk)
+            if match is None:
+                continue
+            sample = chunk[match.start():]
+        if len(sample) > _SNIFF_SAMPLE_SIZE:
+            sample = sample[:_SNIFF_SAMPLE_SIZE]
+            at_eof = False
+            break
+    if not sample:
+        return "utf-8"
+
+    for encoding in _CSV_ENCODINGS:
         try:
-            file_stream.seek(0)
-            pd.read_csv(
-                file_stream,
-                nrows=5,
-                header=None,
-                encoding=encoding,
-                on_bad_lines="skip",
-            )
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=at_eof)
             return encoding
-        except (UnicodeDecodeError, UnicodeError):
+        except UnicodeDecodeError:
             continue
-        except EmptyDataError as exc:
-            raise ParserError("空文件无法解析") from exc
+
+    if chardet is not None:
+        guess = chardet.detect(sample)
+        encoding = guess.get("encoding")
+        if encoding and (guess.get("confidence") or 0) >= 0.5:
+            try:
+                codecs.lookup(encoding)
+                return encoding
+            except LookupError:
+                pass
 
     raise ParserError("无法识别 CSV 文件编码")
 
 
+def _fill_merged_header_row(
+    row: list, control_row: List[bool]
+) -> Tuple[list, List[bool]]:
+    """
+    多级表头合并单元格横向填充（与 pandas.read_excel 的多级表头处理保持一致）
+
+    只在同一父级范围内向右填充空单元格，control_row 用于阻止跨父级传播。
+
+    Args:
+        row: 表头行单元格列表（会被原地修改）
+        control_row: 各列是否仍处于上一层同一父级范围
+
+    Returns:
+        Tuple[list, List[bool]]: (填充后的行, 更新后的 control_row)
+    """
+    last = row[0]
+    for i in range(1, len(row)):
+        if not control_row[i]:
+            last = row[i]
+
+        if row[i] == "" or row[i] is None:
+            row[i] = last
+        else:
+            control_row[i] = False
+            last = row[i]
+
+    return row, control_row
+
+
+def _build_dataframe_from_rows(
+    rows: List[list],
+    header: Union[int, List[int], None],
+    dtype: Optional[dict] = None,
+) -> pd.DataFrame:
+    """
+    基于原始单元格网格构建 DataFrame（表头解析、NaN 识别、类型推断与 read_excel 一致）
+
+    Args:
+        rows: 原始单元格网格（空单元格为 ""）
+        header: 表头行索引；多级表头为行索引列表；None 表示无表头
+        dtype: 按列位置指定的列类型（分块构建时保证各块类型一致）
+
+    Returns:
+        pd.DataFrame: 构建后的 DataFrame
+    """
+    if not rows:
+        return pd.DataFrame()
+
+    if isinstance(header, list) and len(header) > 1:
+        # 表头行需要原地填充，先浅拷贝行列表及表头行，避免污染原始网格
+        rows = list(rows)
+        control_row = [True] * len(rows[0])
+        for row_idx in header:
+            if row_idx > len(rows) - 1:
+                raise ValueError(
+                    f"header index {row_idx} exceeds maximum index {len(rows) - 1} of data."
+                )
+            rows[row_idx], control_row = _fill_merged_header_row(
+                list(rows[row_idx]), control_row
+            )
+
+    try:
+        parser = TextParser(rows, header=header, skip_blank_lines=False, dtype=dtype)
+        return parser.read()
+    except EmptyDataError:
+        return pd.DataFrame()
+
+
+def _read_excel_single_pass(
+    contents: FileSource, filename: str, max_rows: int = 20
+) -> Tuple[pd.DataFrame, Optional[str]]:
+    """
+    单次读取 Excel 工作表：表头定位、多级表头检测与 DataFrame 构建共用同一份原始网格
+
+    原流程会依次以 nrows=20、nrows=2 和全量方式打开同一个 zip/OLE 容器三次，
+    大文件的解析耗时主要花在重复解压与解析 XML 上。
+
+    Args:
+        contents: 文件二进制内容或文件路径
+        filename: 文件名
+        max_rows: 表头搜索的最大行数（默认 20 行）
+
+    Returns:
+        Tuple[pd.DataFrame, Optional[str]]: (未扁平化的 DataFrame, 检测到的日期)
+
+    Raises:
+        ParserError: 无法读取文件或无法识别表头
+    """
+    # 1. 一次性读取原始网格（不做表头与类型推断）
+    raw_grid = _read_excel_with_fallback(
+        contents, filename, header=None, dtype=object, na_filter=False
+    )
+    rows = raw_grid.values.tolist()
+    del raw_grid
+
+    if not rows:
+        raise ParserError("空文件无法解析")
+
+    # 2. 智能定位标题行
+    preview_df = _build_dataframe_from_rows(rows[:max_rows], header=None)
+    header_row_index, detected_date = _locate_header_in_preview(preview_df)
+
+    # 3. 检测是否为多级表头
+    header_preview = _build_dataframe_from_rows(
+        rows[header_row_index : header_row_index + 2], header=None
+    )
+    if _is_multi_level_header_preview(header_preview):
+        header_rows: Union[int, List[int]] = [header_row_index, header_row_index + 1]
+    else:
+        header_rows = header_row_index
+
+    # 4. 从同一份网格构建最终 DataFrame
+    df = _build_dataframe_from_rows(rows, header=header_rows)
+    return df, detected_date
+
+
 def read_excel_file(
-    contents: bytes, filename: str, filter_summary: bool = True
+    contents: FileSource,
+    filename: str,
+    filter_summary: bool = True,
+    csv_engine: str = "c",
 ) -> Tuple[pd.DataFrame, Optional[str]]:
     """
     读取 Excel 或 CSV 文件流，自动识别多级表头并扁平化
 
     Args:
-        contents: 文件二进制内容
+        contents: 文件二进制内容或文件路径（路径输入时 CSV 以内存映射方式读取）
         filename: 文件名 (用于判断是 csv 还是 xlsx)
         filter_summary: 是否过滤合计行（默认 True）
+        csv_engine: CSV 读取引擎，"c"（默认）或 "pyarrow"（多线程，需安装 pyarrow；
+            未安装或文件形态特殊时自动回退到 C 引擎）
 
     Returns:
         Tuple[pd.DataFrame, Optional[str]]: (清洗后的 DataFrame, 检测到的日期)
@@ -744,56 +1253,47 @@ def read_excel_file(
         ParserError: 无法识别表头或文件格式错误
     """
     try:
-        # Step A: 智能定位标题行
-        header_row_index, detected_date = find_header_row(contents, filename)
+        if not filename.lower().endswith(".csv"):
+            # Excel 文件：单次读取，表头定位/多级表头检测/构建共用一份网格
+            df, detected_date = _read_excel_single_pass(contents, filename)
+        else:
+            # 编码只检测一次，各步骤共用
+            encoding = _detect_csv_encoding(contents)
 
-        # Step B: 检测是否为多级表头
-        is_multi_level = _detect_multi_level_header(
-            contents, filename, header_row_index
-        )
+            # Step A: 智能定位标题行
+            header_row_index, detected_date = find_header_row(
+                contents, filename, encoding=encoding
+            )
 
-        # 准备读取参数
-        file_stream = io.BytesIO(contents)
+            # Step B: 检测是否为多级表头
+            is_multi_level = _detect_multi_level_header(
+                contents, filename, header_row_index, encoding=encoding
+            )
 
-        if is_multi_level:
-            # 使用两行作为表头
-            header_rows = [header_row_index, header_row_index + 1]
-        else:
-            # 单行表头
-            header_rows = header_row_index
+            if is_multi_level:
+                # 使用两行作为表头
+                header_rows = [header_row_index, header_row_index + 1]
+            else:
+                # 单行表头
+                header_rows = header_row_index
 
-        # 读取文件
-        if filename.lower().endswith(".csv"):
-            # CSV 文件：尝试多种编码
             df = None
-            for encoding in ["utf-8", "gbk", "gb2312", "utf-8-sig"]:
-                try:
-                    file_stream.seek(0)
+            if csv_engine == "pyarrow":
+                df = _read_csv_pyarrow(contents, header_rows, encoding)
+            try:
+                if df is None:
                     df = pd.read_csv(
-                        file_stream,
+                        _pandas_input(contents),
                         header=header_rows,
                         encoding=encoding,
                         on_bad_lines="skip",
                         low_memory=False,
+                        **_csv_memory_map(contents),
                     )
-                    break
-                except (UnicodeDecodeError, UnicodeError):
-                    continue
-                except (EmptyDataError, PandasParserError) as exc:
-                    raise ParserError(f"解析 CSV 文件失败: {exc}") from exc
-
-            if df is None:
-                raise ParserError("无法识别 CSV 文件编码")
-        else:
-            # Excel 文件
-            try:
-                df = _read_excel_with_fallback(
-                    contents,
-                    filename,
-                    header=header_rows,
-                )
-            except ParserError:
-                raise
+            except UnicodeError as exc:
+                raise ParserError(f"CSV 文件按 {encoding} 编码解码失败: {exc}") from exc
+            except (EmptyDataError, PandasParserError) as exc:
+                raise ParserError(f"解析 CSV 文件失败: {exc}") from exc
     except ParserError:
         raise
     except (EmptyDataError, PandasParserError, ValueError, BadZipFile, OSError) as exc:
@@ -866,7 +1366,7 @@ def detect_report_type(df: pd.DataFrame, filename: str = "") -> str:
 
 
 def parse_csv_stream(
-    contents: bytes, filename: str, chunk_size: int = 5000
+    contents: FileSource, filename: str, chunk_size: int = 5000
 ) -> Iterator[Tuple[pd.DataFrame, dict]]:
     """
     CSV 流式解析生成器，用于处理大文件
@@ -874,7 +1374,7 @@ def parse_csv_stream(
     适用场景：大于 20MB 的 CSV 文件，避免一次性加载导致 OOM。
 
     Args:
-        contents: 文件二进制内容
+        contents: 文件二进制内容或文件路径
         filename: 文件名
         chunk_size: 每个 chunk 的行数（默认 5000 行）
 
@@ -896,10 +1396,14 @@ def parse_csv_stream(
     encoding = _detect_csv_encoding(contents)
 
     # Step 2: 定位表头位置
-    header_row_index, detected_date = find_header_row(contents, filename)
+    header_row_index, detected_date = find_header_row(
+        contents, filename, encoding=encoding
+    )
 
     # Step 3: 检测是否为多级表头
-    is_multi_level = _detect_multi_level_header(contents, filename, header_row_index)
+    is_multi_level = _detect_multi_level_header(
+        contents, filename, header_row_index, encoding=encoding
+    )
 
     if is_multi_level:
         header_rows = [header_row_index, header_row_index + 1]
@@ -907,9 +1411,8 @@ def parse_csv_stream(
         header_rows = header_row_index
 
     # Step 4: 首次读取一小部分数据以检测报表类型
-    file_stream = io.BytesIO(contents)
     preview_df = pd.read_csv(
-        file_stream,
+        _pandas_input(contents),
         header=header_rows,
         encoding=encoding,
         nrows=10,
@@ -919,14 +1422,14 @@ def parse_csv_stream(
     report_type = detect_report_type(preview_df, filename)
 
     # Step 5: 使用 chunksize 分块读取
-    file_stream = io.BytesIO(contents)
     chunk_reader = pd.read_csv(
-        file_stream,
+        _pandas_input(contents),
         header=header_rows,
         encoding=encoding,
         chunksize=chunk_size,
         on_bad_lines="skip",
         low_memory=False,
+        **_csv_memory_map(contents),
     )
 
     chunk_index = 0
@@ -956,8 +1459,406 @@ def parse_csv_stream(
         chunk_index += 1
 
 
+def _csv_column_dtypes(kinds: List[Set[str]]) -> dict:
+    """
+    由各分块推断出的 dtype 种类合并出整文件的列类型（按列位置）
+
+    与整文件一次读取的推断结果保持一致：任一分块为文本则整列按文本读取，
+    整数与浮点混合（含空值）按浮点读取，其余保持分块内的默认推断。
+    """
+    dtypes = {}
+    for position, kind_set in enumerate(kinds):
+        if len(kind_set) <= 1:
+            continue
+        if kind_set <= {"i", "u", "f"}:
+            dtypes[position] = "float64"
+        else:
+            dtypes[position] = str
+    return dtypes
+
+
+def iter_csv_chunks(
+    contents: FileSource, filename: str, chunk_size: int = 5000
+) -> Iterator[Tuple[pd.DataFrame, dict]]:
+    """
+    按块读取 CSV，供上传流水线逐块清洗、入库
+
+    与 parse_csv_stream 不同，这里保证各分块与 read_excel_file 整文件读取的结果一致：
+    第一遍只扫描，确定整文件的非空列和各列类型（分块单独推断时，同一列可能在
+    某块是整数、另一块是文本，"001" 这类编号会丢失前导零）；第二遍按扫描结果
+    固定列类型、统一移除空列后逐块产出。不做 optimize_dataframe（逐块处理时
+    内存已有上限，float32 降级只会损失精度）。
+
+    Args:
+        contents: 文件二进制内容或文件路径
+        filename: 文件名
+        chunk_size: 每个 chunk 的行数
+
+    Yields:
+        Tuple[pd.DataFrame, dict]:
+            - DataFrame: 当前 chunk（已扁平化、已清理，列与整文件读取一致）
+            - dict: 元信息，包含 chunk_index, row_offset, chunk_rows, columns, detected_date
+
+    Raises:
+        ParserError: 文件解析错误
+    """
+    if not filename.lower().endswith(".csv"):
+        raise ParserError("iter_csv_chunks 仅支持 CSV 文件")
+
+    encoding = _detect_csv_encoding(contents)
+    header_row_index, detected_date = find_header_row(
+        contents, filename, encoding=encoding
+    )
+    if _detect_multi_level_header(contents, filename, header_row_index, encoding=encoding):
+        header_rows: Union[int, List[int]] = [header_row_index, header_row_index + 1]
+    else:
+        header_rows = header_row_index
+
+    def read_chunks(dtype: Optional[dict] = None):
+        reader = pd.read_csv(
+            _pandas_input(contents),
+            header=header_rows,
+            encoding=encoding,
+            chunksize=chunk_size,
+            dtype=dtype,
+            on_bad_lines="skip",
+            **_csv_memory_map(contents),
+        )
+        with reader:
+            for raw_chunk in reader:
+                kinds = [dtype.kind for dtype in raw_chunk.dtypes]
+                chunk = _flatten_multi_index_columns(raw_chunk)
+                yield _clean_dataframe(chunk, filter_summary=True), kinds
+
+    # 第一遍：收集非空列与列类型
+    columns: Optional[List[str]] = None
+    non_empty: Optional[np.ndarray] = None
+    kinds: List[Set[str]] = []
+    try:
+        for chunk, chunk_kinds in read_chunks():
+            if columns is None:
+                columns = list(chunk.columns)
+                non_empty = np.zeros(len(columns), dtype=bool)
+                kinds = [set() for _ in columns]
+            non_empty |= chunk.notna().any(axis=0).to_numpy()
+            for position, kind in enumerate(chunk_kinds):
+                kinds[position].add(kind)
+    except UnicodeError as exc:
+        raise ParserError(f"CSV 文件按 {encoding} 编码解码失败: {exc}") from exc
+    except (EmptyDataError, PandasParserError, ValueError, OSError) as exc:
+        raise ParserError(f"解析 CSV 文件失败: {exc}") from exc
+
+    if columns is None:
+        # 只有表头没有数据
+        return
+
+    keep_positions = [position for position, keep in enumerate(non_empty) if keep]
+    final_columns = _dedupe_column_names(columns[position] for position in keep_positions)
+
+    # 第二遍：固定列类型逐块产出
+    row_offset = 0
+    chunk_index = 0
+    try:
+        for chunk, _ in read_chunks(_csv_column_dtypes(kinds)):
+            chunk = chunk.iloc[:, keep_positions]
+            chunk.columns = final_columns
+            yield chunk, {
+                "chunk_index": chunk_index,
+                "row_offset": row_offset,
+                "chunk_rows": len(chunk),
+                "columns": final_columns,
+                "detected_date": detected_date,
+            }
+            row_offset += len(chunk)
+            chunk_index += 1
+    except (EmptyDataError, PandasParserError, UnicodeError, ValueError, OSError) as exc:
+        raise ParserError(f"解析 CSV 文件失败: {exc}") from exc
+
+
+def _convert_xlsx_value(value):
+    """
+    openpyxl 单元格值转换（与 pandas 的 openpyxl 读取器一致）
+
+    空单元格为 ""，错误值（#N/A、#DIV/0! 等）为 NaN，整数值的浮点数转换为 int。
+    values_only 读取拿不到单元格类型，错误值按文本内容识别。
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if value.is_integer():
+            return int(value)
+        return value
+    if isinstance(value, str) and value in _XLSX_ERROR_CODES:
+        return np.nan
+    return value
+
+
+def _iter_xlsx_rows(contents: FileSource) -> Iterator[list]:
+    """
+    以 openpyxl 只读模式逐行读取 xlsx 第一个工作表
+
+    只读模式按 SAX 方式解析工作表 XML，不构建完整的工作簿对象模型，
+    内存占用与行数无关。每行去掉行尾空单元格（整行为空时为 []），
+    与 pandas.read_excel 的单元格转换规则一致。
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(
+        _pandas_input(contents), read_only=True, data_only=True, keep_links=False
+    )
+    try:
+        sheet = workbook.worksheets[0]
+        # 部分系统导出的 dimension 信息不准确，按实际数据重新计算
+        sheet.reset_dimensions()
+        for values in sheet.iter_rows(values_only=True):
+            row = [_convert_xlsx_value(value) for value in values]
+            while row and row[-1] == "":
+                row.pop()
+            yield row
+    finally:
+        workbook.close()
+
+
+def _iter_row_blocks(rows: Iterator[list], block_rows: int) -> Iterator[List[list]]:
+    """按 block_rows 行一块分组"""
+    block: List[list] = []
+    for row in rows:
+        block.append(row)
+        if len(block) >= block_rows:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def _excel_column_dtypes(kinds: List[Set[str]], has_null: List[bool]) -> dict:
+    """
+    由各分块推断出的 dtype 种类合并出整文件的列类型（按列位置）
+
+    kinds 只统计该列有值的分块；has_null 表示整列是否出现空值。
+    与整表一次构建的推断结果保持一致：
+    - 数值列（含布尔）：混合浮点或含空值时按 float64，布尔与整数混合按 int64；
+    - 日期列：含空值时全空分块按 datetime64 补齐（值为 NaT）；
+    - 其余混合类型或含空值的列按 object（保留原始单元格值，不做数值转换）。
+    """
+    dtypes = {}
+    for position, (kind_set, nullable) in enumerate(zip(kinds, has_null)):
+        if not kind_set:
+            continue
+        if kind_set <= {"b", "i", "u", "f"}:
+            # 布尔值按数值推断：与整数混合为整数，含空值或浮点为浮点
+            if kind_set != {"f"} and ("f" in kind_set or nullable):
+                dtypes[position] = "float64"
+            elif len(kind_set) > 1:
+                dtypes[position] = "int64"
+        elif kind_set == {"M"}:
+            if nullable:
+                dtypes[position] = "datetime64[ns]"
+        elif len(kind_set) > 1 or nullable:
+            dtypes[position] = object
+    return dtypes
+
+
+def iter_excel_chunks(
+    contents: FileSource, filename: str, chunk_size: int = 5000, max_rows: int = 20
+) -> Iterator[Tuple[pd.DataFrame, dict]]:
+    """
+    按块读取 xlsx，供上传流水线逐块清洗、入库（与 iter_csv_chunks 的产出一致）
+
+    pandas.read_excel 会把整张工作表转换为 Python 对象网格，再构建 DataFrame，
+    大文件的峰值内存是文件大小的几十倍。这里：
+    1. openpyxl 只读模式逐行读取，原始行按块 pickle 到临时文件，
+       同时记录最大列宽、最后一个非空行，并保留前 max_rows 行用于表头定位；
+    2. 按前 max_rows 行定位标题行、检测多级表头；
+    3. 第一遍读临时文件：逐块构建 DataFrame，收集非空列与各列类型；
+    4. 第二遍读临时文件：按整表类型逐块构建，统一移除空列后产出。
+    工作表 XML 只解析一次，内存占用与文件大小无关。
+
+    非 xlsx（zip）容器的文件（xls、伪装成 xlsx 的 xls 等）无法只读流式读取，
+    按原方式整表读取后分块产出。
+
+    Args:
+        contents: 文件二进制内容或文件路径
+        filename: 文件名
+        chunk_size: 每个 chunk 的行数
+        max_rows: 表头搜索的最大行数（默认 20 行）
+
+    Yields:
+        Tuple[pd.DataFrame, dict]: 同 iter_csv_chunks
+
+    Raises:
+        ParserError: 文件解析错误
+    """
+    if filename.lower().endswith(".csv"):
+        raise ParserError("iter_excel_chunks 仅支持 Excel 文件，CSV 文件请使用 iter_csv_chunks")
+
+    if _sniff_excel_container(contents) != "zip":
+        yield from _iter_frame_chunks(contents, filename, chunk_size)
+        return
+
+    with tempfile.TemporaryFile(prefix="ktv_xlsx_rows_") as spool:
+        head: List[list] = []
+        width = 0
+        row_count = 0
+        last_row_with_data = -1
+        try:
+            for block in _iter_row_blocks(_iter_xlsx_rows(contents), chunk_size):
+                for row in block:
+                    if row:
+                        last_row_with_data = row_count
+                        width = max(width, len(row))
+                    # 多留一行：标题行在第 max_rows 行时检测多级表头需要下一行
+                    if row_count <= max_rows:
+                        head.append(row)
+                    row_count += 1
+                pickle.dump(block, spool, protocol=pickle.HIGHEST_PROTOCOL)
+        except ParserError:
+            raise
+        except Exception as exc:
+            # openpyxl 读取失败（加密、结构损坏等）时按原方式读取，由其给出诊断信息
+            logger.warning("xlsx 只读模式读取失败，改为整表读取 %s: %s", filename, exc)
+            spool.close()
+            yield from _iter_frame_chunks(contents, filename, chunk_size)
+            return
+
+        row_count = last_row_with_data + 1
+        if row_count == 0:
+            raise ParserError("空文件无法解析")
+
+        def pad(rows: List[list]) -> List[list]:
+            return [row + [""] * (width - len(row)) for row in rows]
+
+        # 表头定位与多级表头检测只依赖前几行
+        head = pad(head[:row_count])
+        header_row_index, detected_date = _locate_header_in_preview(
+            _build_dataframe_from_rows(head[:max_rows], header=None)
+        )
+        header_preview = _build_dataframe_from_rows(
+            head[header_row_index : header_row_index + 2], header=None
+        )
+        if _is_multi_level_header_preview(header_preview):
+            header_lines = 2
+        else:
+            header_lines = 1
+        header_block = head[header_row_index : header_row_index + header_lines]
+        header = list(range(header_lines)) if header_lines > 1 else 0
+        data_start = header_row_index + header_lines
+
+        def data_blocks() -> Iterator[List[list]]:
+            spool.seek(0)
+            position = 0
+            while position < row_count:
+                try:
+                    block = pickle.load(spool)
+                except EOFError:
+                    break
+                start = position
+                position += len(block)
+                block = block[max(0, data_start - start) : row_count - start]
+                if block:
+                    yield pad(block)
+
+        def read_chunks(dtype: Optional[dict] = None):
+            for block in data_blocks():
+                chunk = _build_dataframe_from_rows(
+                    header_block + block, header=header, dtype=dtype
+                )
+                kinds = [dtype.kind for dtype in chunk.dtypes]
+                nulls = chunk.isna().to_numpy()
+                chunk = _flatten_multi_index_columns(chunk)
+                yield _clean_dataframe(chunk, filter_summary=True), kinds, nulls
+
+        # 第一遍：收集非空列与列类型
+        columns: Optional[List[str]] = None
+        non_empty: Optional[np.ndarray] = None
+        has_null: Optional[np.ndarray] = None
+        kinds: List[Set[str]] = []
+        try:
+            for chunk, chunk_kinds, nulls in read_chunks():
+                if columns is None:
+                    columns = list(chunk.columns)
+                    non_empty = np.zeros(len(columns), dtype=bool)
+                    has_null = np.zeros(len(columns), dtype=bool)
+                    kinds = [set() for _ in columns]
+                non_empty |= chunk.notna().any(axis=0).to_numpy()
+                has_null |= nulls.any(axis=0)
+                has_value = ~nulls.all(axis=0)
+                for position, kind in enumerate(chunk_kinds):
+                    if has_value[position]:
+                        kinds[position].add(kind)
+        except (EmptyDataError, PandasParserError, ValueError, TypeError) as exc:
+            raise ParserError(f"解析 Excel 文件失败: {exc}") from exc
+
+        if columns is None:
+            # 只有表头没有数据
+            return
+
+        keep_positions = [position for position, keep in enumerate(non_empty) if keep]
+        final_columns = _dedupe_column_names(columns[position] for position in keep_positions)
+        dtypes = _excel_column_dtypes(kinds, has_null.tolist())
+        # datetime64 不能在构建时指定，构建后对全空分块补齐类型
+        datetime_positions = [
+            position for position, dtype in dtypes.items() if dtype == "datetime64[ns]"
+        ]
+        build_dtypes = {
+            position: dtype
+            for position, dtype in dtypes.items()
+            if dtype != "datetime64[ns]"
+        }
+
+        # 第二遍：固定列类型逐块产出
+        row_offset = 0
+        chunk_index = 0
+        try:
+            for chunk, _, _ in read_chunks(build_dtypes or None):
+                for position in datetime_positions:
+                    if chunk.dtypes.iloc[position].kind != "M":
+                        chunk.isetitem(
+                            position, chunk.iloc[:, position].astype("datetime64[ns]")
+                        )
+                chunk = chunk.iloc[:, keep_positions]
+                chunk.columns = final_columns
+                yield chunk, {
+                    "chunk_index": chunk_index,
+                    "row_offset": row_offset,
+                    "chunk_rows": len(chunk),
+                    "columns": final_columns,
+                    "detected_date": detected_date,
+                }
+                row_offset += len(chunk)
+                chunk_index += 1
+        except (EmptyDataError, PandasParserError, ValueError, TypeError) as exc:
+            raise ParserError(f"解析 Excel 文件失败: {exc}") from exc
+
+
+def _iter_frame_chunks(
+    contents: FileSource, filename: str, chunk_size: int
+) -> Iterator[Tuple[pd.DataFrame, dict]]:
+    """整表读取 Excel 后按 chunk_size 行分块产出（无法流式读取时的兜底）"""
+    try:
+        df, detected_date = _read_excel_single_pass(contents, filename)
+    except ParserError:
+        raise
+    except (EmptyDataError, ValueError, BadZipFile, OSError) as exc:
+        raise ParserError(f"解析文件失败: {exc}") from exc
+    df = _flatten_multi_index_columns(df)
+    df = _clean_dataframe(df, filter_summary=True)
+    df = _remove_empty_columns(df)
+
+    columns = list(df.columns)
+    for chunk_index, start in enumerate(range(0, len(df), chunk_size)):
+        chunk = df.iloc[start : start + chunk_size].reset_index(drop=True)
+        yield chunk, {
+            "chunk_index": chunk_index,
+            "row_offset": start,
+            "chunk_rows": len(chunk),
+            "columns": columns,
+            "detected_date": detected_date,
+        }
+
+
 def parse_and_validate(
-    contents: bytes, filename: str
+    contents: FileSource, filename: str
 ) -> Tuple[pd.DataFrame, str, dict]:
     """
     解析文件并返回基本验证信息
@@ -0,0 +1,167 @@
+"""
+动态支付方式明细维护
+
+fact_booking / fact_room 中未映射到固定 pay_* 列的支付方式保存在
+extra_payments / extra_info JSON 中。入库时在同一事务内把它们拆成
+fact_payment_line 行，统计查询直接按 pay_code 聚合。
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.facts import FactBooking, FactRoom, FactPaymentLine
+
+
+def normalize_payment_amount(value: Any) -> float:
+    """将任意数值类型归一为 float"""
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def merge_payment_payload(
+    target: Dict[str, float],
+    payload: Optional[Dict[str, Any]],
+    only_prefixed: bool,
+) -> None:
+    """将 payload 中的支付金额累加到 target（键统一为 pay_ 前缀）"""
+    if not isinstance(payload, dict):
+        return
+    for key, raw_value in payload.items():
+        if not isinstance(key, str):
+            continue
+        if only_prefixed and not key.startswith("pay_"):
+            continue
+        normalized_key = key if key.startswith("pay_") else f"pay_{key}"
+        amount = normalize_payment_amount(raw_value)
+        if amount == 0:
+            continue
+        target[normalized_key] = target.get(normalized_key, 0.0) + amount
+
+
+def collect_payment_amounts(extra_payments: Any, extra_info: Any) -> Dict[str, float]:
+    """
+    解析单行的动态支付金额
+
+    extra_payments 中的所有键都视为支付方式；extra_info 只取 pay_ 开头的键。
+    """
+    amounts: Dict[str, float] = {}
+    merge_payment_payload(amounts, extra_payments, only_prefixed=False)
+    merge_payment_payload(amounts, extra_info, only_prefixed=True)
+    return amounts
+
+
+class PaymentLineService:
+    """fact_payment_line 维护（均不提交事务）"""
+
+    # 含 extra_payments 的事实表
+    FACT_MODEL_MAP = {
+        "booking": FactBooking,
+        "room": FactRoom,
+    }
+
+    INSERT_CHUNK_SIZE = 2000
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _build_lines(self, table_type: str, rows) -> List[Dict[str, Any]]:
+        lines: List[Dict[str, Any]] = []
+        for fact_id, batch_id, store_id, biz_date, extra_payments, extra_info in rows:
+            amounts = collect_payment_amounts(extra_payments, extra_info)
+            for pay_code, amount in amounts.items():
+                lines.append(
+                    {
+                        "fact_table": table_type,
+                        "fact_id": fact_id,
+                        "batch_id": batch_id,
+                        "store_id": store_id,
+                        "biz_date": biz_date,
+                        "pay_code": pay_code[:100],
+                        "amount": round(amount, 2),
+                    }
+                )
+        return lines
+
+    def _insert_lines(self, lines: List[Dict[str, Any]]) -> None:
+        statement = insert(FactPaymentLine.__table__)
+        for start in range(0, len(lines), self.INSERT_CHUNK_SIZE):
+            self.db.execute(statement, lines[start:start + self.INSERT_CHUNK_SIZE])
+
+    def _select_facts(self, model):
+        return (
+            select(
+                model.id,
+                model.batch_id,
+                model.store_id,
+                model.biz_date,
+                model.extra_payments,
+                model.extra_info,
+            )
+            .where(or_(model.extra_payments.isnot(None), model.extra_info.isnot(None)))
+        )
+
+    def write_for_batch(self, table_type: str, batch_id: int) -> int:
+        """
+        为刚写入的批次生成支付明细行
+
+        按主键分段读取事实行，大批次（流式导入）时内存不随批次大小增长。
+
+        Returns:
+            int: 写入的行数
+        """
+        model = self.FACT_MODEL_MAP.get(table_type)
+        if model is None:
+            return 0
+        return self._write_lines(table_type, model, model.batch_id == batch_id)
+
+    def delete_where(self, table_type: str, **filters: Any) -> None:
+        """按 batch_id / store_id / biz_date 删除支付明细，与事实表删除条件一致"""
+        if table_type not in self.FACT_MODEL_MAP:
+            return
+        conditions = [FactPaymentLine.fact_table == table_type]
+        conditions.extend(
+            getattr(FactPaymentLine, name) == value for name, value in filters.items()
+        )
+        self.db.execute(delete(FactPaymentLine).where(*conditions))
+
+    def rebuild(self, table_type: str) -> None:
+        """全量重建某张事实表的支付明细（用于初始化或修复）"""
+        model = self.FACT_MODEL_MAP.get(table_type)
+        if model is None:
+            return
+        self.delete_where(table_type)
+        self._write_lines(table_type, model)
+
+    def _write_lines(self, table_type: str, model, *conditions: Any) -> int:
+        """按主键分段读取满足条件的事实行，生成并写入支付明细"""
+        written = 0
+        last_id = 0
+        while True:
+            rows = self.db.execute(
+                self._select_facts(model)
+                .where(model.id > last_id, *conditions)
+                .order_by(model.id)
+                .limit(self.INSERT_CHUNK_SIZE)
+            ).all()
+            if not rows:
+                break
+            lines = self._build_lines(table_type, rows)
+            self._insert_lines(lines)
+            written += len(lines)
+            last_id = rows[-1][0]
+        return written
+
+    def rebuild_all(self) -> None:
+        for table_type in self.FACT_MODEL_MAP:
+            self.rebuild(table_type)
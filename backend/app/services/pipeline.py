@@ -0,0 +1,395 @@
+"""
+上传流水线执行器
+
+把解析/清洗（CPU 密集）和入库（DB 密集）从事件循环中移出：
+- 解析 + 清洗：进程池执行，pandas 计算不受 GIL 限制
+- 入库：线程池执行，阻塞式 SQLAlchemy 调用不占用事件循环
+
+每个阶段都有并发上限和等待队列上限，队列已满或等待超时时抛出
+PipelineBusyError，由 API 层转换为 503。
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from app.core.config import get_settings
+from app.services.cleaner import CleanerService, ValidationAccumulator, ValidationResult
+from app.services.parser import (
+    FileSource,
+    detect_report_type,
+    iter_csv_chunks,
+    iter_excel_chunks,
+    read_excel_file,
+)
+from app.services.parse_cache import get_parse_cache
+from app.services.session_store import write_record_spool
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# 可被 Cleaner 处理的报表类型（与 app.schemas.TableType 保持一致）
+SUPPORTED_REPORT_TYPES = ("booking", "room", "sales", "member_change")
+
+
+class PipelineBusyError(RuntimeError):
+    """流水线阶段已满，无法接收新任务"""
+
+
+class PipelineTaskError(Exception):
+    """流水线任务的业务失败，status_code 为对应的 HTTP 状态码"""
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# ============================================================
+# 进程池任务（必须是模块级函数，才能被 pickle 到子进程）
+# ============================================================
+
+
+def parse_and_clean_file(
+    contents: FileSource,
+    filename: str,
+    fallback_type: str,
+    content_hash: Optional[str] = None,
+) -> Tuple[str, List[Dict], ValidationResult]:
+    """
+    解析 + 类型识别 + 清洗，在工作进程中执行
+
+    只把清洗后的记录和校验结果传回主进程，DataFrame 不跨进程传输。
+    上传接口传入已落盘的文件路径，文件内容不经 pickle 复制到工作进程。
+    传入 content_hash 时先查解析缓存，同一内容重复上传跳过转换与 pandas 解析。
+
+    Args:
+        contents: 文件路径或文件二进制内容
+        filename: 原始文件名
+        fallback_type: 内容识别失败时使用的报表类型（按文件名推断）
+        content_hash: 文件内容的 SHA-256（可选）
+
+    Returns:
+        Tuple[str, List[Dict], ValidationResult]: (报表类型, 清洗后的数据, 校验结果)
+    """
+    cache = get_parse_cache() if content_hash and settings.PARSE_CACHE_ENABLED else None
+    csv_engine = settings.CSV_PARSE_ENGINE
+    cached = cache.get_frame(content_hash, filename, csv_engine) if cache else None
+    if cached is not None:
+        df, detected_date = cached
+    else:
+        df, detected_date = read_excel_file(contents, filename, csv_engine=csv_engine)
+        if cache:
+            cache.put_frame(content_hash, filename, df, detected_date, csv_engine)
+
+    report_type = detect_report_type(df, filename)
+    if report_type not in SUPPORTED_REPORT_TYPES:
+        report_type = fallback_type
+
+    cleaner = CleanerService()
+    cleaned_data, validation = cleaner.clean_data(
+        df, report_type, filename=filename, detected_date=detected_date
+    )
+    return report_type, cleaned_data, validation
+
+
+def parse_and_clean_chunks(
+    contents: FileSource,
+    filename: str,
+    fallback_type: str,
+    spool_path: str,
+    chunk_rows: int,
+) -> Tuple[str, List[Dict], ValidationResult, Dict[str, Any]]:
+    """
+    大 CSV / xlsx 的流式解析 + 清洗，在工作进程中执行
+
+    CSV 由 iter_csv_chunks、xlsx 由 iter_excel_chunks（openpyxl 只读模式）
+    按 chunk_rows 行一块读取，逐块清洗，清洗结果逐块写入记录文件 spool_path，
+    只把前几行预览和合并后的校验结果传回主进程，内存占用与文件大小无关。
+    报表类型按第一块的列名识别（各块列名一致）。
+
+    Returns:
+        Tuple: (报表类型, 预览数据, 校验结果, 流式信息)
+            流式信息包含 record_spool（记录文件路径）与 store_names
+            （会员变动表的原始门店名称，按首次出现顺序）
+    """
+    cleaner = CleanerService()
+    state: Dict[str, Any] = {"report_type": None, "accumulator": None, "preview": []}
+
+    iter_chunks = iter_csv_chunks if filename.lower().endswith(".csv") else iter_excel_chunks
+
+    def cleaned_chunks() -> Iterator[List[Dict]]:
+        for chunk, info in iter_chunks(contents, filename, chunk_size=chunk_rows):
+            if state["report_type"] is None:
+                report_type = detect_report_type(chunk, filename)
+                if report_type not in SUPPORTED_REPORT_TYPES:
+                    report_type = fallback_type
+                state["report_type"] = report_type
+                state["accumulator"] = ValidationAccumulator(report_type, filename)
+            records, validation = cleaner.clean_data(
+                chunk,
+                state["report_type"],
+                filename=filename,
+                detected_date=info["detected_date"],
+            )
+            state["accumulator"].add(validation, records, info["row_offset"])
+            if len(state["preview"]) < 5:
+                state["preview"].extend(records[: 5 - len(state["preview"])])
+            yield records
+
+    write_record_spool(spool_path, cleaned_chunks())
+
+    if state["report_type"] is None:
+        # 只有表头没有数据行：按空表清洗，保持与整文件解析一致的校验结果
+        state["report_type"] = fallback_type
+        _, validation = cleaner.clean_data(
+            pd.DataFrame(), fallback_type, filename=filename
+        )
+        accumulator = ValidationAccumulator(fallback_type, filename)
+        accumulator.add(validation, [], 0)
+        state["accumulator"] = accumulator
+
+    accumulator: ValidationAccumulator = state["accumulator"]
+    stream_info = {
+        "record_spool": spool_path,
+        "store_names": list(accumulator.store_names),
+    }
+    return state["report_type"], state["preview"], accumulator.result(), stream_info
+
+
+# ============================================================
+# 阶段并发控制
+# ============================================================
+
+
+class _StageLimiter:
+    """
+    单个阶段的准入控制
+
+    最多 max_running 个任务同时执行，最多 max_waiting 个任务排队等待，
+    超出队列上限或等待超过 timeout 秒的请求直接拒绝。
+    请求协程（acquire）和后台任务线程（acquire_sync）共用同一个线程信号量和计数，
+    同步、异步两种模式受同一并发上限约束。
+    """
+
+    # 协程排队时轮询信号量的间隔（秒），不占用线程、可随请求取消
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, name: str, max_running: int, max_waiting: int, timeout: float):
+        self.name = name
+        self.max_running = max(1, max_running)
+        self.max_waiting = max(0, max_waiting)
+        self.timeout = timeout
+        self.waiting = 0
+        self.running = 0
+        self._semaphore = threading.Semaphore(self.max_running)
+        self._lock = threading.Lock()
+
+    def _try_acquire(self) -> bool:
+        if not self._semaphore.acquire(blocking=False):
+            return False
+        with self._lock:
+            self.running += 1
+        return True
+
+    def _enter_queue(self) -> None:
+        with self._lock:
+            if self.waiting >= self.max_waiting:
+                raise PipelineBusyError(f"{self.name}任务过多，请稍后重试")
+            self.waiting += 1
+
+    def _leave_queue(self, acquired: bool) -> None:
+        with self._lock:
+            self.waiting -= 1
+            if acquired:
+                self.running += 1
+
+    async def acquire(self) -> None:
+        if self._try_acquire():
+            return
+        self._enter_queue()
+        acquired = False
+        try:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.timeout
+            while not self._semaphore.acquire(blocking=False):
+                if loop.time() >= deadline:
+                    raise PipelineBusyError(f"{self.name}排队超时，请稍后重试")
+                await asyncio.sleep(self.POLL_INTERVAL)
+            acquired = True
+        finally:
+            self._leave_queue(acquired)
+
+    def acquire_sync(self) -> None:
+        """阻塞等待执行名额（后台任务线程中调用）"""
+        if self._try_acquire():
+            return
+        self._enter_queue()
+        acquired = False
+        try:
+            acquired = self._semaphore.acquire(timeout=self.timeout)
+            if not acquired:
+                raise PipelineBusyError(f"{self.name}排队超时，请稍后重试")
+        finally:
+            self._leave_queue(acquired)
+
+    def release(self) -> None:
+        with self._lock:
+            self.running -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "running": self.running,
+                "waiting": self.waiting,
+                "max_running": self.max_running,
+                "max_waiting": self.max_waiting,
+            }
+
+
+_parse_limiter = _StageLimiter(
+    "文件解析",
+    settings.UPLOAD_PARSE_WORKERS,
+    settings.UPLOAD_MAX_QUEUED,
+    settings.UPLOAD_QUEUE_TIMEOUT,
+)
+_import_limiter = _StageLimiter(
+    "数据入库",
+    settings.UPLOAD_IMPORT_WORKERS,
+    settings.UPLOAD_MAX_QUEUED,
+    settings.UPLOAD_QUEUE_TIMEOUT,
+)
+
+_pool_lock = threading.Lock()
+_parse_pool: Optional[Executor] = None
+_import_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_parse_pool() -> Executor:
+    """懒加载解析进程池；UPLOAD_PARSE_USE_PROCESSES=False 时退化为线程池"""
+    global _parse_pool
+    with _pool_lock:
+        if _parse_pool is None:
+            workers = max(1, settings.UPLOAD_PARSE_WORKERS)
+            if settings.UPLOAD_PARSE_USE_PROCESSES:
+                # spawn：避免 fork 继承事件循环线程和数据库连接
+                _parse_pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                _parse_pool = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="upload-parse"
+                )
+        return _parse_pool
+
+
+def _reset_parse_pool(broken: Executor) -> None:
+    """工作进程异常退出后丢弃损坏的进程池，下次调用时重建"""
+    global _parse_pool
+    with _pool_lock:
+        if _parse_pool is broken:
+            _parse_pool = None
+    broken.shutdown(wait=False)
+
+
+def _get_import_pool() -> ThreadPoolExecutor:
+    global _import_pool
+    with _pool_lock:
+        if _import_pool is None:
+            _import_pool = ThreadPoolExecutor(
+                max_workers=max(1, settings.UPLOAD_IMPORT_WORKERS),
+                thread_name_prefix="upload-import",
+            )
+        return _import_pool
+
+
+async def run_parse_task(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    在解析池中执行 func(*args)
+
+    func 及其参数/返回值需要可 pickle（进程池模式）。
+    """
+    await _parse_limiter.acquire()
+    try:
+        pool = _get_parse_pool()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(pool, func, *args)
+        except BrokenProcessPool:
+            logger.warning("解析进程池已损坏，重建后重试一次")
+            _reset_parse_pool(pool)
+            return await loop.run_in_executor(_get_parse_pool(), func, *args)
+    finally:
+        _parse_limiter.release()
+
+
+def run_parse_task_sync(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    在解析池中执行 func(*args) 并阻塞等待结果
+
+    供后台导入任务线程使用；与 run_parse_task 共用 _parse_limiter 的并发和排队上限，
+    阶段已满时抛出 PipelineBusyError。
+    """
+    _parse_limiter.acquire_sync()
+    try:
+        pool = _get_parse_pool()
+        try:
+            return pool.submit(func, *args).result()
+        except BrokenProcessPool:
+            logger.warning("解析进程池已损坏，重建后重试一次")
+            _reset_parse_pool(pool)
+            return _get_parse_pool().submit(func, *args).result()
+    finally:
+        _parse_limiter.release()
+
+
+async def run_import_task(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """在入库线程池中执行 func(*args, **kwargs)"""
+    await _import_limiter.acquire()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_import_pool(), lambda: func(*args, **kwargs)
+        )
+    finally:
+        _import_limiter.release()
+
+
+def run_import_task_sync(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    在当前线程执行入库 func(*args, **kwargs)
+
+    供后台导入任务线程使用；与 run_import_task 共用 _import_limiter 的并发和排队上限。
+    """
+    _import_limiter.acquire_sync()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _import_limiter.release()
+
+
+def get_pipeline_stats() -> Dict[str, Dict[str, int]]:
+    """各阶段当前运行/排队数量（含同步请求和后台任务）"""
+    return {
+        "parse": _parse_limiter.stats(),
+        "import": _import_limiter.stats(),
+    }
+
+
+def shutdown_pipeline_executors() -> None:
+    """应用关闭时释放进程池/线程池"""
+    global _parse_pool, _import_pool
+    with _pool_lock:
+        pools = [p for p in (_parse_pool, _import_pool) if p is not None]
+        _parse_pool = None
+        _import_pool = None
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
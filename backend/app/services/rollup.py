@@ -0,0 +1,331 @@
+"""
+日汇总表维护服务
+
+按 (门店, 营业日期) 从明细事实表重算 agg_*_daily 中受影响的行：
+先删除这些键的汇总行，再 INSERT ... SELECT ... GROUP BY 写回。
+包厢表另外维护 agg_room_hourly：占用分钟需按钟点摊分，取出明细后用 NumPy 计算再写回。
+只在入库/删除批次的同一事务中调用，汇总表与明细表一起提交或回滚。
+"""
+
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import case, delete, func, insert, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.facts import FactBooking, FactRoom, FactSales, FactMemberChange
+from app.models.rollups import (
+    AggBookingDaily,
+    AggRoomDaily,
+    AggSalesDaily,
+    AggMemberChangeDaily,
+    AggRoomHourly,
+)
+from app.services.occupancy import clock_hours, session_bounds, spread_hourly_minutes
+
+
+RollupKey = Tuple[int, Any]
+
+
+def _sum(column):
+    return func.coalesce(func.sum(column), 0)
+
+
+def _booking_columns() -> Dict[str, Any]:
+    m = FactBooking
+    columns = {
+        "row_count": func.count(m.id),
+        "booking_qty": _sum(m.booking_qty),
+    }
+    for name in (
+        "sales_amount",
+        "receivable_amount",
+        "actual_amount",
+        "base_performance",
+        "gift_amount",
+        "discount_amount",
+        "credit_amount",
+        "free_amount",
+        "round_off_amount",
+        "service_fee",
+        "adjustment_amount",
+        "pay_wechat",
+        "pay_alipay",
+        "pay_cash",
+        "pay_pos",
+        "pay_member",
+        "pay_douyin",
+        "pay_meituan",
+        "pay_scan",
+        "pay_deposit",
+    ):
+        columns[name] = _sum(getattr(m, name))
+    return columns
+
+
+def _room_columns() -> Dict[str, Any]:
+    m = FactRoom
+    columns = {"order_count": func.count(m.id)}
+    for name in (
+        "receivable_amount",
+        "bill_total",
+        "actual_amount",
+        "min_consumption",
+        "min_consumption_diff",
+        "gift_amount",
+        "free_amount",
+        "credit_amount",
+        "room_discount",
+        "beverage_discount",
+        "duration_min",
+    ):
+        columns[name] = _sum(getattr(m, name))
+    # AVG(bill_total / min_consumption) 拆为 分子和 + 非空计数
+    rate_expr = case(
+        (m.min_consumption > 0, m.bill_total * 1.0 / m.min_consumption),
+        else_=None,
+    )
+    columns["low_consume_rate_sum"] = _sum(rate_expr)
+    columns["low_consume_rate_count"] = func.count(rate_expr)
+    return columns
+
+
+def _sales_columns() -> Dict[str, Any]:
+    m = FactSales
+    # 与 StatsService 保持一致：酒水指标使用 SUM（不做 0 兜底）
+    return {
+        "row_count": func.count(m.id),
+        "sales_qty": func.sum(m.sales_qty),
+        "sales_amount": func.sum(m.sales_amount),
+        "gift_qty": func.sum(m.gift_qty),
+        "gift_amount": func.sum(m.gift_amount),
+        "cost_total": func.sum(m.cost_total),
+        "profit": func.sum(m.profit),
+        "profit_rate_sum": func.sum(m.profit_rate),
+        "profit_rate_count": func.count(m.profit_rate),
+    }
+
+
+def _member_change_columns() -> Dict[str, Any]:
+    m = FactMemberChange
+    columns = {"row_count": func.count(m.id)}
+    for name in (
+        "recharge_real_income",
+        "room_amount_principal",
+        "drink_amount_principal",
+        "room_amount_gift",
+        "drink_amount_gift",
+        "balance_total",
+        "points_delta",
+        "growth_delta",
+    ):
+        columns[name] = _sum(getattr(m, name))
+    columns["recharge_count"] = func.sum(
+        case((m.change_type.like("%充值%"), 1), else_=0)
+    )
+    return columns
+
+
+class RollupService:
+    """日汇总表维护"""
+
+    # table_type -> (事实表, 汇总表, 汇总列定义)
+    ROLLUP_MAP = {
+        "booking": (FactBooking, AggBookingDaily, _booking_columns),
+        "room": (FactRoom, AggRoomDaily, _room_columns),
+        "sales": (FactSales, AggSalesDaily, _sales_columns),
+        "member_change": (FactMemberChange, AggMemberChangeDaily, _member_change_columns),
+    }
+
+    # 单条 (store_id, biz_date) IN 查询的最大键数
+    KEY_CHUNK_SIZE = 500
+    INSERT_CHUNK_SIZE = 2000
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @classmethod
+    def get_rollup_model(cls, table_type: str):
+        entry = cls.ROLLUP_MAP.get(table_type)
+        return entry[1] if entry else None
+
+    @staticmethod
+    def _normalize_key(store_id: Any, biz_date: Any) -> Optional[RollupKey]:
+        if store_id is None or biz_date is None:
+            return None
+        if isinstance(biz_date, str):
+            try:
+                biz_date = date.fromisoformat(biz_date[:10])
+            except ValueError:
+                return None
+        return int(store_id), biz_date
+
+    def collect_keys(self, records: Iterable[Dict[str, Any]]) -> Set[RollupKey]:
+        """从待入库记录中提取受影响的 (store_id, biz_date)"""
+        keys: Set[RollupKey] = set()
+        for record in records:
+            key = self._normalize_key(record.get("store_id"), record.get("biz_date"))
+            if key is not None:
+                keys.add(key)
+        return keys
+
+    def keys_for_batch(self, table_type: str, batch_id: int) -> Set[RollupKey]:
+        """查询某批次明细覆盖的 (store_id, biz_date)，需在删除明细前调用"""
+        entry = self.ROLLUP_MAP.get(table_type)
+        if entry is None:
+            return set()
+        fact = entry[0]
+        rows = self.db.execute(
+            select(fact.store_id, fact.biz_date)
+            .where(fact.batch_id == batch_id)
+            .distinct()
+        ).all()
+        return {
+            key
+            for key in (self._normalize_key(store_id, biz_date) for store_id, biz_date in rows)
+            if key is not None
+        }
+
+    def refresh(self, table_type: str, keys: Iterable[RollupKey]) -> int:
+        """
+        重算指定 (store_id, biz_date) 的汇总行（不提交事务）
+
+        Returns:
+            int: 重算的键数量
+        """
+        entry = self.ROLLUP_MAP.get(table_type)
+        if entry is None:
+            return 0
+        fact, rollup, columns_factory = entry
+
+        key_list: List[RollupKey] = sorted(set(keys))
+        if not key_list:
+            return 0
+
+        columns = columns_factory()
+        target_columns = ["store_id", "biz_date", *columns.keys()]
+        for start in range(0, len(key_list), self.KEY_CHUNK_SIZE):
+            chunk = key_list[start:start + self.KEY_CHUNK_SIZE]
+            self.db.execute(
+                delete(rollup).where(
+                    tuple_(rollup.store_id, rollup.biz_date).in_(chunk)
+                )
+            )
+            source = (
+                select(fact.store_id, fact.biz_date, *columns.values())
+                .where(tuple_(fact.store_id, fact.biz_date).in_(chunk))
+                .group_by(fact.store_id, fact.biz_date)
+            )
+            self.db.execute(
+                insert(rollup).from_select(target_columns, source)
+            )
+            if table_type == "room":
+                self._refresh_room_hourly(chunk)
+        return len(key_list)
+
+    def _refresh_room_hourly(self, keys: List[RollupKey]) -> None:
+        """重算指定 (store_id, biz_date) 的 agg_room_hourly 行"""
+        fact = FactRoom
+        self.db.execute(
+            delete(AggRoomHourly).where(
+                tuple_(AggRoomHourly.store_id, AggRoomHourly.biz_date).in_(keys)
+            )
+        )
+        source = select(
+            fact.store_id,
+            fact.room_id,
+            fact.biz_date,
+            func.coalesce(fact.open_time, fact.close_time),
+            fact.close_time,
+            fact.duration_min,
+            fact.receivable_amount,
+        ).where(
+            tuple_(fact.store_id, fact.biz_date).in_(keys),
+            or_(fact.open_time.isnot(None), fact.close_time.isnot(None)),
+        )
+
+        rows = self.db.execute(source).all()
+        if not rows:
+            return
+        store_ids, room_ids, biz_dates, starts, closes, durations, amounts = zip(*rows)
+
+        # (门店, 包厢, 营业日期) 分组下标
+        group_index: Dict[Tuple[Any, Any, Any], int] = {}
+        groups = np.fromiter(
+            (
+                group_index.setdefault(key, len(group_index))
+                for key in zip(store_ids, room_ids, biz_dates)
+            ),
+            dtype="int64",
+            count=len(rows),
+        )
+        group_count = len(group_index)
+        size = group_count * 24
+
+        start_arr, end_arr, valid = session_bounds(starts, closes, durations)
+        # orders / gmv 按开始时间所在钟点归属
+        order_index = groups * 24 + clock_hours(start_arr)
+        orders = np.bincount(order_index, minlength=size).reshape(group_count, 24)
+        gmv = np.bincount(
+            order_index,
+            weights=np.array([float(a or 0) for a in amounts]),
+            minlength=size,
+        ).reshape(group_count, 24)
+        occupied = spread_hourly_minutes(
+            start_arr[valid], end_arr[valid], groups[valid], group_count
+        )
+
+        records: List[Dict[str, Any]] = []
+        for (store_id, room_id, biz_date), index in group_index.items():
+            for hour in np.flatnonzero((orders[index] > 0) | (occupied[index] > 0)):
+                records.append(
+                    {
+                        "store_id": store_id,
+                        "room_id": room_id,
+                        "biz_date": biz_date,
+                        "hour": int(hour),
+                        "orders": int(orders[index, hour]),
+                        "gmv": round(float(gmv[index, hour]), 2),
+                        "occupied_minutes": round(float(occupied[index, hour]), 4),
+                    }
+                )
+        for start in range(0, len(records), self.INSERT_CHUNK_SIZE):
+            self.db.execute(
+                insert(AggRoomHourly), records[start:start + self.INSERT_CHUNK_SIZE]
+            )
+
+    def rebuild(self, table_type: str) -> None:
+        """全量重建某张汇总表（用于初始化或修复，不提交事务）"""
+        entry = self.ROLLUP_MAP.get(table_type)
+        if entry is None:
+            return
+        fact, rollup, columns_factory = entry
+        columns = columns_factory()
+        self.db.execute(delete(rollup))
+        source = select(fact.store_id, fact.biz_date, *columns.values()).group_by(
+            fact.store_id, fact.biz_date
+        )
+        self.db.execute(
+            insert(rollup).from_select(
+                ["store_id", "biz_date", *columns.keys()], source
+            )
+        )
+        if table_type == "room":
+            self.rebuild_room_hourly()
+
+    def rebuild_room_hourly(self) -> None:
+        """全量重建 agg_room_hourly（按键分块摊分，避免一次载入全部明细）"""
+        self.db.execute(delete(AggRoomHourly))
+        key_list = [
+            tuple(key)
+            for key in self.db.execute(
+                select(FactRoom.store_id, FactRoom.biz_date).distinct()
+            ).all()
+        ]
+        for start in range(0, len(key_list), self.KEY_CHUNK_SIZE):
+            self._refresh_room_hourly(key_list[start:start + self.KEY_CHUNK_SIZE])
+
+    def rebuild_all(self) -> None:
+        for table_type in self.ROLLUP_MAP:
+            self.rebuild(table_type)
@@ -0,0 +1,265 @@
+"""
+解析会话存储
+
+/upload/parse 的结果（含完整 cleaned_data）需要保留到 /upload/confirm 或 /upload/cancel。
+会话以 pickle 文件落盘到 UPLOAD_DIR/sessions，任意 worker 进程都能读取；
+同时在进程内保留一份 LRU 热缓存，受内存预算约束。磁盘文件是唯一可信来源：
+热缓存记录文件的 inode 与 mtime（每次写入都是改名替换，inode 随之变化），
+读取时文件已被删除（其他进程确认/取消）则返回 None，文件被替换（其他进程更新了会话）
+则重新从磁盘加载。
+
+- TTL：超过 PARSE_SESSION_TTL 秒未确认的会话视为过期，读取时和定时清理时删除
+- 内存预算：热缓存按 pickle 序列化大小计，超过 PARSE_SESSION_MEMORY_BUDGET 时淘汰最久未用的会话
+  （只淘汰内存副本，磁盘文件保留到过期）。注意这是估算值：反序列化后的 dict/str 对象
+  远大于序列化结果，清洗记录实测约为 5 倍，配置预算时需按此折算
+
+大 CSV / xlsx 走流式解析时，清洗结果不放进会话，而是按分块追加写入同目录的
+记录文件（{session_id}.records.pkl），入库时逐块读回；记录文件随会话一起删除/过期。
+"""
+
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+_SESSION_SUFFIX = ".session.pkl"
+_SPOOL_SUFFIX = ".records.pkl"
+
+
+class ParseSessionStore:
+    """带 TTL / 内存预算 / LRU 淘汰的解析会话存储"""
+
+    def __init__(self, directory: str, ttl_seconds: int, memory_budget: int):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.memory_budget = memory_budget
+        # session_id -> (created_at, size, payload, 文件标识 (st_ino, st_mtime_ns))
+        self._memory: "OrderedDict[str, Tuple[float, int, Dict[str, Any], Tuple[int, int]]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, session_id: str) -> str:
+        # session_id 来自客户端，只取文件名部分防止路径穿越
+        safe_id = os.path.basename(session_id)
+        return os.path.join(self.directory, f"{safe_id}{_SESSION_SUFFIX}")
+
+    def spool_path(self, session_id: str) -> str:
+        """会话对应的分块记录文件路径"""
+        os.makedirs(self.directory, exist_ok=True)
+        safe_id = os.path.basename(session_id)
+        return os.path.join(self.directory, f"{safe_id}{_SPOOL_SUFFIX}")
+
+    def _is_expired(self, created_at: float) -> bool:
+        return time.time() - created_at > self.ttl_seconds
+
+    def _remember(
+        self,
+        session_id: str,
+        created_at: float,
+        size: int,
+        payload: Dict[str, Any],
+        stamp: Tuple[int, int],
+    ) -> None:
+        """放入热缓存并按内存预算淘汰（调用方需持有 _lock）"""
+        self._forget(session_id)
+        if size > self.memory_budget:
+            return
+        self._memory[session_id] = (created_at, size, payload, stamp)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_budget and self._memory:
+            _, (_, evicted_size, _, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    def _forget(self, session_id: str) -> None:
+        entry = self._memory.pop(session_id, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+
+    def set(self, session_id: str, payload: Dict[str, Any]) -> None:
+        """
+        保存/覆盖会话
+
+        先原子写入磁盘，再更新热缓存；覆盖时保留原创建时间，TTL 不因修改而延长。
+        """
+        with self._lock:
+            entry = self._memory.get(session_id)
+        created_at = entry[0] if entry else payload.get("_created_ts") or time.time()
+        payload["_created_ts"] = created_at
+
+        blob = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(session_id)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+            stamp = self._stamp(os.stat(path))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self._remember(session_id, created_at, len(blob), payload, stamp)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """读取会话；不存在或已过期返回 None"""
+        path = self._path(session_id)
+        with self._lock:
+            entry = self._memory.get(session_id)
+        if entry is not None and not self._is_expired(entry[0]):
+            # 热缓存只在磁盘文件未被删除、未被其他进程改写时可用
+            try:
+                stamp = self._stamp(os.stat(path))
+            except FileNotFoundError:
+                stamp = None
+            with self._lock:
+                if stamp is None:
+                    self._forget(session_id)
+                    return None
+                if stamp == entry[3] and self._memory.get(session_id) is entry:
+                    self._memory.move_to_end(session_id)
+                    return entry[2]
+        if entry is not None:
+            with self._lock:
+                self._forget(session_id)
+
+        try:
+            with open(path, "rb") as f:
+                stamp = self._stamp(os.fstat(f.fileno()))
+                blob = f.read()
+            payload = pickle.loads(blob)
+        except FileNotFoundError:
+            return None
+        except Exception as exc:
+            logger.warning("解析会话 %s 读取失败: %s", session_id, exc)
+            self._remove_session_files(session_id)
+            return None
+
+        created_at = payload.get("_created_ts") or os.path.getmtime(path)
+        if self._is_expired(created_at):
+            self._remove_session_files(session_id)
+            return None
+
+        with self._lock:
+            self._remember(session_id, created_at, len(blob), payload, stamp)
+        return payload
+
+    def delete(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """删除会话并返回其内容（不存在返回 None）"""
+        payload = self.get(session_id)
+        with self._lock:
+            self._forget(session_id)
+        self._remove_session_files(session_id)
+        return payload
+
+    def purge_expired(self) -> int:
+        """删除所有过期会话文件，返回删除数量"""
+        with self._lock:
+            expired_ids = [
+                session_id
+                for session_id, (created_at, _, _, _) in self._memory.items()
+                if self._is_expired(created_at)
+            ]
+            for session_id in expired_ids:
+                self._forget(session_id)
+
+        if not os.path.isdir(self.directory):
+            return 0
+
+        removed = 0
+        cutoff = time.time() - self.ttl_seconds
+        for name in os.listdir(self.directory):
+            if not name.endswith((_SESSION_SUFFIX, _SPOOL_SUFFIX)):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                # 会话文件只在创建和少量字段更新时写入，mtime 可近似为创建时间
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "memory_sessions": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_budget": self.memory_budget,
+            }
+
+    @staticmethod
+    def _stamp(stat: os.stat_result) -> Tuple[int, int]:
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _remove_session_files(self, session_id: str) -> None:
+        self._remove_file(self._path(session_id))
+        safe_id = os.path.basename(session_id)
+        self._remove_file(os.path.join(self.directory, f"{safe_id}{_SPOOL_SUFFIX}"))
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            logger.warning("删除解析会话文件失败 %s: %s", path, exc)
+
+
+def write_record_spool(path: str, chunks: Iterable[List[Dict[str, Any]]]) -> int:
+    """
+    把清洗结果按分块依次 pickle 到记录文件，返回总行数
+
+    chunks 可以是边清洗边产出的生成器，内存中始终只有一个分块。
+    """
+    rows = 0
+    try:
+        with open(path, "wb") as f:
+            for records in chunks:
+                pickle.dump(records, f, protocol=pickle.HIGHEST_PROTOCOL)
+                rows += len(records)
+    except BaseException:
+        ParseSessionStore._remove_file(path)
+        raise
+    return rows
+
+
+def iter_record_spool(path: str) -> Iterator[List[Dict[str, Any]]]:
+    """按写入顺序逐块读回记录文件"""
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+_store: Optional[ParseSessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_parse_session_store() -> ParseSessionStore:
+    """获取进程级会话存储单例"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            settings = get_settings()
+            _store = ParseSessionStore(
+                directory=os.path.join(settings.UPLOAD_DIR, "sessions"),
+                ttl_seconds=settings.PARSE_SESSION_TTL,
+                memory_budget=settings.PARSE_SESSION_MEMORY_BUDGET,
+            )
+        return _store
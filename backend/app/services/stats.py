@@ -4,15 +4,33 @@
 根据表类型、时间范围、维度和粒度进行实时聚合
 """
 
-from datetime import date, datetime, timedelta
-from decimal import Decimal
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
 from typing import List, Dict, Any, Optional, Tuple
 
-from sqlalchemy import func, select, case, or_, and_, literal_column, over
+from sqlalchemy import func, select, case, and_, or_, false, literal_column
 from sqlalchemy.orm import Session
 
-from app.models.facts import FactBooking, FactRoom, FactSales, FactMemberChange
+from app.core.config import get_settings
+from app.models.facts import (
+    FactBooking,
+    FactRoom,
+    FactSales,
+    FactMemberChange,
+    FactPaymentLine,
+)
 from app.models.dims import DimStore, DimEmployee, DimProduct, DimRoom
+from app.models.rollups import (
+    AggBookingDaily,
+    AggRoomDaily,
+    AggSalesDaily,
+    AggMemberChangeDaily,
+    AggRoomHourly,
+)
+from app.services.occupancy import session_bounds, spread_hourly_minutes
+from app.services.stats_cache import get_data_version, get_stats_cache
 
 
 class StatsService:
@@ -23,6 +41,8 @@ class StatsService:
     MAX_DAY_SPAN = 365
     DEFAULT_PAGE_SIZE = 20
     MAX_PAGE_SIZE = 200
+    # total 计数方式：exact 精确 COUNT；none 不单独计数（能从结果推出时仍返回精确值）
+    COUNT_MODES = ("exact", "none")
     DEFAULT_TOP_N = 50
     MAX_TOP_N = 200
 
@@ -33,7 +53,16 @@ class StatsService:
         "member_change": FactMemberChange,
     }
 
-    MAX_HOURLY_UTILIZATION_DAY_SPAN = 62
+    # 日汇总表（门店 × 营业日期），仅能回答以下维度的查询
+    ROLLUP_TABLE_MAP = {
+        "booking": AggBookingDaily,
+        "room": AggRoomDaily,
+        "sales": AggSalesDaily,
+        "member_change": AggMemberChangeDaily,
+    }
+    ROLLUP_DIMENSIONS = ("date", "store")
+
+    MAX_HOURLY_UTILIZATION_DAY_SPAN = 366
 
     @staticmethod
     def _safe_sum(expr):
@@ -42,6 +71,35 @@ class StatsService:
 
     def __init__(self, db: Session):
         self.db = db
+        settings = get_settings()
+        self.use_rollup = settings.STATS_USE_ROLLUP
+        self.use_cache = settings.STATS_CACHE_ENABLED
+        self._cache = get_stats_cache()
+
+    def _cached_call(
+        self,
+        name: str,
+        table: str,
+        version_store_id: Optional[int],
+        params: Tuple[Any, ...],
+        compute,
+    ):
+        """
+        以 (方法, 参数, 数据版本) 为键缓存查询结果
+
+        version_store_id 为结果所覆盖的门店（None 表示全部门店），
+        对应数据版本变化后旧缓存不再命中。
+        """
+        if not self.use_cache:
+            return compute()
+        version = get_data_version(self.db, table, version_store_id)
+        key = (name, table, version_store_id, version, params)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        result = compute()
+        self._cache.set(key, result)
+        return result
 
     def _build_room_time_expr(self, model):
         """生成用于包厢时段计算的时间表达式"""
@@ -124,40 +182,6 @@ class StatsService:
                 return DimRoom.room_type.label("dimension_key")
         raise ValueError(f"不支持的维度: {dimension}  或该表缺少对应字段")
 
-    @staticmethod
-    def _normalize_payment_amount(value: Any) -> float:
-        """将任意数值类型归一为 float"""
-        if value is None:
-            return 0.0
-        if isinstance(value, (int, float)):
-            return float(value)
-        if isinstance(value, Decimal):
-            return float(value)
-        try:
-            return float(value)
-        except (TypeError, ValueError):
-            return 0.0
-
-    def _merge_payment_payload(
-        self,
-        target: Dict[str, float],
-        payload: Optional[Dict[str, Any]],
-        only_prefixed: bool,
-    ):
-        """将 payload 中的支付金额累加到 target"""
-        if not isinstance(payload, dict):
-            return
-        for key, raw_value in payload.items():
-            if not isinstance(key, str):
-                continue
-            if only_prefixed and not key.startswith("pay_"):
-                continue
-            normalized_key = key if key.startswith("pay_") else f"pay_{key}"
-            amount = self._normalize_payment_amount(raw_value)
-            if amount == 0:
-                continue
-            target[normalized_key] = target.get(normalized_key, 0.0) + amount
-
     def _aggregate_extra_payments(
         self,
         model,
@@ -169,40 +193,51 @@ class StatsService:
     ) -> Dict[Any, Dict[str, float]]:
         """
         聚合 extra_payments / extra_info 中的动态支付方式
+
+        读取入库时拆好的 fact_payment_line：按日期/门店维度直接在明细行上 GROUP BY，
+        其他维度通过 fact_id 关联回事实表取维度字段。
         """
         if not hasattr(model, "extra_payments"):
             return {}
-
-        dim_expr = self._get_dimension_expr(model, dimension, granularity, store_id)
-        # 关键修复：
-        # dim_expr 可能来自维表字段（如 room_type => DimRoom.room_type、category => DimProduct.category）。
-        # 如果不 join 维表，SQLAlchemy 往往会生成无条件的 FROM (model, dim_table) 笛卡尔积，
-        # 在数据量稍大时会导致查询极慢甚至拖垮后续请求。
-        join_model, join_condition, _, _ = self._get_dimension_join_config(
-            model, dimension
+        fact_table = next(
+            (name for name, fact in self.TABLE_MAP.items() if fact is model), None
         )
+        if fact_table is None:
+            return {}
 
-        query = self.db.query(
-            dim_expr.label("dimension_key"),
-            model.extra_payments,
-            model.extra_info,
-        ).select_from(model)
-        if join_model is not None and join_condition is not None:
-            query = query.join(join_model, join_condition)
+        line = FactPaymentLine
+        if dimension in self.ROLLUP_DIMENSIONS:
+            dim_expr = self._get_dimension_expr(line, dimension, granularity, store_id)
+            stmt = select(
+                dim_expr, line.pay_code, func.sum(line.amount).label("amount")
+            )
+        else:
+            dim_expr = self._get_dimension_expr(model, dimension, granularity, store_id)
+            # dim_expr 可能来自维表字段（如 room_type、category），需要 join 维表，
+            # 否则会生成无条件的笛卡尔积
+            join_model, join_condition, _, _ = self._get_dimension_join_config(
+                model, dimension
+            )
+            stmt = (
+                select(dim_expr, line.pay_code, func.sum(line.amount).label("amount"))
+                .select_from(line)
+                .join(model, model.id == line.fact_id)
+            )
+            if join_model is not None and join_condition is not None:
+                stmt = stmt.join(join_model, join_condition)
 
-        query = query.filter(model.biz_date.between(start_date, end_date))
-        if store_id is not None:
-            query = query.filter(model.store_id == store_id)
-        # 仅扫描确实包含动态支付信息的记录，避免无意义全表扫描
-        query = query.filter(
-            or_(model.extra_payments.isnot(None), model.extra_info.isnot(None))
+        stmt = stmt.where(
+            line.fact_table == fact_table,
+            line.biz_date.between(start_date, end_date),
         )
+        if store_id is not None:
+            stmt = stmt.where(line.store_id == store_id)
+        stmt = stmt.group_by(dim_expr, line.pay_code)
 
         aggregates: Dict[Any, Dict[str, float]] = {}
-        for dimension_key, extra_payments, extra_info in query:
+        for dimension_key, pay_code, amount in self.db.execute(stmt):
             bucket = aggregates.setdefault(dimension_key, {})
-            self._merge_payment_payload(bucket, extra_payments, only_prefixed=False)
-            self._merge_payment_payload(bucket, extra_info, only_prefixed=True)
+            bucket[pay_code] = bucket.get(pay_code, 0.0) + float(amount or 0)
 
         return aggregates
 
@@ -365,8 +400,155 @@ class StatsService:
                     func.sum(case((model.change_type.like("%充值%"), 1), else_=0)),
                 ),
             ]
+        rollup_metrics = self._get_rollup_metrics_exprs(model)
+        if rollup_metrics is not None:
+            return rollup_metrics
         raise ValueError("未知表类型")
 
+    def _get_rollup_metrics_exprs(self, model) -> Optional[List[Tuple[str, Any]]]:
+        """
+        日汇总表上的指标表达式
+
+        指标名称和顺序与明细表一致；汇总表中只存可加字段，
+        平均值/比率类指标由 SUM 结果重新计算。
+        """
+        if model is AggBookingDaily:
+            actual_sum = self._safe_sum(model.actual_amount)
+            orders_sum = self._safe_sum(model.booking_qty)
+            sales_sum = self._safe_sum(model.sales_amount)
+            credit_sum = self._safe_sum(model.credit_amount)
+            return [
+                ("sales_amount", sales_sum),
+                ("receivable_amount", self._safe_sum(model.receivable_amount)),
+                ("actual", actual_sum),
+                ("performance", self._safe_sum(model.base_performance)),
+                ("gift_amount", self._safe_sum(model.gift_amount)),
+                ("discount_amount", self._safe_sum(model.discount_amount)),
+                ("credit_amount", credit_sum),
+                ("free_amount", self._safe_sum(model.free_amount)),
+                ("round_off_amount", self._safe_sum(model.round_off_amount)),
+                ("service_fee", self._safe_sum(model.service_fee)),
+                ("adjustment_amount", self._safe_sum(model.adjustment_amount)),
+                ("pay_wechat", self._safe_sum(model.pay_wechat)),
+                ("pay_alipay", self._safe_sum(model.pay_alipay)),
+                ("pay_cash", self._safe_sum(model.pay_cash)),
+                ("pay_pos", self._safe_sum(model.pay_pos)),
+                ("pay_member", self._safe_sum(model.pay_member)),
+                ("pay_douyin", self._safe_sum(model.pay_douyin)),
+                ("pay_meituan", self._safe_sum(model.pay_meituan)),
+                ("pay_scan", self._safe_sum(model.pay_scan)),
+                ("pay_deposit", self._safe_sum(model.pay_deposit)),
+                ("orders", orders_sum),
+                (
+                    "avg_order_amount",
+                    case((orders_sum > 0, actual_sum * 1.0 / orders_sum), else_=0),
+                ),
+                (
+                    "credit_rate",
+                    case((actual_sum > 0, credit_sum * 1.0 / actual_sum), else_=0),
+                ),
+                (
+                    "actual_rate",
+                    case((sales_sum > 0, actual_sum * 1.0 / sales_sum), else_=0),
+                ),
+            ]
+        if model is AggRoomDaily:
+            bill_total_sum = self._safe_sum(model.bill_total)
+            gift_amount_sum = self._safe_sum(model.gift_amount)
+            rate_count = func.sum(model.low_consume_rate_count)
+            return [
+                ("gmv", self._safe_sum(model.receivable_amount)),
+                ("bill_total", bill_total_sum),
+                ("actual", self._safe_sum(model.actual_amount)),
+                ("min_consumption", self._safe_sum(model.min_consumption)),
+                ("min_consumption_diff", self._safe_sum(model.min_consumption_diff)),
+                ("gift_amount", gift_amount_sum),
+                ("free_amount", self._safe_sum(model.free_amount)),
+                ("credit_amount", self._safe_sum(model.credit_amount)),
+                ("room_discount", self._safe_sum(model.room_discount)),
+                ("beverage_discount", self._safe_sum(model.beverage_discount)),
+                ("duration", self._safe_sum(model.duration_min)),
+                ("orders", self._safe_sum(model.order_count)),
+                # AVG = 达成率之和 / 有低消的开台数，无低消记录时为 NULL（与 AVG 一致）
+                (
+                    "low_consume_rate",
+                    case(
+                        (
+                            rate_count > 0,
+                            func.sum(model.low_consume_rate_sum) * 1.0 / rate_count,
+                        ),
+                        else_=None,
+                    ),
+                ),
+                (
+                    "gift_ratio",
+                    case(
+                        (bill_total_sum > 0, gift_amount_sum * 1.0 / bill_total_sum),
+                        else_=0,
+                    ),
+                ),
+            ]
+        if model is AggSalesDaily:
+            total_qty = func.sum(model.sales_qty) + func.sum(model.gift_qty)
+            sales_qty_sum = func.sum(model.sales_qty)
+            profit_sum = func.sum(model.profit)
+            cost_sum = func.sum(model.cost_total)
+            rate_count = func.sum(model.profit_rate_count)
+            return [
+                ("sales_qty", sales_qty_sum),
+                ("sales_amount", func.sum(model.sales_amount)),
+                ("gift_qty", func.sum(model.gift_qty)),
+                ("gift_amount", func.sum(model.gift_amount)),
+                ("cost_total", cost_sum),
+                ("cost", cost_sum),
+                ("profit", profit_sum),
+                (
+                    "profit_rate",
+                    case(
+                        (
+                            rate_count > 0,
+                            func.sum(model.profit_rate_sum) * 1.0 / rate_count,
+                        ),
+                        else_=None,
+                    ),
+                ),
+                (
+                    "gift_rate",
+                    case(
+                        (total_qty > 0, func.sum(model.gift_qty) * 1.0 / total_qty),
+                        else_=0,
+                    ),
+                ),
+                (
+                    "unit_profit",
+                    case(
+                        (sales_qty_sum > 0, profit_sum * 1.0 / sales_qty_sum), else_=0
+                    ),
+                ),
+            ]
+        if model is AggMemberChangeDaily:
+            return [
+                ("recharge_real_income", self._safe_sum(model.recharge_real_income)),
+                ("room_amount_principal", self._safe_sum(model.room_amount_principal)),
+                (
+                    "drink_amount_principal",
+                    self._safe_sum(model.drink_amount_principal),
+                ),
+                ("room_amount_gift", self._safe_sum(model.room_amount_gift)),
+                ("drink_amount_gift", self._safe_sum(model.drink_amount_gift)),
+                ("balance_total", self._safe_sum(model.balance_total)),
+                ("points_delta", self._safe_sum(model.points_delta)),
+                ("growth_delta", self._safe_sum(model.growth_delta)),
+                ("recharge_count", func.sum(model.recharge_count)),
+            ]
+        return None
+
+    def _resolve_query_model(self, table: str, dimension: str):
+        """按日期/门店维度查询时改用日汇总表，其余维度仍扫描明细表"""
+        if self.use_rollup and dimension in self.ROLLUP_DIMENSIONS:
+            return self.ROLLUP_TABLE_MAP.get(table, self.TABLE_MAP[table])
+        return self.TABLE_MAP[table]
+
     def _validate_pagination(self, page: int, page_size: int):
         if page < 1:
             raise ValueError("page 必须 >= 1")
@@ -462,19 +644,13 @@ class StatsService:
             return (None, None, None, [])
         return (None, None, None, [])
 
-    def _get_active_room_count(self, store_id: Optional[int]) -> int:
+    def get_active_room_count(self, store_id: Optional[int] = None) -> int:
+        """启用中的包厢数量（store_id 为 None 时统计全部门店）"""
         stmt = self.db.query(func.count(DimRoom.id)).filter(DimRoom.is_active.is_(True))
         if store_id is not None:
             stmt = stmt.filter(DimRoom.store_id == store_id)
         return int(stmt.scalar() or 0)
 
-    @staticmethod
-    def _coalesce_dt(*values: Any) -> Optional[datetime]:
-        for val in values:
-            if isinstance(val, datetime):
-                return val
-        return None
-
     def _query_room_hourly_utilization(
         self,
         start_date: date,
@@ -486,6 +662,8 @@ class StatsService:
         - orders：以开房时间（缺失则用关房时间）所在小时计数
         - gmv：同上小时归属汇总
         - occupied_minutes：基于 open_time/close_time（或 duration_min 兜底）将占用分钟按小时切片分摊
+
+        启用汇总表时直接读取 agg_room_hourly，否则从明细实时计算。
         """
         day_span = (end_date - start_date).days + 1
         if day_span > self.MAX_HOURLY_UTILIZATION_DAY_SPAN:
@@ -498,60 +676,61 @@ class StatsService:
             h: {"orders": 0.0, "gmv": 0.0, "occupied_minutes": 0.0} for h in range(24)
         }
 
-        # 1) orders / gmv：按“开房(或关房)时间所在小时”归属
-        hour_expr = func.hour(func.coalesce(FactRoom.open_time, FactRoom.close_time))
-        agg_stmt = self.db.query(
-            hour_expr.label("hour"),
-            func.count(FactRoom.id).label("orders"),
-            self._safe_sum(FactRoom.receivable_amount).label("gmv"),
-        ).filter(FactRoom.biz_date.between(start_date, end_date))
-        if store_id is not None:
-            agg_stmt = agg_stmt.filter(FactRoom.store_id == store_id)
-        agg_stmt = agg_stmt.group_by(hour_expr)
-        for row in agg_stmt.all():
-            hour = int(row.hour) if row.hour is not None else None
-            if hour is None or hour < 0 or hour > 23:
-                continue
-            buckets[hour]["orders"] = float(row.orders or 0)
-            buckets[hour]["gmv"] = float(row.gmv or 0.0)
-
-        # 2) occupied_minutes：按小时切片分摊
-        raw_stmt = self.db.query(
-            FactRoom.open_time, FactRoom.close_time, FactRoom.duration_min
-        ).filter(FactRoom.biz_date.between(start_date, end_date))
-        if store_id is not None:
-            raw_stmt = raw_stmt.filter(FactRoom.store_id == store_id)
-
-        def add_overlap_minutes(start_dt: datetime, end_dt: datetime):
-            if end_dt <= start_dt:
-                return
-            cursor = start_dt
-            # 从开始时间所在小时的整点开始切片
-            while cursor < end_dt:
-                hour_start = cursor.replace(minute=0, second=0, microsecond=0)
-                hour_end = hour_start + timedelta(hours=1)
-                overlap_start = max(start_dt, hour_start)
-                overlap_end = min(end_dt, hour_end)
-                if overlap_end > overlap_start:
-                    minutes = (overlap_end - overlap_start).total_seconds() / 60.0
-                    buckets[hour_start.hour]["occupied_minutes"] += float(minutes)
-                cursor = hour_end
-
-        for open_time, close_time, duration_min in raw_stmt.all():
-            start_dt = self._coalesce_dt(open_time, close_time)
-            if start_dt is None:
-                continue
-            end_dt = self._coalesce_dt(close_time)
-            if end_dt is None:
-                try:
-                    dur = int(duration_min or 0)
-                except (TypeError, ValueError):
-                    dur = 0
-                end_dt = start_dt + timedelta(minutes=max(dur, 0))
-            # 防御：异常数据导致关房早于开房时，直接跳过或兜底
-            if end_dt < start_dt:
-                continue
-            add_overlap_minutes(start_dt, end_dt)
+        if self.use_rollup:
+            # 读取入库时已按钟点摊好的小时汇总表
+            hourly = AggRoomHourly
+            hourly_stmt = select(
+                hourly.hour,
+                self._safe_sum(hourly.orders),
+                self._safe_sum(hourly.gmv),
+                self._safe_sum(hourly.occupied_minutes),
+            ).where(hourly.biz_date.between(start_date, end_date))
+            if store_id is not None:
+                hourly_stmt = hourly_stmt.where(hourly.store_id == store_id)
+            hourly_stmt = hourly_stmt.group_by(hourly.hour)
+            for hour, orders, gmv, occupied in self.db.execute(hourly_stmt).all():
+                if hour is None or not 0 <= int(hour) <= 23:
+                    continue
+                buckets[int(hour)] = {
+                    "orders": float(orders or 0),
+                    "gmv": float(gmv or 0.0),
+                    "occupied_minutes": float(occupied or 0.0),
+                }
+        else:
+            # 1) orders / gmv：按“开房(或关房)时间所在小时”归属
+            hour_expr = func.hour(func.coalesce(FactRoom.open_time, FactRoom.close_time))
+            agg_stmt = self.db.query(
+                hour_expr.label("hour"),
+                func.count(FactRoom.id).label("orders"),
+                self._safe_sum(FactRoom.receivable_amount).label("gmv"),
+            ).filter(FactRoom.biz_date.between(start_date, end_date))
+            if store_id is not None:
+                agg_stmt = agg_stmt.filter(FactRoom.store_id == store_id)
+            agg_stmt = agg_stmt.group_by(hour_expr)
+            for row in agg_stmt.all():
+                hour = int(row.hour) if row.hour is not None else None
+                if hour is None or hour < 0 or hour > 23:
+                    continue
+                buckets[hour]["orders"] = float(row.orders or 0)
+                buckets[hour]["gmv"] = float(row.gmv or 0.0)
+
+            # 2) occupied_minutes：按小时切片分摊（一次取出整列，向量化计算）
+            raw_stmt = select(
+                func.coalesce(FactRoom.open_time, FactRoom.close_time),
+                FactRoom.close_time,
+                FactRoom.duration_min,
+            ).where(
+                FactRoom.biz_date.between(start_date, end_date),
+                or_(FactRoom.open_time.isnot(None), FactRoom.close_time.isnot(None)),
+            )
+            if store_id is not None:
+                raw_stmt = raw_stmt.where(FactRoom.store_id == store_id)
+            raw_rows = self.db.execute(raw_stmt).all()
+            if raw_rows:
+                starts, ends, valid = session_bounds(*zip(*raw_rows))
+                occupied = spread_hourly_minutes(starts[valid], ends[valid])[0]
+                for h in range(24):
+                    buckets[h]["occupied_minutes"] = float(occupied[h])
 
         rows: List[Dict[str, Any]] = []
         for h in range(24):
@@ -565,7 +744,7 @@ class StatsService:
                 }
             )
 
-        active_room_count = self._get_active_room_count(store_id)
+        active_room_count = self.get_active_room_count(store_id)
         return {
             "rows": rows,
             "series_rows": rows,
@@ -607,7 +786,7 @@ class StatsService:
         dim_expr = self._get_dimension_expr(model, dimension, granularity, store_id)
         metric_columns: Dict[str, Any] = {}
         select_columns = [dim_expr]
-        # 保存原始聚合表达式，用于窗口函数
+        # 保存原始聚合表达式，用于派生字段（如 contribution_pct）
         original_metrics: Dict[str, Any] = {}
         for name, expr in metrics:
             labeled = expr.label(name)
@@ -634,20 +813,29 @@ class StatsService:
             select_columns.append(extra_col)
             extra_column_names.append(extra_col.key)
 
-        # 对于 booking 表的员工维度，添加 contribution_pct 字段（使用窗口函数）
-        # 注意：窗口函数需要在聚合之后计算，使用原始聚合表达式
+        # 对于 booking 表的员工维度，添加 contribution_pct 字段
+        # 总实收用独立的标量子查询计算：窗口函数在 WHERE/HAVING 之后求值，
+        # 游标分页追加的条件会把前几页的分组排除在总数之外
         if (
             model is FactBooking
             and dimension == "employee"
             and "actual" in original_metrics
         ):
             actual_expr = original_metrics["actual"]
-            # 使用窗口函数计算总实收（在所有分组上求和）
-            # 窗口函数中使用原始聚合表达式
-            total_actual_window = func.sum(actual_expr).over()
+            total_actual_stmt = select(actual_expr).select_from(model)
+            if join_model is not None:
+                # 与分组查询相同的 join，保证总数与各分组之和一致
+                total_actual_stmt = total_actual_stmt.join(join_model, join_condition)
+            total_actual_stmt = total_actual_stmt.where(
+                model.biz_date.between(start_date, end_date)
+            )
+            if store_id is not None:
+                total_actual_stmt = total_actual_stmt.where(model.store_id == store_id)
+            # 不与外层查询关联，否则 fact_booking 会被当作外层表引用
+            total_actual = total_actual_stmt.correlate(None).scalar_subquery()
             # 计算贡献占比 = (当前实收 / 总实收) * 100
             contribution_pct_expr = case(
-                (total_actual_window > 0, actual_expr * 100.0 / total_actual_window),
+                (total_actual > 0, actual_expr * 100.0 / total_actual),
                 else_=0,
             ).label("contribution_pct")
             select_columns.append(contribution_pct_expr)
@@ -684,6 +872,78 @@ class StatsService:
         subquery = stmt.order_by(None).subquery()
         return self.db.execute(select(func.count()).select_from(subquery)).scalar() or 0
 
+    # ---------------- 游标分页 ----------------
+
+    @staticmethod
+    def _encode_cursor_value(value: Any) -> Any:
+        if isinstance(value, Decimal):
+            return {"d": str(value)}
+        if isinstance(value, datetime):
+            return {"dt": value.isoformat()}
+        if isinstance(value, date):
+            return {"t": value.isoformat()}
+        return value
+
+    @staticmethod
+    def _decode_cursor_value(value: Any) -> Any:
+        if isinstance(value, dict):
+            if "d" in value:
+                return Decimal(value["d"])
+            if "dt" in value:
+                return datetime.fromisoformat(value["dt"])
+            if "t" in value:
+                return date.fromisoformat(value["t"])
+            raise ValueError("无效的分页游标")
+        return value
+
+    def _encode_cursor(self, sort_key: str, values: List[Any]) -> str:
+        payload = [sort_key, [self._encode_cursor_value(value) for value in values]]
+        raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    def _decode_cursor(self, cursor: str, sort_key: str, size: int) -> List[Any]:
+        """解析游标，返回末行的排序键值；排序方式与游标不一致时报错"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode("ascii"))
+            cursor_sort_key, values = json.loads(raw.decode("utf-8"))
+            values = [self._decode_cursor_value(value) for value in values]
+        except (ValueError, TypeError, InvalidOperation):
+            raise ValueError("无效的分页游标")
+        if cursor_sort_key != sort_key or len(values) != size:
+            raise ValueError("分页游标与当前排序方式不一致，请从第一页重新查询")
+        return values
+
+    @staticmethod
+    def _keyset_after(expr, value: Any, descending: bool):
+        """排序位置在 value 之后的条件（NULL 与 MySQL 一致：升序最前、降序最后）"""
+        if descending:
+            if value is None:
+                return false()
+            return or_(expr < value, expr.is_(None))
+        if value is None:
+            return expr.isnot(None)
+        return expr > value
+
+    @staticmethod
+    def _keyset_equal(expr, value: Any):
+        if value is None:
+            return expr.is_(None)
+        return expr == value
+
+    def _keyset_condition(self, columns: List[Tuple[Any, bool]], values: List[Any]):
+        """按 (列, 是否降序) 的字典序，生成排在 values 之后的条件"""
+        (expr, descending), value = columns[0], values[0]
+        after = self._keyset_after(expr, value, descending)
+        if len(columns) == 1:
+            return after
+        return or_(
+            after,
+            and_(
+                self._keyset_equal(expr, value),
+                self._keyset_condition(columns[1:], values[1:]),
+            ),
+        )
+
     def _fetch_rows(
         self,
         stmt,
@@ -762,9 +1022,61 @@ class StatsService:
         top_n: int = DEFAULT_TOP_N,
         sort_by: Optional[str] = None,
         sort_order: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count_mode: str = "exact",
+    ) -> Dict[str, Any]:
+        """
+        通用聚合查询（结果按数据版本缓存）
+        """
+        if table not in self.TABLE_MAP:
+            raise ValueError(f"不支持的表类型: {table}")
+        params = (
+            start_date,
+            end_date,
+            store_id,
+            dimension,
+            granularity,
+            page,
+            page_size,
+            top_n,
+            sort_by,
+            sort_order,
+            cursor,
+            count_mode,
+        )
+        return self._cached_call(
+            "query_stats",
+            table,
+            store_id,
+            params,
+            lambda: self._query_stats(table, *params),
+        )
+
+    def _query_stats(
+        self,
+        table: str,
+        start_date: date,
+        end_date: date,
+        store_id: Optional[int] = None,
+        dimension: str = "date",
+        granularity: str = "day",
+        page: int = 1,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        top_n: int = DEFAULT_TOP_N,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count_mode: str = "exact",
     ) -> Dict[str, Any]:
         """
         通用聚合查询
+
+        分页方式：
+        - page/page_size：OFFSET 分页
+        - cursor：键集分页，按 (排序指标, dimension_key) 从上一页末行继续，
+          传入上一页 meta.next_cursor，此时忽略 page
+        count_mode 为 none 时不单独执行 COUNT，total 只在能从结果推出时返回，
+        否则为 None，翻页以 meta.has_more 为准。
         """
         if table not in self.TABLE_MAP:
             raise ValueError(f"不支持的表类型: {table}")
@@ -780,13 +1092,17 @@ class StatsService:
             )
 
         self._validate_pagination(page, page_size)
+        if count_mode not in self.COUNT_MODES:
+            raise ValueError(f"不支持的计数方式: {count_mode}")
         top_n = self._clamp_top_n(top_n)
 
-        metrics = self._get_metrics_exprs(model)
+        # 聚合指标读取的表（日汇总表或明细表）；动态支付方式从 fact_payment_line 汇总
+        agg_model = self._resolve_query_model(table, dimension)
+        metrics = self._get_metrics_exprs(agg_model)
 
         rows_stmt, dim_expr, has_label_rows, metric_columns_rows, extra_column_names = (
             self._build_group_stmt(
-                model=model,
+                model=agg_model,
                 dimension=dimension,
                 granularity=granularity,
                 metrics=metrics,
@@ -796,33 +1112,71 @@ class StatsService:
             )
         )
 
-        # 应用自定义排序
+        # 分组键：维度值 + 额外分组列（如全部门店商品按 名称×分类 分组），
+        # 作为排序的次级键保证翻页稳定，也是游标中记录的位置
+        tie_columns = [dim_expr] + [
+            rows_stmt.selected_columns[name] for name in extra_column_names
+        ]
+        sort_metric_name: Optional[str] = None
         if sort_by and sort_by in metric_columns_rows:
-            # 直接使用表达式对象排序
-            sort_col_expr = metric_columns_rows[sort_by]
-            rows_stmt = rows_stmt.order_by(None)  # 清除默认排序
-            if sort_order == "asc":
-                rows_stmt = rows_stmt.order_by(sort_col_expr.asc(), dim_expr)
-            else:
-                rows_stmt = rows_stmt.order_by(sort_col_expr.desc(), dim_expr)
+            sort_metric_name = sort_by
+            sort_desc = sort_order != "asc"
         elif sort_by == "dimension_value" or sort_by == "dimension_key":
-            # 按维度值排序
-            rows_stmt = rows_stmt.order_by(None)
-            if sort_order == "asc":
-                rows_stmt = rows_stmt.order_by(dim_expr.asc())
+            sort_desc = sort_order != "asc"
+        else:
+            sort_desc = False
+
+        if sort_metric_name is not None:
+            # 直接使用表达式对象排序
+            sort_col_expr = metric_columns_rows[sort_metric_name]
+            keyset_columns = [(sort_col_expr, sort_desc)] + [
+                (col, False) for col in tie_columns
+            ]
+        else:
+            # 按维度值排序（默认升序）
+            keyset_columns = [(dim_expr, sort_desc)] + [
+                (col, False) for col in tie_columns[1:]
+            ]
+        rows_stmt = rows_stmt.order_by(None).order_by(
+            *(col.desc() if desc else col.asc() for col, desc in keyset_columns)
+        )
+
+        sort_key = f"{sort_metric_name or 'dimension_key'}:{'desc' if sort_desc else 'asc'}"
+        page_stmt = rows_stmt
+        if cursor:
+            if sort_metric_name == "contribution_pct":
+                raise ValueError("contribution_pct 排序不支持游标分页，请使用页码分页")
+            last_values = self._decode_cursor(cursor, sort_key, len(keyset_columns))
+            condition = self._keyset_condition(keyset_columns, last_values)
+            if sort_metric_name is None:
+                # 按维度值排序：条件落在 WHERE 上，跳过的分组不再参与聚合
+                page_stmt = page_stmt.where(condition)
             else:
-                rows_stmt = rows_stmt.order_by(dim_expr.desc())
+                # 按聚合指标排序：条件落在 HAVING 上
+                page_stmt = page_stmt.having(condition)
+            offset = 0
+        else:
+            offset = (page - 1) * page_size
 
-        total = self._count_group_rows(rows_stmt)
-        offset = (page - 1) * page_size
-        paginated_stmt = rows_stmt.offset(offset).limit(page_size)
+        # 多取一行判断是否还有下一页
         rows = self._fetch_rows(
-            paginated_stmt,
+            page_stmt.offset(offset).limit(page_size + 1),
             metrics,
             has_label_rows,
             extra_column_names,
             metric_columns_rows,
         )
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_cursor = None
+        if has_more and sort_metric_name != "contribution_pct":
+            last_row = rows[-1]
+            position_names = (
+                [sort_metric_name] if sort_metric_name is not None else []
+            ) + ["dimension_key"] + extra_column_names
+            next_cursor = self._encode_cursor(
+                sort_key, [last_row.get(name) for name in position_names]
+            )
 
         series_granularity = granularity
         auto_adjusted = False
@@ -862,7 +1216,7 @@ class StatsService:
                 metric_columns_series,
                 extra_column_names_series,
             ) = self._build_group_stmt(
-                model=model,
+                model=agg_model,
                 dimension=dimension,
                 granularity=series_granularity,
                 metrics=metrics,
@@ -885,7 +1239,7 @@ class StatsService:
                 metric_columns_series,
                 extra_column_names_series,
             ) = self._build_group_stmt(
-                model=model,
+                model=agg_model,
                 dimension=dimension,
                 granularity=granularity,
                 metrics=metrics,
@@ -898,7 +1252,8 @@ class StatsService:
             series_stmt = series_stmt.order_by(None).order_by(
                 primary_metric_expr.desc(), dim_expr_series
             )
-            series_stmt = series_stmt.limit(top_n)
+            # 多取一行判断是否被截断，不依赖 total
+            series_stmt = series_stmt.limit(top_n + 1)
             series_rows = self._fetch_rows(
                 series_stmt,
                 metrics,
@@ -906,12 +1261,24 @@ class StatsService:
                 extra_column_names_series,
                 metric_columns_series,
             )
-            if total > len(series_rows):
+            if len(series_rows) > top_n:
+                series_rows = series_rows[:top_n]
                 is_truncated = True
                 suggestions.append(
                     f"已限制为前 {top_n} 项，建议缩小筛选范围或调大 top_n"
                 )
 
+        # total：能从已执行的查询推出时不再单独 COUNT
+        if dimension == "date" and series_granularity == granularity:
+            # 时间序列未截断，分组与表格行完全一致
+            total = len(series_rows)
+        elif not cursor and not has_more and (rows or offset == 0):
+            total = offset + len(rows)
+        elif count_mode == "exact":
+            total = self._count_group_rows(rows_stmt)
+        else:
+            total = None
+
         extra_rows_map = self._aggregate_extra_payments(
             model=model,
             dimension=dimension,
@@ -944,10 +1311,10 @@ class StatsService:
         # 计算全局汇总 (Grand Total)
         summary_selects = [expr.label(name) for name, expr in metrics]
         summary_stmt = select(*summary_selects).where(
-            model.biz_date.between(start_date, end_date)
+            agg_model.biz_date.between(start_date, end_date)
         )
         if store_id is not None:
-            summary_stmt = summary_stmt.where(model.store_id == store_id)
+            summary_stmt = summary_stmt.where(agg_model.store_id == store_id)
 
         summary_row = self.db.execute(summary_stmt).one_or_none()
         summary_data = {}
@@ -966,9 +1333,9 @@ class StatsService:
 
         # 补充：room 表提供活跃包厢数，便于前端计算翻台率/利用率
         if table == "room":
-            summary_data["active_room_count"] = self._get_active_room_count(store_id)
+            summary_data["active_room_count"] = self.get_active_room_count(store_id)
 
-        # 注意：contribution_pct 现在在 SQL 层面使用窗口函数计算，无需后处理
+        # 注意：contribution_pct 在 SQL 层面按全量总实收计算，无需后处理
 
         return {
             "rows": rows,
@@ -992,6 +1359,8 @@ class StatsService:
                 "is_truncated": is_truncated,
                 "auto_adjusted": auto_adjusted,
                 "suggestions": suggestions,
+                "has_more": has_more,
+                "next_cursor": next_cursor,
             },
         }
 
@@ -1039,6 +1408,114 @@ class StatsService:
 
         return result["series_rows"]
 
+    def _get_dashboard_value_columns(self, table: str, model) -> Dict[str, Any]:
+        """看板所需的可加字段（明细表/日汇总表通用）"""
+        if table == "room":
+            if model is AggRoomDaily:
+                orders = model.order_count
+            else:
+                orders = literal_column("1")
+            return {
+                "actual": model.actual_amount,
+                "orders": orders,
+                "duration": model.duration_min,
+            }
+        if table == "member_change":
+            return {"recharge_real_income": model.recharge_real_income}
+        if table == "sales":
+            return {
+                "cost_total": model.cost_total,
+                "sales_qty": model.sales_qty,
+                "gift_qty": model.gift_qty,
+            }
+        raise ValueError(f"看板不支持的表类型: {table}")
+
+    def aggregate_dashboard_windows(
+        self,
+        table: str,
+        windows: Dict[str, Tuple[date, date]],
+        store_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        看板多时间窗口条件聚合
+
+        一条 SQL 按 (月份, 门店) 分组，每个时间窗口生成一组
+        SUM(CASE WHEN biz_date BETWEEN 开始 AND 结束 THEN 字段 END) 列，
+        当日/前日/本月/上月同期/月度趋势/门店排行都由调用方从结果中累加得到。
+
+        Args:
+            table: room / member_change / sales
+            windows: 窗口名 -> (开始日期, 结束日期)
+            store_id: 门店ID（在 SQL 中过滤，None 表示全部门店）
+
+        Returns:
+            [{"month_key": "YYYY-MM", "store_id": 1, "store_name": "...", "<窗口名>": {字段: 值}}]
+        """
+        if not windows:
+            return []
+        if table not in self.TABLE_MAP:
+            raise ValueError(f"不支持的表类型: {table}")
+        # 按结果覆盖的门店（None 为全部门店）的数据版本缓存
+        params = (tuple(sorted(windows.items())), store_id)
+        return self._cached_call(
+            "dashboard_windows",
+            table,
+            store_id,
+            params,
+            lambda: self._aggregate_dashboard_windows(table, windows, store_id),
+        )
+
+    def _aggregate_dashboard_windows(
+        self,
+        table: str,
+        windows: Dict[str, Tuple[date, date]],
+        store_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        model = self._resolve_query_model(table, "date")
+        value_columns = self._get_dashboard_value_columns(table, model)
+
+        month_expr = func.date_format(model.biz_date, "%Y-%m").label("month_key")
+        select_columns = [
+            month_expr,
+            model.store_id.label("store_id"),
+            DimStore.store_name.label("store_name"),
+        ]
+        for window_name, (window_start, window_end) in windows.items():
+            in_window = model.biz_date.between(window_start, window_end)
+            for column_name, column in value_columns.items():
+                select_columns.append(
+                    self._safe_sum(case((in_window, column), else_=None)).label(
+                        f"{window_name}__{column_name}"
+                    )
+                )
+
+        scan_start = min(window_start for window_start, _ in windows.values())
+        scan_end = max(window_end for _, window_end in windows.values())
+        stmt = (
+            select(*select_columns)
+            .join(DimStore, model.store_id == DimStore.id)
+            .where(model.biz_date.between(scan_start, scan_end))
+            .group_by(month_expr, model.store_id, DimStore.store_name)
+        )
+        if store_id is not None:
+            stmt = stmt.where(model.store_id == store_id)
+
+        rows: List[Dict[str, Any]] = []
+        for row in self.db.execute(stmt):
+            mapping = row._mapping
+            record: Dict[str, Any] = {
+                "month_key": mapping["month_key"],
+                "store_id": mapping["store_id"],
+                "store_name": mapping["store_name"],
+            }
+            for window_name in windows:
+                record[window_name] = {
+                    column_name: mapping[f"{window_name}__{column_name}"]
+                    for column_name in value_columns
+                }
+            rows.append(record)
+        return rows
+
     def get_top_items(
         self,
         table: str,
@@ -1071,6 +1548,30 @@ class StatsService:
                 ...
             ]
         """
+        if table not in self.TABLE_MAP:
+            raise ValueError(f"不支持的表类型: {table}")
+        # 按门店排行时结果覆盖全部门店
+        version_store_id = store_id if dimension != "store" else None
+        params = (metric, dimension, limit, start_date, end_date, store_id)
+        return self._cached_call(
+            "top_items",
+            table,
+            version_store_id,
+            params,
+            lambda: self._get_top_items(table, *params),
+        )
+
+    def _get_top_items(
+        self,
+        table: str,
+        metric: str,
+        dimension: str,
+        limit: int = 5,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        store_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """获取排行榜数据（不走缓存）"""
         if table not in self.TABLE_MAP:
             raise ValueError(f"不支持的表类型: {table}")
 
@@ -0,0 +1,150 @@
+"""
+统计结果缓存
+
+StatsService.query_stats / get_top_items 等查询结果的进程内 LRU 缓存。
+
+缓存键包含 (表类型, 门店) 的数据版本号（meta_data_version），
+ImporterService 入库/删除批次时在同一事务内递增版本号，
+其他 worker 进程下次查询读到新版本即自然失效，不会返回导入前的旧结果。
+"""
+
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.meta import MetaDataVersion
+
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# 数据版本
+# ============================================================
+
+
+def bump_data_version(db: Session, table_type: str, store_id: int) -> None:
+    """递增 (表类型, 门店) 的数据版本（不提交事务）"""
+    stmt = (
+        update(MetaDataVersion)
+        .where(
+            MetaDataVersion.table_type == table_type,
+            MetaDataVersion.store_id == store_id,
+        )
+        .values(version=MetaDataVersion.version + 1)
+    )
+    if db.execute(stmt).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(
+                insert(MetaDataVersion).values(
+                    table_type=table_type, store_id=store_id, version=1
+                )
+            )
+    except IntegrityError:
+        # 并发导入已插入该行，改为递增
+        db.execute(stmt)
+
+
+def bump_data_versions(db: Session, table_type: str, store_ids: Iterable[int]) -> None:
+    for store_id in sorted({int(s) for s in store_ids if s is not None}):
+        bump_data_version(db, table_type, store_id)
+
+
+def get_data_version(db: Session, table_type: str, store_id: Optional[int]) -> int:
+    """
+    读取数据版本
+
+    store_id 为 None（全部门店）时返回该表所有门店版本之和，任一门店变更都会使其增大。
+    """
+    stmt = select(func.coalesce(func.sum(MetaDataVersion.version), 0)).where(
+        MetaDataVersion.table_type == table_type
+    )
+    if store_id is not None:
+        stmt = stmt.where(MetaDataVersion.store_id == store_id)
+    return int(db.execute(stmt).scalar() or 0)
+
+
+# ============================================================
+# 结果缓存
+# ============================================================
+
+
+class StatsResultCache:
+    """带条目上限、LRU 淘汰和兜底 TTL 的结果缓存"""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        # key -> (写入时间, 结果)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """命中时返回结果副本（调用方可自由修改），未命中返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+_cache: Optional[StatsResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_stats_cache() -> StatsResultCache:
+    """获取进程级统计缓存单例"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = get_settings()
+            _cache = StatsResultCache(
+                max_entries=settings.STATS_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.STATS_CACHE_TTL,
+            )
+        return _cache
@@ -11,6 +11,7 @@ from sqlalchemy import or_, and_
 
 from app.models.user import User
 from app.core.security import get_password_hash, decode_token
+from app.services.auth_cache import invalidate_user
 
 
 class UserService:
@@ -82,6 +83,8 @@ class UserService:
         user.updated_at = datetime.utcnow()
         self.db.commit()
         self.db.refresh(user)
+        # 角色/门店/密码/状态都可能变化，已缓存的登录态需重新查询
+        invalidate_user(user_id=user.id, username=user.username)
         return user
 
     def delete_user(self, user_id: int) -> bool:
@@ -90,8 +93,10 @@ class UserService:
         if not user:
             return False
 
+        username = user.username
         self.db.delete(user)
         self.db.commit()
+        invalidate_user(user_id=user_id, username=username)
         return True
 
     def get_users(self, skip: int = 0, limit: int = 100, role: Optional[str] = None,
@@ -147,6 +152,7 @@ class UserService:
         user.hashed_password = get_password_hash(new_password)
         user.updated_at = datetime.utcnow()
         self.db.commit()
+        invalidate_user(user_id=user.id, username=user.username)
         return True
 
     def reset_password(self, user_id: int, new_password: str) -> bool:
@@ -158,6 +164,7 @@ class UserService:
         user.hashed_password = get_password_hash(new_password)
         user.updated_at = datetime.utcnow()
         self.db.commit()
+        invalidate_user(user_id=user.id, username=user.username)
         return True
 
     def toggle_user_status(self, user_id: int) -> Optional[User]:
@@ -170,6 +177,7 @@ class UserService:
         user.updated_at = datetime.utcnow()
         self.db.commit()
         self.db.refresh(user)
+        invalidate_user(user_id=user.id, username=user.username)
         return user
 
     def get_user_by_token(self, token: str) -> Optional[User]:
@@ -200,6 +208,7 @@ class UserService:
         user.token_expires_at = None
         user.updated_at = datetime.utcnow()
         self.db.commit()
+        invalidate_user(user_id=user.id, username=user.username)
         return True
 
     def invalidate_all_expired_tokens(self) -> int:
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+解析 + 清洗链路的内存基准
+
+生成（或指定）一份上传文件，在独立子进程中执行 parse_and_clean_file
+（与上传接口整文件解析走同一条链路：read_excel_file -> optimize_dataframe -> clean_data），
+报告导入依赖后的基线 RSS、峰值 RSS 与耗时。每个子进程只跑一次，峰值取 ru_maxrss。
+解析缓存在子进程中关闭，保证每次都真正解析。
+
+传 --baseline 时用 git worktree 检出指定提交，在同一份文件上跑同样的测量，
+输出改动前后的对比。
+
+用法:
+    python bench_parse_memory.py [--rows 300000] [--format csv|xlsx] [--file path]
+                                 [--repeat 3] [--baseline HEAD~1]
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def generate_file(path, rows, fmt):
+    """生成预订汇总样例：标题行 + 表头 + 数据行，含低重复率文本列、金额与动态支付方式列"""
+    header = [
+        "订位人", "部门", "订台数", "销售金额", "实收金额", "账单合计",
+        "支付方式_微信支付", "支付方式_现金", "支付方式_抖音团购", "备注",
+    ]
+
+    def data_rows():
+        for i in range(rows):
+            # 支付方式合计与实收一致，避免逐行产生不平衡校验错误而掩盖解析本身的内存
+            actual = round(200 + i * 1.21 % 5000, 2)
+            cash, douyin = i % 13, (i % 31 == 0) * 88
+            yield [
+                f"员工{i % 300}", f"部门{i % 12}", i % 6, round(i * 1.37 % 5000, 2),
+                actual, actual, round(actual - cash - douyin, 2), cash, douyin, f"备注{i}",
+            ]
+
+    if fmt == "csv":
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("预订汇总 2025-12-01\n")
+            f.write(",".join(header) + "\n")
+            for row in data_rows():
+                f.write(",".join(str(value) for value in row) + "\n")
+    else:
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(["预订汇总 2025-12-01"])
+        sheet.append(header)
+        for row in data_rows():
+            sheet.append(row)
+        workbook.save(path)
+
+
+def peak_rss_mb():
+    # Linux 下 ru_maxrss 单位为 KB，macOS 为字节
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_child(file_path, backend_dir):
+    """子进程：导入依赖后记录基线，执行一次解析 + 清洗"""
+    sys.path.insert(0, backend_dir)
+    os.environ["PARSE_CACHE_ENABLED"] = "false"
+    from app.services.pipeline import parse_and_clean_file
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    report_type, records, _ = parse_and_clean_file(
+        file_path, os.path.basename(file_path), "booking"
+    )
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "report_type": report_type,
+        "rows": len(records),
+        "baseline_mb": round(baseline, 1),
+        "peak_mb": round(peak_rss_mb(), 1),
+        "seconds": round(elapsed, 2),
+    }))
+
+
+def measure(file_path, backend_dir, repeat):
+    results = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", file_path,
+             "--backend-dir", backend_dir],
+            check=True, capture_output=True, text=True, cwd=backend_dir,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def summarize(label, results):
+    peak = statistics.median(r["peak_mb"] for r in results)
+    baseline = statistics.median(r["baseline_mb"] for r in results)
+    seconds = statistics.median(r["seconds"] for r in results)
+    print(
+        f"{label:<10} 行数 {results[0]['rows']:>8}  基线 {baseline:>7.1f} MB  "
+        f"峰值 {peak:>7.1f} MB  增量 {peak - baseline:>7.1f} MB  耗时 {seconds:>6.2f}s"
+    )
+    return peak - baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解析 + 清洗链路的峰值内存基准")
+    parser.add_argument("--rows", type=int, default=300000, help="生成样例的数据行数")
+    parser.add_argument("--format", choices=("csv", "xlsx"), default="csv", help="生成样例的格式")
+    parser.add_argument("--file", default=None, help="使用已有文件（不生成样例）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个版本测量次数（取中位数）")
+    parser.add_argument("--baseline", default=None, help="对比的 git 提交（如 HEAD~1）")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--backend-dir", default=BACKEND_DIR, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.backend_dir)
+        return 0
+
+    workdir = tempfile.mkdtemp(prefix="ktv_bench_")
+    try:
+        file_path = args.file
+        if file_path is None:
+            file_path = os.path.join(workdir, f"预订汇总_bench.{args.format}")
+            generate_file(file_path, args.rows, args.format)
+        file_path = os.path.abspath(file_path)
+        print(f"文件 {file_path}（{os.path.getsize(file_path) / 1024 / 1024:.1f} MB）")
+
+        current = summarize("当前", measure(file_path, BACKEND_DIR, args.repeat))
+        if args.baseline:
+            tree = os.path.join(workdir, "baseline")
+            subprocess.run(
+                ["git", "worktree", "add", "--detach", tree, args.baseline],
+                check=True, capture_output=True, cwd=BACKEND_DIR,
+            )
+            try:
+                base_backend = os.path.join(tree, os.path.relpath(
+                    BACKEND_DIR,
+                    subprocess.run(
+                        ["git", "rev-parse", "--show-toplevel"],
+                        check=True, capture_output=True, text=True, cwd=BACKEND_DIR,
+                    ).stdout.strip(),
+                ))
+                before = summarize(args.baseline, measure(file_path, base_backend, args.repeat))
+            finally:
+                subprocess.run(
+                    ["git", "worktree", "remove", "--force", tree],
+                    capture_output=True, cwd=BACKEND_DIR,
+                )
+            if before > 0:
+                print(f"\n峰值增量变化: {before:.1f} MB -> {current:.1f} MB ({current / before - 1:+.0%})")
+        return 0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
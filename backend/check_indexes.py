@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+检查统计查询是否走索引
+
+执行看板汇总与常用统计查询，记录实际发出的 SELECT 语句，逐条 EXPLAIN，
+发现事实表/汇总表上的全表扫描（type = ALL）时以非零状态码退出。
+
+需连接数据量接近生产的 MySQL：数据太少时优化器可能认为全表扫描更便宜，
+可用 --min-rows 忽略预估扫描行数较小的计划。
+
+用法:
+    python check_indexes.py [--store-id 1] [--target-date 2025-03-31] [--min-rows 1000]
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import event, func
+
+from app.api.v1.dashboard import get_dashboard_summary
+from app.core.database import SessionLocal, engine
+from app.models.facts import FactRoom
+from app.services.stats import StatsService
+
+# 需要检查的表前缀（维表数据量小，不检查）
+WATCHED_PREFIXES = ("fact_", "agg_")
+
+# 除看板汇总外额外检查的 query_stats 调用: (表, 维度)
+EXTRA_QUERIES = [
+    ("booking", "date"),
+    ("booking", "employee"),
+    ("room", "room"),
+    ("room", "hour"),
+    ("sales", "product"),
+    ("member_change", "store"),
+]
+
+
+def collect_statements(db, store_id, target_date):
+    """执行看板与统计查询，返回 [(场景, SQL, 参数)]"""
+    captured = []
+    scene = {"name": ""}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((scene["name"], statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        scene["name"] = "dashboard_summary"
+        asyncio.run(
+            get_dashboard_summary(
+                store_id=store_id,
+                target_date=target_date,
+                db=db,
+                current_user={"role": "admin", "store_id": None},
+            )
+        )
+
+        stats_service = StatsService(db)
+        # 绕过结果缓存，保证每条查询都真正执行
+        stats_service.use_cache = False
+        start_date = target_date.replace(day=1) - timedelta(days=60)
+        for use_rollup in (True, False):
+            stats_service.use_rollup = use_rollup
+            for table, dimension in EXTRA_QUERIES:
+                scene["name"] = f"query_stats[{table}/{dimension}, rollup={use_rollup}]"
+                stats_service.query_stats(
+                    table=table,
+                    start_date=start_date,
+                    end_date=target_date,
+                    store_id=store_id,
+                    dimension=dimension,
+                )
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def explain(db, statement, parameters):
+    result = db.connection().exec_driver_sql(f"EXPLAIN {statement}", parameters)
+    return [dict(row._mapping) for row in result]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查统计查询的执行计划")
+    parser.add_argument("--store-id", type=int, default=None, help="门店ID (不传则检查全部门店)")
+    parser.add_argument("--target-date", type=date.fromisoformat, default=None, help="统计基准日")
+    parser.add_argument("--min-rows", type=int, default=1000, help="预估扫描行数低于该值的全表扫描不报错")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        target_date = args.target_date or db.query(func.max(FactRoom.biz_date)).scalar()
+        if target_date is None:
+            print("❌ fact_room 无数据，无法检查")
+            return 1
+
+        captured = collect_statements(db, args.store_id, target_date)
+        print(f"基准日 {target_date}，门店 {args.store_id or '全部'}，共 {len(captured)} 条查询")
+
+        failures = []
+        seen = set()
+        for scene, statement, parameters in captured:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            for row in explain(db, statement, parameters):
+                table = row.get("table") or ""
+                if not table.startswith(WATCHED_PREFIXES):
+                    continue
+                if row.get("type") == "ALL" and int(row.get("rows") or 0) >= args.min_rows:
+                    failures.append((scene, table, row.get("rows"), statement))
+
+        if not failures:
+            print("\n✅ 未发现事实表/汇总表全表扫描")
+            return 0
+
+        print(f"\n❌ 发现 {len(failures)} 处全表扫描:")
+        for scene, table, rows, statement in failures:
+            print(f"\n  [{scene}] {table} 预估扫描 {rows} 行")
+            print("    " + " ".join(statement.split()))
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+从事实表全量重建派生表
+
+迁移只负责建表：回填依赖应用内的拆分规则，写在迁移里会让旧迁移随应用代码变化。
+升级到新增派生表的版本后执行一次本脚本回填已有数据；派生表数据异常时也可用于修复。
+每张派生表在单独的事务中重建，完成后递增相关表的数据版本，使统计缓存失效。
+
+派生表:
+    daily_rollups  agg_booking_daily / agg_room_daily / agg_sales_daily / agg_member_change_daily
+                   （按 门店 × 营业日期 的日汇总；重建 room 时同时重建 agg_room_hourly）
+    payment_lines  fact_payment_line（booking / room 的动态支付方式明细）
+    room_hourly    agg_room_hourly（包厢开台按钟点摊分的占用汇总）
+
+用法:
+    python rebuild_derived_tables.py [--only payment_lines]
+"""
+import argparse
+import sys
+import time
+
+from sqlalchemy import select
+
+from app.core.database import SessionLocal
+from app.models.dims import DimStore
+from app.services.payment_lines import PaymentLineService
+from app.services.rollup import RollupService
+from app.services.stats_cache import bump_data_versions
+
+
+def rebuild_daily_rollups(db):
+    service = RollupService(db)
+    for table_type in RollupService.ROLLUP_MAP:
+        service.rebuild(table_type)
+    return tuple(RollupService.ROLLUP_MAP)
+
+
+def rebuild_payment_lines(db):
+    PaymentLineService(db).rebuild_all()
+    return tuple(PaymentLineService.FACT_MODEL_MAP)
+
+
+def rebuild_room_hourly(db):
+    RollupService(db).rebuild_room_hourly()
+    return ("room",)
+
+
+# 派生表名 -> 重建函数（返回受影响的表类型，用于递增数据版本）
+TARGETS = {
+    "daily_rollups": rebuild_daily_rollups,
+    "payment_lines": rebuild_payment_lines,
+    "room_hourly": rebuild_room_hourly,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="从事实表全量重建派生表")
+    parser.add_argument(
+        "--only", action="append", choices=sorted(TARGETS),
+        help="只重建指定派生表（可重复，默认全部）",
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        store_ids = db.execute(select(DimStore.id)).scalars().all()
+        for name in args.only or TARGETS:
+            start = time.perf_counter()
+            try:
+                table_types = TARGETS[name](db)
+                for table_type in table_types:
+                    bump_data_versions(db, table_type, store_ids)
+                db.commit()
+            except Exception as exc:
+                db.rollback()
+                print(f"❌ {name} 重建失败: {exc}")
+                return 1
+            print(f"✅ {name} 重建完成，耗时 {time.perf_counter() - start:.1f}s")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""
+测试公共配置
+
+- 把 backend 目录加入 sys.path，便于直接 import app.*
+- sqlite_session：内存 SQLite 会话，按需建表（只建表不建索引：
+  SQLite 的索引名全库唯一，而各表沿用了同名索引）
+"""
+
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateTable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def sqlite_session():
+    """返回 (建表函数, 会话)；建表函数接收 ORM 模型列表"""
+    engine = create_engine("sqlite://")
+    session = sessionmaker(bind=engine)()
+
+    def create_tables(*models):
+        with engine.begin() as conn:
+            for model in models:
+                conn.execute(CreateTable(model.__table__))
+
+    try:
+        yield create_tables, session
+    finally:
+        session.close()
+        engine.dispose()
@@ -0,0 +1,45 @@
+"""
+AuthPrincipalCache 跨进程失效
+"""
+
+from app.services.auth_cache import AuthPrincipalCache
+
+
+USER = {"id": 1, "username": "manager01", "role": "manager", "store_id": 1}
+
+
+def _cache(tmp_path):
+    return AuthPrincipalCache(
+        max_entries=10, ttl_seconds=300, epoch_path=str(tmp_path / "auth" / "epoch")
+    )
+
+
+def test_set_caches_when_epoch_unchanged(tmp_path):
+    cache = _cache(tmp_path)
+    epoch = cache.current_epoch()
+    cache.set("token", USER, epoch)
+    assert cache.get("token") == USER
+
+
+def test_set_skips_when_other_worker_invalidated_during_lookup(tmp_path):
+    cache = _cache(tmp_path)
+    other_worker = _cache(tmp_path)
+
+    epoch = cache.current_epoch()  # 查库前
+    other_worker.invalidate_user(user_id=1)  # 查库期间其他进程强制登出
+    cache.set("token", USER, epoch)
+
+    assert cache.get("token") is None
+
+
+def test_set_skips_when_same_worker_invalidated_during_lookup(tmp_path):
+    cache = _cache(tmp_path)
+    cache.invalidate_user(user_id=2)
+    epoch = cache.current_epoch()
+    cache.invalidate_user(user_id=1)
+    cache.set("token", USER, epoch)
+
+    assert cache.get("token") is None
+    # 失效之后重新查库的结果可以写入
+    cache.set("token", USER, cache.current_epoch())
+    assert cache.get("token") == USER
@@ -0,0 +1,134 @@
+"""
+Cleaner 向量化转换与逐值转换的一致性
+
+_clean_numeric_series / _clean_datetime_series / _round_float_array
+必须与 _clean_numeric_value / _clean_datetime_value / round() 逐值结果一致。
+"""
+
+import math
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.cleaner import (
+    _clean_datetime_series,
+    _clean_datetime_value,
+    _clean_numeric_series,
+    _clean_numeric_value,
+    _round_float_array,
+)
+
+
+NUMERIC_SAMPLES = [
+    1, 0, -3, 2.5, -2.5, True, False,
+    "¥1,234.5", "¥1,234.50", "-¥1,234.5", "¥-1,234.5", "$ 99", "1,000,000",
+    "-12.30", " -0.5 ", "12%", "-12.5%", "%", "1e3", "-1E-2", "0.1234567890123456789",
+    "1_000", "--", "-", "免单", "  ", "", "nan", "NaN", "None", "inf", "-inf",
+    None, np.nan, float("nan"), pd.NaT, 45000, 45000.5,
+]
+
+DATETIME_SAMPLES = [
+    "2025-12-01 10:00:00", "2025-12-01 10:00", "2025-12-01", "2025/12/1 8:05",
+    "2025/12/01 23:59:59", "2025/12/01", "01/12/2025 23:59:59", "01/12/2025",
+    " 2025-1-5 ", "2025.12.01", "20251201", "2025-02-30", "--", "nan", "", None, np.nan,
+    datetime(2025, 12, 1, 10, 0, 0, 123), datetime(2025, 12, 1),
+    pd.Timestamp("2025-12-01 10:00"), pd.NaT,
+    # Excel 序列日期（数字及其字符串形式）
+    45000, 45000.5, "45000", "无效日期",
+]
+
+ROUNDING_SAMPLES = [
+    0.0, -0.0, 0.005, 0.015, 0.125, 0.135, 1.005, -1.005, 2.675, -2.675,
+    1.115, 1234.565, -1234.565, 0.285, 1e-9, -0.004999999, 12345678.995,
+    1e15 + 0.125, 2.0**52, -(2.0**53) + 1, 1e300, float("inf"), float("-inf"),
+    float("nan"),
+]
+
+
+def _same(expected, actual) -> bool:
+    if isinstance(expected, float) and math.isnan(expected):
+        return isinstance(actual, float) and math.isnan(actual)
+    return expected == actual and type(expected) is type(actual)
+
+
+def _numeric_variants(samples):
+    """同一组取值的不同列形态：object 列与 category 列"""
+    objects = pd.Series(samples, dtype=object)
+    strings = [value for value in samples if isinstance(value, str)]
+    yield "object", objects
+    yield "category", pd.Series(strings + [None], dtype="category")
+
+
+@pytest.mark.parametrize("kind, series", list(_numeric_variants(NUMERIC_SAMPLES)))
+def test_numeric_series_matches_scalar(kind, series):
+    expected = [_clean_numeric_value(value) for value in series.astype(object)]
+    actual = _clean_numeric_series(series)
+
+    assert actual.dtype == np.float64
+    assert actual.index.equals(series.index)
+    for value, exp, act in zip(series.astype(object), expected, actual.tolist()):
+        assert _same(float(exp), act), (kind, value, exp, act)
+
+
+@pytest.mark.parametrize(
+    "series",
+    [
+        pd.Series([1, -2, 3], dtype=np.int64),
+        pd.Series([1.25, np.nan, -0.5]),
+        pd.Series([True, False]),
+    ],
+)
+def test_numeric_series_native_dtypes(series):
+    expected = [_clean_numeric_value(value) for value in series.astype(object)]
+    assert _clean_numeric_series(series).tolist() == expected
+
+
+def test_numeric_series_keeps_index():
+    series = pd.Series(["¥1,234.5", "--", "-7"], index=[10, 20, 30], dtype=object)
+    actual = _clean_numeric_series(series)
+    assert actual.to_dict() == {10: 1234.5, 20: 0.0, 30: -7.0}
+
+
+def test_datetime_series_matches_scalar():
+    series = pd.Series(DATETIME_SAMPLES, dtype=object)
+    expected = [_clean_datetime_value(value) for value in DATETIME_SAMPLES]
+    assert _clean_datetime_series(series).tolist() == expected
+
+
+def test_datetime_series_category_matches_scalar():
+    strings = [value for value in DATETIME_SAMPLES if isinstance(value, str)]
+    series = pd.Series(strings + [None], dtype="category")
+    expected = [_clean_datetime_value(value) for value in series.astype(object)]
+    assert _clean_datetime_series(series).tolist() == expected
+
+
+def test_datetime_series_datetime64_matches_scalar():
+    series = pd.Series(
+        [pd.Timestamp("2025-12-01 10:00:00"), pd.NaT, pd.Timestamp("2025-12-01 10:00:00.250")],
+        dtype="datetime64[ns]",
+    )
+    expected = [_clean_datetime_value(value) for value in series]
+    assert _clean_datetime_series(series).tolist() == expected
+
+
+def test_round_float_array_matches_builtin_round():
+    values = np.array(ROUNDING_SAMPLES, dtype=np.float64)
+    for ndigits in (0, 1, 2, 4):
+        actual = _round_float_array(values, ndigits)
+        for value, act in zip(ROUNDING_SAMPLES, actual.tolist()):
+            assert _same(round(value, ndigits), act), (value, ndigits, act)
+
+
+def test_round_float_array_matches_builtin_round_on_random_amounts():
+    rng = np.random.default_rng(20251201)
+    # 金额常见形态：两位小数附近 ±1 ulp 的值、三位小数的 .xx5
+    cents = rng.integers(-10**9, 10**9, size=20000) / 100.0
+    halves = (rng.integers(-10**8, 10**8, size=20000) * 10 + 5) / 1000.0
+    values = np.concatenate(
+        [cents, np.nextafter(cents, np.inf), np.nextafter(cents, -np.inf), halves]
+    )
+    actual = _round_float_array(values, 2)
+    expected = np.array([round(float(value), 2) for value in values])
+    assert np.array_equal(actual, expected)
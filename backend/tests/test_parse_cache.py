@@ -0,0 +1,50 @@
+"""
+ParseCache 缓存键与跨进程计数文件
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+from app.services.parse_cache import ParseCache, _HOSTNAME
+
+
+def _exited_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_csv_frames_are_keyed_by_engine(tmp_path):
+    cache = ParseCache(str(tmp_path), max_bytes=1024 * 1024)
+    df = pd.DataFrame({"金额": [1, 2]})
+    cache.put_frame("abc", "预订汇总.csv", df, "2025-12-01", csv_engine="c")
+
+    assert cache.get_frame("abc", "预订汇总.csv", csv_engine="pyarrow") is None
+    cached_df, detected_date = cache.get_frame("abc", "预订汇总.csv", csv_engine="c")
+    assert cached_df.equals(df)
+    assert detected_date == "2025-12-01"
+    # Excel 与 CSV 引擎无关
+    cache.put_frame("abc", "预订汇总.xlsx", df, None, csv_engine="c")
+    assert cache.get_frame("abc", "预订汇总.xlsx", csv_engine="pyarrow") is not None
+
+
+def test_stats_drop_counters_of_exited_processes(tmp_path):
+    stats_dir = tmp_path / "stats"
+    stats_dir.mkdir()
+    dead_pid = _exited_pid()
+    for name in (f"{_HOSTNAME}-{dead_pid}.json", f"{dead_pid}.json", "其他主机-1.json"):
+        (stats_dir / name).write_text(json.dumps({"frame_hits": 5}), encoding="utf-8")
+
+    cache = ParseCache(str(tmp_path), max_bytes=1024 * 1024)
+    cache.get_frame("missing", "a.csv")
+
+    assert sorted(os.listdir(stats_dir)) == sorted(
+        [f"{_HOSTNAME}-{os.getpid()}.json", "其他主机-1.json"]
+    )
+    stats = cache.stats()
+    assert stats["frame_misses"] == 1
+    assert stats["frame_hits"] == 5  # 其他主机的计数保留
@@ -0,0 +1,104 @@
+"""
+StatsService.query_stats 游标分页与页码分页一致性
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models.dims import DimEmployee, DimStore
+from app.models.facts import FactBooking, FactPaymentLine
+from app.services.stats import StatsService
+
+
+START = date(2026, 9, 1)
+END = date(2026, 9, 30)
+PAGE_SIZE = 3
+
+
+@pytest.fixture
+def stats_service(sqlite_session):
+    create_tables, session = sqlite_session
+    create_tables(DimStore, DimEmployee, FactBooking, FactPaymentLine)
+
+    session.add(DimStore(id=1, store_name="一店"))
+    fact_id = 0
+    for employee_id in range(1, 9):
+        session.add(DimEmployee(id=employee_id, store_id=1, name=f"员工{employee_id}"))
+        # 每人两天数据，实收各不相同
+        for day in (3, 17):
+            fact_id += 1
+            session.add(
+                FactBooking(
+                    id=fact_id,
+                    batch_id=1,
+                    biz_date=date(2026, 9, day),
+                    store_id=1,
+                    employee_id=employee_id,
+                    booking_qty=1,
+                    actual_amount=Decimal(employee_id * 100 + day),
+                )
+            )
+    session.commit()
+
+    service = StatsService(session)
+    service.use_cache = False
+    return service
+
+
+def _query(service, **kwargs):
+    return service.query_stats(
+        "booking",
+        START,
+        END,
+        store_id=1,
+        dimension="employee",
+        page_size=PAGE_SIZE,
+        **kwargs,
+    )
+
+
+def _snapshot(rows):
+    return [
+        (row["dimension_key"], float(row["actual"]), round(float(row["contribution_pct"]), 6))
+        for row in rows
+    ]
+
+
+@pytest.mark.parametrize(
+    "sort",
+    [
+        {"sort_by": "actual", "sort_order": "desc"},  # 游标条件落在 HAVING 上
+        {"sort_by": "dimension_key", "sort_order": "asc"},  # 游标条件落在 WHERE 上
+    ],
+)
+def test_cursor_page_matches_offset_page(stats_service, sort):
+    first = _query(stats_service, **sort)
+    assert first["meta"]["has_more"]
+
+    by_cursor = _query(stats_service, cursor=first["meta"]["next_cursor"], **sort)
+    by_offset = _query(stats_service, page=2, **sort)
+
+    assert _snapshot(by_cursor["rows"]) == _snapshot(by_offset["rows"])
+
+
+def test_contribution_pct_uses_grand_total_on_every_page(stats_service):
+    sort = {"sort_by": "actual", "sort_order": "desc"}
+    grand_total = sum(employee_id * 200 + 20 for employee_id in range(1, 9))
+
+    rows = []
+    cursor = None
+    while True:
+        result = _query(stats_service, cursor=cursor, **sort)
+        rows.extend(result["rows"])
+        cursor = result["meta"]["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(rows) == 8
+    for row in rows:
+        assert float(row["contribution_pct"]) == pytest.approx(
+            float(row["actual"]) * 100.0 / grand_total
+        )
+    assert sum(float(row["contribution_pct"]) for row in rows) == pytest.approx(100.0)
@@ -32,11 +32,15 @@ export function parseFile(file, storeId = null) {
 /**
  * 确认入库
  * @param {string} sessionId - 解析会话ID
- * @returns {Promise} 入库结果
+ * @param {boolean} asyncMode - 异步模式：立即返回任务信息，需通过 waitForUploadJob 轮询结果
+ * @returns {Promise} 入库结果 (异步模式下为任务信息)
  */
-export function confirmImport(sessionId) {
+export function confirmImport(sessionId, asyncMode = false) {
   const formData = new FormData()
   formData.append('session_id', sessionId)
+  if (asyncMode) {
+    formData.append('async_mode', 'true')
+  }
   
   return request({
     url: '/upload/confirm',
@@ -60,3 +64,36 @@ export function cancelUpload(sessionId) {
   })
 }
 
+
+/**
+ * 查询后台解析/入库任务
+ * @param {string} jobId - 任务ID
+ * @returns {Promise} 任务信息 (status/stage/progress/result)
+ */
+export function getUploadJob(jobId) {
+  return request({
+    url: `/upload/jobs/${jobId}`,
+    method: 'GET',
+  })
+}
+
+/**
+ * 轮询后台任务直到结束
+ * @param {string} jobId - 任务ID
+ * @param {Function} onProgress - 每次轮询回调，参数为任务信息
+ * @param {number} interval - 轮询间隔 (毫秒)
+ * @returns {Promise} 结束时的任务信息 (status 为 success 或 failed)
+ */
+export async function waitForUploadJob(jobId, onProgress = null, interval = 1000) {
+  for (;;) {
+    const response = await getUploadJob(jobId)
+    const job = response.data
+    if (onProgress) {
+      onProgress(job)
+    }
+    if (job.status === 'success' || job.status === 'failed') {
+      return job
+    }
+    await new Promise((resolve) => setTimeout(resolve, interval))
+  }
+}